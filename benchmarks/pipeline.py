@@ -0,0 +1,301 @@
+"""End-to-end pipeline benchmark.
+
+Runs every stage of report production over N synthetic tickers against the
+offline fake backend, in a throwaway database and output directory:
+
+    profile -> prompts -> generate -> assemble -> qa -> save -> export
+
+and reports per-stage wall time, throughput and peak RSS as JSON. With a
+baseline file, each metric is compared against it and the run fails (exit
+status 1) when any of them regresses by more than ``--threshold``.
+
+    python -m benchmarks.pipeline --tickers 20
+    python -m benchmarks.pipeline --tickers 20 --update-baseline
+    python -m benchmarks.pipeline --latency 0.5 --tokens-per-second 400 --no-compare
+
+Baselines are machine specific; refresh ``benchmarks/baseline.json`` with
+``--update-baseline`` when moving to new hardware.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.config import DEFAULT_CONFIG, FRAMEWORKS_DIR
+from src.db import close_databases, init_db, save_framework, save_many_companies, save_many_reports
+from src.frameworks.base import build_effective_framework
+from src.generator.assembler import assemble_report
+from src.generator.profiler import create_company_profile
+from src.generator.prompts import build_section_prompt
+from src.generator.qa import run_qa_checks
+from src.generator.ratelimit import RateLimiter
+from src.generator.scheduler import generate_many
+from src.generator.writer import GenerationSession
+from src.output.markdown import export_markdown
+
+STAGES = ("profile", "prompts", "generate", "assemble", "qa", "save", "export")
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.2
+# Stages whose baseline is faster than this per report are timer noise, not checked.
+MIN_STAGE_MS = 1.0
+
+
+def synthetic_citations(ticker: str, count: int = 12) -> list[dict]:
+    """Citation list shaped like the research stage output."""
+    return [
+        {
+            "title": f"{ticker} source {i}",
+            "subject": "Financial data" if i % 2 else "Industry analysis",
+            "url": f"https://example.com/{ticker.lower()}/{i}",
+            "date": "2026-01-15",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def _profile(ticker: str, framework_id: str) -> dict:
+    profile = create_company_profile(
+        ticker,
+        name=f"{ticker} Holdings",
+        exchange="NASDAQ",
+        sector_framework=framework_id,
+        reference_quarter="Q4 FY2025",
+        auto_fetch=False,
+    )
+    profile["financials"]["revenue"] = {"current": 12.5e9, "prior_year": 10.1e9, "yoy_pct": 23.8}
+    profile["valuation"]["peers"] = ["PEER1", "PEER2", "PEER3"]
+    return profile
+
+
+def _session(args) -> GenerationSession:
+    config = {
+        **DEFAULT_CONFIG,
+        "backend": "fake",
+        "fake_backend": {
+            **DEFAULT_CONFIG["fake_backend"],
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "seed": args.seed,
+        },
+        "concurrency": args.concurrency,
+        "cache_enabled": False,
+    }
+    # Unlimited limiter: the benchmark measures our code, not API quotas.
+    return GenerationSession(config, limiter=RateLimiter())
+
+
+def run_once(args, raw_framework: dict, workdir: Path) -> dict:
+    """Run every stage once over ``args.tickers`` tickers; returns stage seconds."""
+    db_path = workdir / "bench.db"
+    output_dir = workdir / "output"
+    init_db(db_path)
+    framework_id = save_framework(raw_framework, db_path)
+    framework = build_effective_framework(raw_framework)
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    timings = {}
+
+    def _stage(name, fn):
+        start = time.perf_counter()
+        value = fn()
+        timings[name] = time.perf_counter() - start
+        return value
+
+    def _profiles():
+        profiles = {ticker: _profile(ticker, framework_id) for ticker in tickers}
+        save_many_companies(list(profiles.values()), db_path=db_path)
+        return profiles
+
+    profiles = _stage("profile", _profiles)
+    citations = {t: synthetic_citations(t) for t in tickers}
+
+    _stage("prompts", lambda: [
+        build_section_prompt(
+            section, profiles[t], citations=citations[t], full_framework=framework,
+        )
+        for t in tickers for section in framework["sections"]
+    ])
+
+    jobs = [
+        {"ticker": t, "profile": profiles[t], "framework": framework, "citations": citations[t]}
+        for t in tickers
+    ]
+    with _session(args) as session:
+        results = _stage("generate", lambda: generate_many(jobs, session))
+    failed = sum(r["status"] != "generated" for rs in results.values() for r in rs)
+    if failed:
+        raise RuntimeError(f"{failed} section(s) failed to generate")
+
+    reports = _stage("assemble", lambda: {
+        t: assemble_report(results[t], profiles[t], framework, citations[t]) for t in tickers
+    })
+
+    def _qa():
+        for report in reports.values():
+            report["qa_results"] = run_qa_checks(report)
+
+    _stage("qa", _qa)
+    _stage("save", lambda: save_many_reports(list(reports.values()), db_path=db_path))
+    _stage("export", lambda: [
+        export_markdown(reports[t], profiles[t], output_dir) for t in tickers
+    ])
+    return timings
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def run_benchmark(args) -> dict:
+    """Run the pipeline ``args.repeat`` times and keep each stage's best time."""
+    with open(FRAMEWORKS_DIR / f"{args.framework}.json") as f:
+        raw_framework = json.load(f)
+
+    best = dict.fromkeys(STAGES, float("inf"))
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory(prefix="irf-bench-") as tmp:
+            try:
+                timings = run_once(args, raw_framework, Path(tmp))
+            finally:
+                close_databases()
+        for stage, seconds in timings.items():
+            best[stage] = min(best[stage], seconds)
+
+    total = sum(best.values())
+    return {
+        "benchmark": "pipeline",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "tickers": args.tickers,
+            "sections": len(build_effective_framework(raw_framework)["sections"]),
+            "framework": args.framework,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "seed": args.seed,
+        },
+        "stages": {
+            stage: {
+                "seconds": round(best[stage], 4),
+                "per_report_ms": round(best[stage] * 1000 / args.tickers, 3),
+            }
+            for stage in STAGES
+        },
+        "total_seconds": round(total, 4),
+        "reports_per_minute": round(args.tickers * 60 / total, 1) if total else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_to_baseline(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Compare a run against a baseline run.
+
+    Stage times and peak RSS regress when they grow by more than
+    ``threshold`` (a fraction); throughput regresses when it drops by more
+    than the same fraction. Stage times are compared per report, so runs
+    with different ticker counts remain comparable.
+    """
+    checks = []
+    for stage in STAGES:
+        base = baseline.get("stages", {}).get(stage, {}).get("per_report_ms")
+        value = current["stages"][stage]["per_report_ms"]
+        if base is not None and base >= MIN_STAGE_MS:
+            checks.append((f"{stage}.per_report_ms", base, value, True))
+    checks.append(("reports_per_minute", baseline.get("reports_per_minute"),
+                   current.get("reports_per_minute"), False))
+    checks.append(("peak_rss_mb", baseline.get("peak_rss_mb"), current.get("peak_rss_mb"), True))
+
+    metrics = []
+    for name, base, value, lower_is_better in checks:
+        if not base or value is None:
+            continue
+        change = (value - base) / base
+        regressed = change > threshold if lower_is_better else change < -threshold
+        metrics.append({
+            "metric": name,
+            "baseline": base,
+            "current": value,
+            "change_pct": round(change * 100, 1),
+            "regressed": regressed,
+        })
+
+    keys = ("framework", "concurrency", "latency", "tokens_per_second")
+    base_params = baseline.get("params", {})
+    differs = [k for k in keys if base_params.get(k) != current["params"].get(k)]
+    note = f"baseline was recorded with different {', '.join(differs)}" if differs else ""
+    return {
+        "threshold": threshold,
+        "metrics": metrics,
+        "regressions": [m["metric"] for m in metrics if m["regressed"]],
+        "note": note,
+    }
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pipeline",
+        description="Benchmark the report pipeline against the offline fake backend.",
+    )
+    parser.add_argument("--tickers", type=int, default=20, help="Synthetic tickers per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs; the best time per stage is kept")
+    parser.add_argument("--framework", default="semiconductor_fabless", help="Built-in framework ID")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONFIG["concurrency"])
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per call")
+    parser.add_argument("--tokens-per-second", type=float, default=0,
+                        help="Simulated streaming speed (0 = instant)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed regression as a fraction (0.2 = 20%%)")
+    parser.add_argument("--no-compare", action="store_true", help="Skip the baseline comparison")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write this run to the baseline file")
+    parser.add_argument("--output", type=Path, help="Also write the JSON result here")
+    args = parser.parse_args(argv)
+    if args.tickers < 1 or args.repeat < 1:
+        parser.error("--tickers and --repeat must be at least 1")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    result = run_benchmark(args)
+
+    if not args.no_compare and not args.update_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        result["comparison"] = compare_to_baseline(result, baseline, args.threshold)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(text + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+
+    regressions = result.get("comparison", {}).get("regressions", [])
+    if regressions:
+        print(f"Performance regression: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,19 +9,31 @@ from pathlib import Path
 import click
 from rich.console import Console
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 
 from src.config import set_config_value, load_config, PROJECT_ROOT
-from src.db import init_db, get_reports_for_company
+from src.db import init_db, get_latest_report, list_report_metadata, save_many_reports, update_report
 from src.frameworks.base import build_effective_framework, get_total_word_target, get_total_citation_target
 from src.frameworks.manager import FrameworkManager
-from src.generator.assembler import assemble_report, render_report_markdown, save_assembled_report
+from src.generator.assembler import (
+    assemble_report,
+    checkpoint_section,
+    find_resumable_report,
+    new_report_checkpoint,
+    record_report_usage,
+    render_report_markdown,
+    save_assembled_report,
+    split_resume_sections,
+    start_report_checkpoint,
+)
+from src.generator.cache import ResponseCache
 from src.generator.profiler import create_company_profile, format_profile_summary, save_company_profile
 from src.generator.qa import run_qa_checks, format_qa_report
-from src.generator.writer import write_all_sections
-from src.output.markdown import export_markdown
+from src.generator.writer import GenerationSession, write_all_sections
+from src.output.markdown import PartialReportWriter, export_markdown, partial_path
 from src.research.citations import create_citation, assign_citation_ids
+from src.tracing import disable_tracing, enable_tracing, span
 
 console = Console()
 fm = FrameworkManager()
@@ -29,13 +41,18 @@ fm = FrameworkManager()
 
 @click.group()
 @click.version_option(version="0.1.0", prog_name="irf")
-def main():
+@click.option("--timings", is_flag=True, help="Print a per-stage timing breakdown when the command ends")
+@click.option("--trace", "trace_path", type=click.Path(dir_okay=False), default=None,
+              help="Write a Chrome trace (open in https://ui.perfetto.dev) to this file")
+@click.pass_context
+def main(ctx: click.Context, timings: bool, trace_path: str | None):
     """Investment Report Framework Creator (IRF).
 
     Create, manage, and deploy sector-specific investment analysis frameworks
     to produce institutional-grade research reports.
     """
-    pass
+    if timings or trace_path:
+        _start_tracing(ctx, timings, trace_path)
 
 
 # ── Init ──
@@ -44,8 +61,11 @@ def main():
 def init():
     """Initialize the project database and load built-in frameworks."""
     console.print("[bold]Initializing IRF...[/bold]")
-    init_db()
-    console.print("  Database initialized.")
+    applied = init_db()
+    if applied:
+        console.print(f"  Database initialized (schema v{applied[-1]}, {len(applied)} migration(s) applied).")
+    else:
+        console.print("  Database up to date.")
     count = fm.load_builtin_frameworks()
     console.print(f"  Loaded {count} built-in framework(s).")
     console.print("[green]Ready! Run 'irf framework list' to see available frameworks.[/green]")
@@ -327,8 +347,24 @@ def report_new(ticker: str, framework_id: str, quarter: str, no_fetch: bool):
 @report.command("generate")
 @click.argument("ticker")
 @click.option("--section", "section_id", type=int, default=None, help="Generate a single section")
-@click.option("--quick", is_flag=True, help="Quick 2-3K word analysis (not implemented yet)")
-def report_generate(ticker: str, section_id: int | None, quick: bool):
+@click.option("--quick", is_flag=True, help="Quick 2-3K word analysis from a single API call")
+@click.option("--concurrency", type=int, default=None, help="Sections generated in parallel (default: config)")
+@click.option("--no-cache", is_flag=True, help="Bypass the response cache for this run")
+@click.option("--refresh-section", "refresh_sections", type=int, multiple=True,
+              help="Regenerate this section even if cached (repeatable)")
+@click.option("--resume", is_flag=True, help="Continue the last unfinished report, regenerating only missing or failed sections")
+@click.option("--deadline", type=float, default=None,
+              help="Seconds allowed for the run; unfinished sections time out (default: config report_deadline)")
+def report_generate(
+    ticker: str,
+    section_id: int | None,
+    quick: bool,
+    concurrency: int | None,
+    no_cache: bool,
+    refresh_sections: tuple[int, ...],
+    resume: bool,
+    deadline: float | None,
+):
     """Generate the report (or a single section) for a company."""
     ticker = ticker.upper()
 
@@ -347,6 +383,13 @@ def report_generate(ticker: str, section_id: int | None, quick: bool):
 
     effective = build_effective_framework(fw_config)
 
+    if quick:
+        if section_id is not None or resume or refresh_sections:
+            console.print("[red]--quick cannot be combined with --section, --refresh-section or --resume.[/red]")
+            return
+        _generate_quick(ticker, profile, effective, no_cache)
+        return
+
     # Filter to single section if requested
     if section_id is not None:
         effective["sections"] = [
@@ -356,46 +399,118 @@ def report_generate(ticker: str, section_id: int | None, quick: bool):
             console.print(f"[red]Section {section_id} not found in framework.[/red]")
             return
 
+    # A single summary section is written from the latest report's body
+    # sections, so it can be regenerated on its own.
+    previous = []
+    if section_id is not None:
+        latest = get_latest_report(ticker)
+        if latest:
+            previous = [
+                s for s in latest.get("sections") or []
+                if s.get("status") == "generated" and s["section_id"] != section_id
+            ]
+
+    # Every finished section is checkpointed onto an in-progress report row,
+    # so an interrupted run can be picked up again with --resume.
+    kept = []
+    pending = effective["sections"]
+    checkpoint = find_resumable_report(ticker) if resume else None
+    if resume and checkpoint is None:
+        console.print(f"[yellow]No unfinished report for {ticker}; starting a new one.[/yellow]")
+    if checkpoint is not None:
+        kept, pending = split_resume_sections(checkpoint, effective)
+        checkpoint["status"] = "in_progress"
+        console.print(
+            f"[dim]Resuming report {checkpoint['id']}: {len(kept)} section(s) kept, "
+            f"{len(pending)} to generate.[/dim]"
+        )
+    else:
+        checkpoint = start_report_checkpoint(profile, effective)
+
     console.print(Panel(
         f"Generating report for [bold]{profile['metadata']['name']}[/bold] ({ticker})\n"
         f"Framework: {effective['display_name']}\n"
-        f"Sections: {len(effective['sections'])}",
+        f"Sections: {len(pending)}",
         title="Report Generation",
     ))
 
+    cfg = load_config()
+    if deadline is not None:
+        cfg["report_deadline"] = deadline
+    cache = None if no_cache else ResponseCache.from_config(cfg, refresh_sections=set(refresh_sections))
+    if cache is not None:
+        cache.evict()
+    partial = _open_partial(cfg, ticker, checkpoint, profile, effective, kept)
+    if partial is not None:
+        console.print(f"[dim]Live output: {partial.path} (irf report view {ticker} --follow)[/dim]")
+
     # Generate sections with progress
-    results = []
-    with Progress(
+    with GenerationSession(config=cfg, cache=cache) as session, Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
     ) as progress:
-        for section in effective["sections"]:
-            task = progress.add_task(
-                f"[{section['id']}/11] {section['name']}...",
-                total=None,
-            )
-            from src.generator.writer import write_section
-            result = write_section(
-                section=section,
+        names = {s["id"]: s["name"] for s in effective["sections"]}
+        tasks = {}
+
+        def on_progress(sid: int, status: str, result: dict | None):
+            if status == "generating":
+                tasks[sid] = progress.add_task(f"[{sid}/11] {names[sid]}...", total=None)
+                return
+            checkpoint_section(checkpoint, result)
+            if partial is not None:
+                partial.section_done(result)
+            if result["status"] == "generated":
+                status_str = f"[green]{result['word_count']} words[/green]"
+            elif result["status"] == "timeout":
+                status_str = "[yellow]timed out[/yellow]"
+            else:
+                status_str = f"[red]{result.get('error', 'Error')}[/red]"
+            # Sections expired at the deadline were never dispatched
+            if sid not in tasks:
+                tasks[sid] = progress.add_task("", total=None)
+            progress.update(tasks[sid], description=f"[{sid}/11] {names[sid]} - {status_str}")
+            progress.update(tasks[sid], completed=True)
+
+        generated = None
+        try:
+            generated = write_all_sections(
+                effective_framework=effective,
                 company_profile=profile,
-                framework=effective,
+                progress_callback=on_progress,
+                concurrency=concurrency,
+                session=session,
+                completed=kept or previous,
+                on_delta=partial.write_delta if partial is not None else None,
+                sections=pending,
             )
-            results.append(result)
-
-            status_str = (
-                f"[green]{result['word_count']} words[/green]"
-                if result["status"] == "generated"
-                else f"[red]{result.get('error', 'Error')}[/red]"
+        except KeyboardInterrupt:
+            console.print(
+                f"\n[yellow]Interrupted. Completed sections are saved; "
+                f"continue with: irf report generate {ticker} --resume[/yellow]"
             )
-            progress.update(task, description=f"[{section['id']}/11] {section['name']} - {status_str}")
-            progress.update(task, completed=True)
+            sys.exit(130)
+        finally:
+            if partial is not None:
+                partial.close(aborted=generated is None)
+
+    _print_generation_stats(session, cache)
+
+    by_id = {r["section_id"]: r for r in kept + generated}
+    results = [by_id[s["id"]] for s in effective["sections"]]
+    timed_out = [r["section_id"] for r in generated if r["status"] == "timeout"]
+    if timed_out:
+        console.print(
+            f"[yellow]Deadline reached: section(s) {timed_out} timed out. "
+            f"Finish them with: irf report generate {ticker} --resume[/yellow]"
+        )
 
     # Assemble report
     report_obj = assemble_report(
         sections=results,
         company_profile=profile,
         framework=effective,
+        report_id=checkpoint["id"],
     )
 
     # Save
@@ -406,7 +521,7 @@ def report_generate(ticker: str, section_id: int | None, quick: bool):
     # Auto-export markdown
     md_path = export_markdown(report_obj, profile)
     report_obj["output_paths"] = {"markdown": str(md_path)}
-    save_assembled_report(report_obj)
+    update_report(report_id, {"output_paths": report_obj["output_paths"]})
 
     console.print(f"[green]Markdown exported: {md_path}[/green]")
     console.print(f"\nNext steps:")
@@ -415,35 +530,420 @@ def report_generate(ticker: str, section_id: int | None, quick: bool):
     console.print(f"  irf report export {ticker}   # Export to other formats")
 
 
+@report.command("generate-many")
+@click.argument("tickers", nargs=-1)
+@click.option("--tickers-file", type=click.Path(exists=True), default=None,
+              help="File with tickers to generate (one or more per line)")
+@click.option("--concurrency", type=int, default=None, help="Sections in flight across all tickers (default: config)")
+@click.option("--per-ticker", type=int, default=None, help="Sections in flight for any one ticker")
+@click.option("--priority", "priorities", multiple=True, metavar="TICKER[=N]",
+              help="Schedule a ticker ahead of others (repeatable, default N=1)")
+@click.option("--no-cache", is_flag=True, help="Bypass the response cache for this run")
+@click.option("--resume", is_flag=True, help="Continue each ticker's last unfinished report")
+@click.option("--deadline", type=float, default=None,
+              help="Seconds allowed for the whole run; unfinished sections time out (default: config report_deadline)")
+def report_generate_many(
+    tickers: tuple[str, ...],
+    tickers_file: str | None,
+    concurrency: int | None,
+    per_ticker: int | None,
+    priorities: tuple[str, ...],
+    no_cache: bool,
+    resume: bool,
+    deadline: float | None,
+):
+    """Generate reports for several companies from one shared work queue."""
+    from src.db import get_company_by_ticker
+    from src.generator.scheduler import generate_many
+
+    names = []
+    for ticker in list(tickers) + (_read_tickers_file(Path(tickers_file)) if tickers_file else []):
+        if ticker.upper() not in names:
+            names.append(ticker.upper())
+    if not names:
+        console.print("[red]Provide tickers as arguments or with --tickers-file.[/red]")
+        return
+
+    ranks = {}
+    for entry in priorities:
+        ticker, _, rank = entry.partition("=")
+        ranks[ticker.upper()] = int(rank) if rank else 1
+
+    jobs = []
+    checkpoints = {}
+    started = []
+    kept = {}
+    for ticker in names:
+        company = get_company_by_ticker(ticker)
+        if company is None:
+            console.print(f"[yellow]Skipping {ticker}: no profile (run: irf report new {ticker})[/yellow]")
+            continue
+        profile = company["profile"]
+        effective = fm.get_effective(profile.get("metadata", {}).get("sector_framework", ""))
+        if effective is None:
+            console.print(f"[yellow]Skipping {ticker}: framework not found[/yellow]")
+            continue
+        checkpoint = find_resumable_report(ticker) if resume else None
+        if checkpoint is not None:
+            kept[ticker], pending = split_resume_sections(checkpoint, effective)
+            checkpoint["status"] = "in_progress"
+        else:
+            kept[ticker], pending = [], effective["sections"]
+            checkpoint = new_report_checkpoint(profile, effective)
+            started.append(checkpoint)
+        checkpoints[ticker] = checkpoint
+        jobs.append({
+            "ticker": ticker,
+            "profile": profile,
+            "framework": effective,
+            "sections": pending,
+            "priority": ranks.get(ticker, 0),
+            "completed": kept[ticker],
+        })
+    if not jobs:
+        console.print("[red]No tickers to generate.[/red]")
+        return
+    save_many_reports(started)
+
+    cfg = load_config()
+    if deadline is not None:
+        cfg["report_deadline"] = deadline
+    cache = None if no_cache else ResponseCache.from_config(cfg)
+    if cache is not None:
+        cache.evict()
+
+    by_ticker = {job["ticker"]: job for job in jobs}
+    summary = {}
+    partials = {}
+    for job in jobs:
+        ticker = job["ticker"]
+        partial = _open_partial(
+            cfg, ticker, checkpoints[ticker], job["profile"], job["framework"], kept[ticker],
+        )
+        if partial is not None:
+            partials[ticker] = partial
+
+    with GenerationSession(config=cfg, cache=cache) as session, Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        console=console,
+    ) as progress:
+        overall = progress.add_task(
+            "[bold]All tickers[/bold]",
+            total=sum(len(job["sections"]) for job in jobs),
+        )
+        tasks = {
+            job["ticker"]: progress.add_task(job["ticker"], total=len(job["sections"]))
+            for job in jobs
+        }
+
+        def on_progress(ticker: str, sid: int, status: str, result: dict | None):
+            if status == "generating":
+                return
+            checkpoint_section(checkpoints[ticker], result)
+            if ticker in partials:
+                partials[ticker].section_done(result)
+            progress.advance(tasks[ticker])
+            progress.advance(overall)
+
+        def on_delta(ticker: str, sid: int, text: str):
+            partials[ticker].write_delta(sid, text)
+
+        def on_ticker_done(ticker: str, results: list[dict]):
+            if ticker in partials:
+                partials.pop(ticker).close()
+            job = by_ticker[ticker]
+            effective = job["framework"]
+            done = {r["section_id"]: r for r in kept[ticker] + results}
+            report_obj = assemble_report(
+                sections=[done[s["id"]] for s in effective["sections"]],
+                company_profile=job["profile"],
+                framework=effective,
+                report_id=checkpoints[ticker]["id"],
+            )
+            md_path = export_markdown(report_obj, job["profile"])
+            report_obj["output_paths"] = {"markdown": str(md_path)}
+            save_assembled_report(report_obj)
+            summary[ticker] = (report_obj, md_path)
+            progress.update(tasks[ticker], description=f"{ticker} [green]{report_obj['status']}[/green]")
+
+        try:
+            generate_many(
+                jobs,
+                session,
+                concurrency=concurrency,
+                per_ticker=per_ticker,
+                progress_callback=on_progress,
+                on_ticker_done=on_ticker_done,
+                on_delta=on_delta if partials else None,
+            )
+        except KeyboardInterrupt:
+            console.print(
+                "\n[yellow]Interrupted. Completed sections are saved; "
+                "continue with: irf report generate-many ... --resume[/yellow]"
+            )
+            sys.exit(130)
+        finally:
+            # Tickers still open here never reached their final export
+            for partial in partials.values():
+                partial.close(aborted=True)
+
+    _print_generation_stats(session, cache)
+
+    table = Table(title="Generated Reports")
+    table.add_column("Ticker", style="cyan")
+    table.add_column("Status")
+    table.add_column("Words", justify="right")
+    table.add_column("Markdown")
+    for ticker in by_ticker:
+        report_obj, md_path = summary[ticker]
+        table.add_row(ticker, report_obj["status"], f"{report_obj['word_count']:,}", str(md_path))
+    console.print(table)
+
+
+@report.command("generate-batch")
+@click.option("--tickers-file", type=click.Path(exists=True), default=None,
+              help="File with one ticker per line to submit as a new batch")
+@click.option("--resume", "resume_id", default=None, is_flag=False, flag_value="latest",
+              help="Resume polling a batch (latest unfinished if no ID given)")
+@click.option("--wait/--no-wait", default=True, help="Poll until the batch ends and collect results")
+@click.option("--poll-interval", type=float, default=None, help="Seconds between status checks")
+def report_generate_batch(
+    tickers_file: str | None,
+    resume_id: str | None,
+    wait: bool,
+    poll_interval: float | None,
+):
+    """Generate reports for many tickers through the Message Batches API."""
+    import time
+    from src.db import get_batch_job, get_company, get_company_by_ticker, list_batch_jobs, update_batch_job_status
+    from src.generator.backends import BatchUnsupportedError
+    from src.generator.batch import BATCH_ENDED, check_batch, collect_batch_results, submit_batch
+
+    cfg = load_config()
+    if poll_interval is None:
+        poll_interval = float(cfg.get("batch_poll_interval", 60))
+
+    try:
+        with GenerationSession(config=cfg) as session:
+            if resume_id:
+                if resume_id == "latest":
+                    pending = [j for j in list_batch_jobs() if j["status"] in ("submitted", BATCH_ENDED)]
+                    record = pending[0] if pending else None
+                else:
+                    record = get_batch_job(resume_id)
+                if record is None:
+                    console.print("[red]No unfinished batch job found.[/red]")
+                    return
+                batch_id = record["id"]
+            elif tickers_file:
+                jobs = []
+                for ticker in _read_tickers_file(Path(tickers_file)):
+                    company = get_company_by_ticker(ticker)
+                    if company is None:
+                        console.print(f"[yellow]Skipping {ticker}: no profile (run: irf report new {ticker})[/yellow]")
+                        continue
+                    profile = company["profile"]
+                    effective = fm.get_effective(profile.get("metadata", {}).get("sector_framework", ""))
+                    if effective is None:
+                        console.print(f"[yellow]Skipping {ticker}: framework not found[/yellow]")
+                        continue
+                    jobs.append({"ticker": ticker, "profile": profile, "framework": effective})
+                if not jobs:
+                    console.print("[red]No tickers to submit.[/red]")
+                    return
+                record = submit_batch(jobs, session)
+                batch_id = record["id"]
+                console.print(
+                    f"[green]Submitted batch {batch_id}[/green]: {len(jobs)} ticker(s), "
+                    f"{record['request_count']} request(s)"
+                )
+            else:
+                console.print("[red]Provide --tickers-file or --resume.[/red]")
+                return
+
+            if not wait:
+                console.print(f"Check back with: irf report generate-batch --resume {batch_id}")
+                return
+
+            try:
+                with console.status(f"Waiting for batch {batch_id}...") as status:
+                    while True:
+                        state = check_batch(batch_id, session)
+                        if state["processing_status"] == BATCH_ENDED:
+                            break
+                        status.update(
+                            f"Batch {batch_id}: {state['processing']} processing, "
+                            f"{state['succeeded']} succeeded, {state['errored']} errored"
+                        )
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                console.print(f"\n[yellow]Stopped polling. Resume with: irf report generate-batch --resume {batch_id}[/yellow]")
+                return
+
+            results = collect_batch_results(batch_id, session)
+    except BatchUnsupportedError as e:
+        console.print(f"[red]{e}. Use irf report generate-many instead.[/red]")
+        return
+
+    record = get_batch_job(batch_id)
+    collected = []
+    for job in record["jobs"]:
+        company = get_company(job["company_id"])
+        effective = fm.get_effective(job["framework_id"])
+        if company is None or effective is None:
+            console.print(f"[yellow]Skipping {job['ticker']}: profile or framework no longer available[/yellow]")
+            continue
+        profile = company["profile"]
+        report_obj = assemble_report(results[job["ticker"]], profile, effective)
+        md_path = export_markdown(report_obj, profile)
+        report_obj["output_paths"] = {"markdown": str(md_path)}
+        collected.append(report_obj)
+        console.print(
+            f"  {job['ticker']}: {report_obj['status']}, {report_obj['word_count']:,} words -> {md_path}"
+        )
+    save_many_reports(collected)
+    for report_obj in collected:
+        record_report_usage(report_obj["id"], report_obj["sections"])
+    update_batch_job_status(batch_id, "completed")
+    console.print(f"[green]Batch {batch_id} collected.[/green]")
+
+
 @report.command("qa")
 @click.argument("ticker")
 def report_qa(ticker: str):
     """Run quality assurance checks on a generated report."""
     ticker = ticker.upper()
-    reports = get_reports_for_company(ticker)
-    if not reports:
+    latest = get_latest_report(ticker)
+    if latest is None:
         console.print(f"[red]No reports found for {ticker}.[/red]")
         return
 
-    latest = reports[0]
     qa_results = run_qa_checks(latest)
-    latest["qa_results"] = qa_results
-    save_assembled_report(latest)
+    update_report(latest["id"], {"qa_results": qa_results})
 
     console.print(format_qa_report(qa_results))
 
 
+@report.command("repair")
+@click.argument("ticker")
+@click.option("--section", "section_ids", type=int, multiple=True,
+              help="Only repair this section (repeatable)")
+@click.option("--dry-run", is_flag=True, help="Show the sections that would be regenerated")
+def report_repair(ticker: str, section_ids: tuple[int, ...], dry_run: bool):
+    """Regenerate only the sections that failed QA, then re-check the report."""
+    from src.db import get_company_by_ticker
+    from src.generator.repair import apply_repair, plan_repair
+
+    ticker = ticker.upper()
+    latest = get_latest_report(ticker)
+    if latest is None:
+        console.print(f"[red]No reports found for {ticker}.[/red]")
+        return
+    company = get_company_by_ticker(ticker)
+    if company is None:
+        console.print(f"[red]Company profile not found for {ticker}.[/red]")
+        return
+
+    profile = company["profile"]
+    effective = fm.get_effective(profile.get("metadata", {}).get("sector_framework", ""))
+    if effective is None:
+        console.print(f"[red]Framework not found for {ticker}.[/red]")
+        return
+
+    if latest.get("qa_results") is None:
+        console.print("[dim]No stored QA results; running checks first.[/dim]")
+        latest["qa_results"] = run_qa_checks(latest)
+    before = latest["qa_results"]
+    plan = plan_repair(latest, effective, before, only=set(section_ids))
+    if not plan:
+        console.print("[green]No section-level QA failures to repair.[/green]")
+        for msg in before.get("errors", []) + before.get("warnings", []):
+            console.print(f"  [dim]{msg}[/dim]")
+        return
+
+    table = Table(title=f"Repair plan for {ticker}")
+    table.add_column("Section", style="cyan")
+    table.add_column("Reason")
+    for section in plan:
+        notes = section["revision_notes"] or ["Missing or not generated"]
+        table.add_row(f"{section['id']}. {section['name']}", "\n".join(notes))
+    console.print(table)
+    if dry_run:
+        return
+
+    repair_ids = {s["id"] for s in plan}
+    kept = [
+        s for s in latest.get("sections", [])
+        if s.get("status") == "generated" and s["section_id"] not in repair_ids
+    ]
+    cfg = load_config()
+    cache = ResponseCache.from_config(cfg)
+    with GenerationSession(config=cfg, cache=cache) as session, console.status(
+        f"Regenerating {len(plan)} section(s)..."
+    ):
+        results = write_all_sections(
+            effective_framework=effective,
+            company_profile=profile,
+            session=session,
+            completed=kept,
+            sections=plan,
+        )
+    record_report_usage(latest["id"], results)
+    _print_generation_stats(session, cache)
+
+    repaired, failed = apply_repair(latest, results, profile, effective)
+    for result in failed:
+        console.print(f"[red]Section {result['section_id']} failed: {result.get('error')}[/red]")
+    md_path = export_markdown(repaired, profile)
+    repaired["output_paths"] = {**repaired["output_paths"], "markdown": str(md_path)}
+    save_assembled_report(repaired)
+
+    after = repaired["qa_results"]
+    issues_before = len(before.get("errors", [])) + len(before.get("warnings", []))
+    issues_after = len(after.get("errors", [])) + len(after.get("warnings", []))
+    console.print(
+        f"\n[bold]Repaired {len(results) - len(failed)}/{len(results)} section(s).[/bold] "
+        f"QA issues: {issues_before} -> {issues_after}"
+    )
+    for msg in after.get("errors", []) + after.get("warnings", []):
+        console.print(f"  [yellow]{msg}[/yellow]")
+    console.print(f"[green]Markdown exported: {md_path}[/green]")
+
+
 @report.command("view")
 @click.argument("ticker")
-def report_view(ticker: str):
+@click.option("--follow", "-f", is_flag=True, help="Tail the report while it is being generated")
+def report_view(ticker: str, follow: bool):
     """View the latest generated report for a company."""
     ticker = ticker.upper()
-    reports = get_reports_for_company(ticker)
-    if not reports:
+    if follow:
+        from src.output.markdown import find_partial, follow_partial
+
+        path = find_partial(ticker)
+        if path is not None:
+            try:
+                finished = follow_partial(path, lambda text: click.echo(text, nl=False))
+            except KeyboardInterrupt:
+                return
+            if not finished:
+                console.print(
+                    f"\n[yellow]Generation stopped before finishing; "
+                    f"continue with: irf report generate {ticker} --resume[/yellow]"
+                )
+                return
+            final = path.with_name(path.name.replace(".partial.md", ".md"))
+            console.print(f"\n[green]Generation finished: {final}[/green]")
+            return
+        console.print(f"[dim]No report is being generated for {ticker}; showing the latest.[/dim]")
+
+    latest = get_latest_report(ticker)
+    if latest is None:
         console.print(f"[red]No reports found for {ticker}.[/red]")
         return
 
-    latest = reports[0]
     md_path = latest.get("output_paths", {}).get("markdown")
     if md_path and Path(md_path).exists():
         content = Path(md_path).read_text()
@@ -465,12 +965,11 @@ def report_view(ticker: str):
 def report_export(ticker: str, fmt: str):
     """Export a report to the specified format."""
     ticker = ticker.upper()
-    reports = get_reports_for_company(ticker)
-    if not reports:
+    latest = get_latest_report(ticker)
+    if latest is None:
         console.print(f"[red]No reports found for {ticker}.[/red]")
         return
 
-    latest = reports[0]
     from src.db import get_company_by_ticker
     company = get_company_by_ticker(ticker)
     if company is None:
@@ -494,12 +993,20 @@ def report_export(ticker: str, fmt: str):
 @click.argument("ticker")
 def report_status(ticker: str):
     """Check the status of reports for a company."""
+    from src.db import get_generation_usage
+    from src.generator.tokens import summarize_usage
+
     ticker = ticker.upper()
-    reports = get_reports_for_company(ticker)
+    reports = list_report_metadata(ticker)
     if not reports:
         console.print(f"[red]No reports found for {ticker}.[/red]")
         return
 
+    cfg = load_config()
+    usage_rows = {}
+    for row in get_generation_usage([r["id"] for r in reports]):
+        usage_rows.setdefault(row["report_id"], []).append(row)
+
     table = Table(title=f"Reports for {ticker}")
     table.add_column("ID")
     table.add_column("Date")
@@ -507,8 +1014,23 @@ def report_status(ticker: str):
     table.add_column("Status")
     table.add_column("Words")
     table.add_column("Framework")
+    table.add_column("Tokens (in/out)", justify="right")
+    table.add_column("Cost", justify="right")
+    table.add_column("Seconds", justify="right")
 
     for r in reports:
+        rows = usage_rows.get(r["id"])
+        if rows:
+            usage = summarize_usage(rows, cfg)
+            input_total = (
+                usage["input_tokens"] + usage["cache_read_input_tokens"]
+                + usage["cache_creation_input_tokens"]
+            )
+            tokens = f"{input_total:,}/{usage['output_tokens']:,}"
+            cost = f"${usage['cost']:.2f}"
+            seconds = f"{usage['latency_seconds']:.1f}"
+        else:
+            tokens = cost = seconds = "—"
         table.add_row(
             r["id"],
             r.get("report_date", ""),
@@ -516,8 +1038,12 @@ def report_status(ticker: str):
             r.get("status", ""),
             f"{r.get('word_count', 0):,}",
             r.get("framework_id", ""),
+            tokens,
+            cost,
+            seconds,
         )
     console.print(table)
+    console.print("[dim]Seconds are summed section call latency (parallel calls overlap).[/dim]")
 
 
 # ── Research Commands ──
@@ -588,12 +1114,12 @@ def research_peers(ticker: str):
 def research_citations(ticker: str):
     """Show citation library for a company."""
     ticker = ticker.upper()
-    reports = get_reports_for_company(ticker)
-    if not reports:
+    latest = get_latest_report(ticker)
+    if latest is None:
         console.print(f"No reports with citations found for {ticker}.")
         return
 
-    citations = reports[0].get("citations", [])
+    citations = latest.get("citations", [])
     if not citations:
         console.print("No citations in the latest report.")
         return
@@ -614,5 +1140,132 @@ def research_citations(ticker: str):
     console.print(table)
 
 
+def _open_partial(
+    cfg: dict,
+    ticker: str,
+    checkpoint: dict,
+    profile: dict,
+    effective: dict,
+    kept: list[dict],
+) -> PartialReportWriter | None:
+    """Start the live partial file for a report, or None if disabled."""
+    if str(cfg.get("partial_output", True)).lower() in ("0", "false", "no", "off"):
+        return None
+    partial = PartialReportWriter(
+        partial_path(ticker, checkpoint["report_date"]), profile, effective["sections"],
+    )
+    for result in kept:
+        partial.section_done(result)
+    return partial
+
+
+def _generate_quick(ticker: str, profile: dict, effective: dict, no_cache: bool) -> None:
+    """Generate, save and export a quick-mode report (one API call)."""
+    from src.generator.quick import QUICK_WORD_TARGET, write_quick_report
+
+    console.print(Panel(
+        f"Quick analysis for [bold]{profile['metadata']['name']}[/bold] ({ticker})\n"
+        f"Framework: {effective['display_name']}\n"
+        f"Target: {QUICK_WORD_TARGET['min']:,}–{QUICK_WORD_TARGET['max']:,} words, one request",
+        title="Quick Report",
+    ))
+    cfg = load_config()
+    cache = None if no_cache else ResponseCache.from_config(cfg)
+    with GenerationSession(config=cfg, cache=cache) as session, console.status("Generating quick report..."):
+        results = write_quick_report(effective, profile, session=session)
+    _print_generation_stats(session, cache)
+
+    report_obj = assemble_report(sections=results, company_profile=profile, framework=effective)
+    report_id = save_assembled_report(report_obj)
+    record_report_usage(report_id, results)
+    failed = [r for r in results if r["status"] != "generated"]
+    if len(failed) == len(results):
+        console.print(f"[red]Quick generation failed: {failed[0].get('error')}[/red]")
+        return
+    for result in failed:
+        console.print(f"[yellow]Section {result['section_id']}: {result.get('error')}[/yellow]")
+
+    md_path = export_markdown(report_obj, profile)
+    report_obj["output_paths"] = {"markdown": str(md_path)}
+    update_report(report_id, {"output_paths": report_obj["output_paths"]})
+    console.print(f"\n[bold]Quick report assembled.[/bold] Total: {report_obj['word_count']:,} words")
+    console.print(f"[dim]Report ID: {report_id}[/dim]")
+    console.print(f"[green]Markdown exported: {md_path}[/green]")
+
+
+def _print_generation_stats(session: GenerationSession, cache: ResponseCache | None) -> None:
+    """Print cache, token and rate-limiter counters after a generation run."""
+    if cache is not None:
+        console.print(
+            f"[dim]Response cache: {cache.stats['hits']} hit(s), "
+            f"{cache.stats['misses']} miss(es)[/dim]"
+        )
+    usage = session.usage
+    console.print(
+        f"[dim]Tokens: {usage['input_tokens']:,} in, {usage['output_tokens']:,} out | "
+        f"prompt cache: {usage['cache_read_input_tokens']:,} read, "
+        f"{usage['cache_creation_input_tokens']:,} written[/dim]"
+    )
+    hedging = session.hedging.stats if session.hedging is not None else None
+    if hedging and hedging["hedged"]:
+        console.print(
+            f"[dim]Hedged requests: {hedging['hedged']} of {hedging['calls']} call(s), "
+            f"{hedging['hedge_wins']} won by the duplicate[/dim]"
+        )
+    limits = session.limiter.stats
+    if limits["retries"] or limits["throttled_seconds"]:
+        console.print(
+            f"[dim]Rate limiting: {limits['throttled_seconds']:.1f}s throttled, "
+            f"{limits['retries']} retr{'y' if limits['retries'] == 1 else 'ies'} "
+            f"({limits['rate_limited']} rate-limited)[/dim]"
+        )
+
+
+def _read_tickers_file(path: Path) -> list[str]:
+    """Read tickers from a file: one or more per line, '#' starts a comment."""
+    tickers = []
+    for line in path.read_text().splitlines():
+        line = line.split("#", 1)[0]
+        for token in line.replace(",", " ").split():
+            ticker = token.upper()
+            if ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def _start_tracing(ctx: click.Context, timings: bool, trace_path: str | None) -> None:
+    """Record spans for this command; report them when the command exits."""
+    enable_tracing()
+    command = span(f"irf {ctx.invoked_subcommand or ''}".strip(), "cli", argv=" ".join(sys.argv[1:]))
+    command.__enter__()
+
+    def _finish():
+        command.__exit__(None, None, None)
+        tracer = disable_tracing()
+        if timings:
+            _print_timings(tracer.summary())
+        if trace_path:
+            path = tracer.write_chrome_trace(Path(trace_path))
+            console.print(f"[dim]Trace written: {path} ({len(tracer.events)} spans)[/dim]")
+
+    ctx.call_on_close(_finish)
+
+
+def _print_timings(rows: list[dict]) -> None:
+    table = Table(title="Timings (nested spans overlap)")
+    table.add_column("Span")
+    table.add_column("Category")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    for row in rows:
+        table.add_row(
+            row["name"], row["category"], str(row["count"]),
+            f"{row['total_ms']:,.1f}", f"{row['mean_ms']:,.1f}", f"{row['max_ms']:,.1f}",
+        )
+    console.print(table)
+
+
 if __name__ == "__main__":
     main()
@@ -19,8 +19,50 @@ CONFIG_FILE = PROJECT_ROOT / ".irf_config.json"
 DEFAULT_CONFIG = {
     "api_key": "",
     "model": "claude-sonnet-4-20250514",
+    "base_url": "",
+    # "anthropic", "fake" (offline, deterministic) or "package.module:Class"
+    "backend": "anthropic",
+    "fake_backend": {
+        "latency": 0.0,
+        "tokens_per_second": 0,
+        "error_rate": 0.0,
+        "error_status": 529,
+        "seed": 0,
+    },
     "output_dir": str(OUTPUT_DIR),
     "max_tokens_per_section": 4096,
+    "concurrency": 4,
+    "prompt_caching": True,
+    # Groups of short sections generated in one multi-section request
+    # (11 calls -> 9 per report with the built-in framework); [] disables.
+    # Packed sections are not streamed to the partial file or hedged.
+    "section_packs": [[5, 6], [1, 11]],
+    "cache_enabled": True,
+    "cache_max_entries": 2000,
+    "cache_max_age_days": 30,
+    "batch_poll_interval": 60,
+    "max_retries": 5,
+    # Seconds per section call, retries included, and per generation run;
+    # unfinished sections get status "timeout" (0 disables)
+    "section_timeout": 300,
+    "report_deadline": 0,
+    # Fire a duplicate request when a section call runs past this percentile
+    # of recorded latencies; at most hedge_max_fraction of calls are hedged
+    "hedge_requests": False,
+    "hedge_percentile": 95,
+    "hedge_max_fraction": 0.1,
+    "hedge_min_samples": 20,
+    "retry_base_delay": 1.0,
+    "retry_max_delay": 60.0,
+    # Per-model API limits; "default" applies to models not listed
+    "rate_limits": {
+        "default": {"rpm": 1000, "input_tpm": 450000, "output_tpm": 90000},
+    },
+    # USD per million tokens; "default" applies to models not listed
+    "pricing": {
+        "default": {"input": 3.0, "output": 15.0, "cache_read": 0.3, "cache_write": 3.75},
+    },
+    "partial_output": True,
     "default_format": "markdown",
 }
 
@@ -38,6 +80,23 @@ def load_config() -> dict:
     return config
 
 
+def get_config_table(config: dict, key: str) -> dict:
+    """A per-model setting such as ``rate_limits`` or ``pricing``.
+
+    Accepts a dict or its JSON string form (as set by ``irf config set``).
+    Raises ``ValueError`` if the value is not an object of objects.
+    """
+    value = config.get(key) or {}
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError as e:
+            raise ValueError(f"Config {key} is not valid JSON: {e}") from e
+    if not isinstance(value, dict) or not all(isinstance(v, dict) for v in value.values()):
+        raise ValueError(f'Config {key} must map model names to objects, e.g. {{"default": {{...}}}}')
+    return value
+
+
 def save_config(config: dict) -> None:
     """Persist configuration to disk."""
     with open(CONFIG_FILE, "w") as f:
@@ -1,31 +1,181 @@
-"""Database operations using SQLite."""
+"""Database operations using SQLite.
+
+All access goes through a ``Database``: one reusable connection per thread
+(configured once, with sqlite3's prepared-statement cache) and a
+``transaction()`` context manager for grouping writes into one commit. The
+module functions are thin wrappers that run their SQL on the shared
+``Database`` for ``db_path`` (default ``DB_PATH``).
+"""
 
 from __future__ import annotations
 
+import hashlib
 import json
 import sqlite3
+import threading
 import uuid
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from src.config import DB_PATH
+from src.tracing import traced
+
+# Prepared statements kept per connection (sqlite3's LRU statement cache)
+CACHED_STATEMENTS = 256
 
 
 def get_connection(db_path: Path | None = None) -> sqlite3.Connection:
-    """Get a database connection, creating the DB if needed."""
-    path = db_path or DB_PATH
+    """Open a standalone database connection, creating the DB if needed.
+
+    The caller owns (and must close) it; module functions use the pooled
+    per-thread connections of ``get_database`` instead.
+    """
+    return _connect(db_path or DB_PATH)
+
+
+def _connect(path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
     path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(path))
+    conn = sqlite3.connect(
+        str(path), cached_statements=CACHED_STATEMENTS, check_same_thread=check_same_thread,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
-def init_db(db_path: Path | None = None) -> None:
-    """Initialize the database schema."""
-    conn = get_connection(db_path)
-    conn.executescript("""
+class Database:
+    """A SQLite database with one reusable connection per thread.
+
+    Each thread lazily opens its own connection (sqlite3 connections must not
+    be used from two threads at once) and keeps it for later calls, so the
+    PRAGMAs run once and prepared statements stay cached. Statements commit
+    on their own unless run inside ``transaction()``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Used by this thread only, but close() may run on another one
+            conn = _connect(self.path, check_same_thread=False)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._prune()
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Commit the enclosed statements together, or roll them all back.
+
+        Nested blocks join the outermost transaction.
+        """
+        conn = self.connection()
+        depth = self._local.depth
+        self._local.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+        finally:
+            self._local.depth = depth
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Run one statement, committing unless inside ``transaction()``."""
+        conn = self.connection()
+        cur = conn.execute(sql, params)
+        if not self._local.depth:
+            conn.commit()
+        return cur
+
+    def executemany(self, sql: str, rows) -> sqlite3.Cursor:
+        """Run one statement per parameter row, committing unless inside ``transaction()``."""
+        conn = self.connection()
+        cur = conn.executemany(sql, rows)
+        if not self._local.depth:
+            conn.commit()
+        return cur
+
+    def executescript(self, script: str) -> None:
+        self.connection().executescript(script)
+
+    def query(self, sql: str, params=()) -> list[sqlite3.Row]:
+        """All rows of a query."""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()) -> sqlite3.Row | None:
+        """First row of a query, or None."""
+        cur = self.connection().execute(sql, params)
+        try:
+            return cur.fetchone()
+        finally:
+            # Reset the statement so it does not pin an old read snapshot
+            cur.close()
+
+    def close(self) -> None:
+        """Close every thread's connection to this database."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _prune(self) -> None:
+        """Close connections of threads that have exited (lock held)."""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+
+_databases: dict[Path, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: Path | None = None) -> Database:
+    """The shared ``Database`` for a path (default ``DB_PATH``)."""
+    path = Path(db_path or DB_PATH)
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = Database(path)
+        return db
+
+
+def close_databases() -> None:
+    """Close all pooled connections (e.g. before deleting a database file)."""
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for db in databases:
+        db.close()
+
+
+# ── Schema ──
+
+# Schema migrations, applied in order; the database's ``PRAGMA user_version``
+# records how many have run. Append new ones - never edit a shipped entry.
+# The first is the original schema, so databases created before versioning
+# (version 0, every table present) pass through it unchanged.
+MIGRATIONS = [
+    """
         CREATE TABLE IF NOT EXISTS frameworks (
             id TEXT PRIMARY KEY,
             name TEXT NOT NULL,
@@ -86,9 +236,122 @@ def init_db(db_path: Path | None = None) -> None:
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
         );
-    """)
-    conn.commit()
-    conn.close()
+
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            section_id INTEGER,
+            content TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT DEFAULT 'submitted',
+            model TEXT,
+            jobs JSON NOT NULL,
+            request_count INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS generation_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id TEXT NOT NULL,
+            section_id INTEGER,
+            model TEXT,
+            status TEXT,
+            cached INTEGER DEFAULT 0,
+            estimated_input_tokens INTEGER,
+            max_tokens INTEGER,
+            input_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            cache_read_input_tokens INTEGER DEFAULT 0,
+            cache_creation_input_tokens INTEGER DEFAULT 0,
+            latency_seconds REAL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_generation_usage_report ON generation_usage(report_id);
+    """,
+    """
+        CREATE INDEX IF NOT EXISTS idx_companies_ticker ON companies(ticker, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_reports_company ON reports(company_id, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used_at);
+        CREATE INDEX IF NOT EXISTS idx_response_cache_created ON response_cache(created_at);
+        CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs(status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_generation_usage_model ON generation_usage(model, id);
+    """,
+    # Sections move out of the reports.sections blob (left as '[]') into
+    # one row each, so saving a report rewrites only the sections that changed
+    """
+        CREATE TABLE IF NOT EXISTS report_sections (
+            report_id TEXT NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+            section_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT,
+            status TEXT,
+            content_hash TEXT,
+            word_count INTEGER DEFAULT 0,
+            input_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            latency_seconds REAL,
+            data JSON NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (report_id, section_id)
+        );
+        INSERT OR IGNORE INTO report_sections
+            (report_id, section_id, position, name, status, word_count,
+             input_tokens, output_tokens, latency_seconds, data)
+        SELECT r.id, json_extract(s.value, '$.section_id'), s.key,
+               json_extract(s.value, '$.name'), json_extract(s.value, '$.status'),
+               COALESCE(json_extract(s.value, '$.word_count'), 0),
+               COALESCE(json_extract(s.value, '$.usage.input_tokens'), 0),
+               COALESCE(json_extract(s.value, '$.usage.output_tokens'), 0),
+               json_extract(s.value, '$.latency_seconds'), s.value
+        FROM reports r, json_each(r.sections) s
+        WHERE json_valid(r.sections) AND json_extract(s.value, '$.section_id') IS NOT NULL;
+        UPDATE reports SET sections = '[]';
+    """,
+    # Section packs and quick reports record one call under their first
+    # section; flag those rows so their latency doesn't count towards that
+    # section's own
+    """
+        ALTER TABLE generation_usage ADD COLUMN packed INTEGER DEFAULT 0;
+    """,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(db_path: Path | None = None) -> int:
+    """The number of migrations applied to a database."""
+    return get_database(db_path).query_one("PRAGMA user_version")[0]
+
+
+@traced
+def init_db(db_path: Path | None = None) -> list[int]:
+    """Create or upgrade the database schema. Returns the versions applied.
+
+    Each pending migration runs in its own transaction together with the
+    ``user_version`` bump, so a failed one leaves the database at the last
+    good version and re-running is safe.
+    """
+    db = get_database(db_path)
+    current = schema_version(db_path)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this release supports ({SCHEMA_VERSION})"
+        )
+    applied = []
+    for version, script in enumerate(MIGRATIONS[current:], start=current + 1):
+        try:
+            db.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except sqlite3.Error:
+            db.connection().rollback()
+            raise
+        applied.append(version)
+    return applied
 
 
 def generate_id() -> str:
@@ -96,18 +359,41 @@ def generate_id() -> str:
     return str(uuid.uuid4())[:8]
 
 
+def _write_chunks(db: Database, items: list, write, chunk_size: int | None) -> None:
+    """Call ``write(chunk)`` for each chunk of ``items``, one transaction per chunk.
+
+    With no ``chunk_size`` everything is written in a single transaction.
+    """
+    size = chunk_size or len(items) or 1
+    for start in range(0, len(items), size):
+        with db.transaction():
+            write(items[start:start + size])
+
+
 # ── Framework CRUD ──
 
+@traced
 def save_framework(framework: dict, db_path: Path | None = None) -> str:
     """Save a framework to the database. Returns the framework ID."""
-    conn = get_connection(db_path)
-    fid = framework.get("id") or framework.get("sector_id") or generate_id()
+    return save_many_frameworks([framework], db_path=db_path)[0]
+
+
+@traced
+def save_many_frameworks(
+    frameworks: list[dict],
+    chunk_size: int | None = None,
+    db_path: Path | None = None,
+) -> list[str]:
+    """Save frameworks with one statement per chunk. Returns their IDs.
+
+    Each chunk of ``chunk_size`` rows (default: all of them) is committed
+    as one transaction.
+    """
     now = datetime.now().isoformat()
-    conn.execute(
-        """INSERT OR REPLACE INTO frameworks
-           (id, name, display_name, description, base_version, config, created_at, updated_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
+    rows = []
+    for framework in frameworks:
+        fid = framework.get("id") or framework.get("sector_id") or generate_id()
+        rows.append((
             fid,
             framework.get("name", fid),
             framework.get("display_name", fid),
@@ -116,56 +402,67 @@ def save_framework(framework: dict, db_path: Path | None = None) -> str:
             json.dumps(framework),
             now,
             now,
-        ),
-    )
-    conn.commit()
-    conn.close()
-    return fid
+        ))
+    db = get_database(db_path)
+    _write_chunks(db, rows, lambda chunk: db.executemany(
+        """INSERT OR REPLACE INTO frameworks
+           (id, name, display_name, description, base_version, config, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        chunk,
+    ), chunk_size)
+    return [row[0] for row in rows]
 
 
+@traced
 def get_framework(framework_id: str, db_path: Path | None = None) -> dict | None:
     """Retrieve a framework by ID."""
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT * FROM frameworks WHERE id = ?", (framework_id,)).fetchone()
-    conn.close()
+    row = get_database(db_path).query_one("SELECT * FROM frameworks WHERE id = ?", (framework_id,))
     if row:
         return {**dict(row), "config": json.loads(row["config"])}
     return None
 
 
+@traced
 def list_frameworks(db_path: Path | None = None) -> list[dict]:
     """List all frameworks."""
-    conn = get_connection(db_path)
-    rows = conn.execute(
+    rows = get_database(db_path).query(
         "SELECT id, name, display_name, description, created_at FROM frameworks ORDER BY name"
-    ).fetchall()
-    conn.close()
+    )
     return [dict(r) for r in rows]
 
 
+@traced
 def delete_framework(framework_id: str, db_path: Path | None = None) -> bool:
     """Delete a framework. Returns True if deleted."""
-    conn = get_connection(db_path)
-    cur = conn.execute("DELETE FROM frameworks WHERE id = ?", (framework_id,))
-    conn.commit()
-    conn.close()
+    cur = get_database(db_path).execute("DELETE FROM frameworks WHERE id = ?", (framework_id,))
     return cur.rowcount > 0
 
 
 # ── Company CRUD ──
 
+@traced
 def save_company(company: dict, db_path: Path | None = None) -> str:
     """Save a company profile. Returns the company ID."""
-    conn = get_connection(db_path)
-    cid = company.get("id") or generate_id()
-    meta = company.get("metadata", {})
+    return save_many_companies([company], db_path=db_path)[0]
+
+
+@traced
+def save_many_companies(
+    companies: list[dict],
+    chunk_size: int | None = None,
+    db_path: Path | None = None,
+) -> list[str]:
+    """Save company profiles with one statement per chunk. Returns their IDs.
+
+    Each chunk of ``chunk_size`` rows (default: all of them) is committed
+    as one transaction.
+    """
     now = datetime.now().isoformat()
-    conn.execute(
-        """INSERT OR REPLACE INTO companies
-           (id, ticker, name, exchange, sector_framework_id, profile, created_at, updated_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            cid,
+    rows = []
+    for company in companies:
+        meta = company.get("metadata", {})
+        rows.append((
+            company.get("id") or generate_id(),
             meta.get("ticker", ""),
             meta.get("name", ""),
             meta.get("exchange", ""),
@@ -173,31 +470,33 @@ def save_company(company: dict, db_path: Path | None = None) -> str:
             json.dumps(company),
             now,
             now,
-        ),
-    )
-    conn.commit()
-    conn.close()
-    return cid
+        ))
+    db = get_database(db_path)
+    _write_chunks(db, rows, lambda chunk: db.executemany(
+        """INSERT OR REPLACE INTO companies
+           (id, ticker, name, exchange, sector_framework_id, profile, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        chunk,
+    ), chunk_size)
+    return [row[0] for row in rows]
 
 
+@traced
 def get_company(company_id: str, db_path: Path | None = None) -> dict | None:
     """Retrieve a company by ID."""
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT * FROM companies WHERE id = ?", (company_id,)).fetchone()
-    conn.close()
+    row = get_database(db_path).query_one("SELECT * FROM companies WHERE id = ?", (company_id,))
     if row:
         return {**dict(row), "profile": json.loads(row["profile"])}
     return None
 
 
+@traced
 def get_company_by_ticker(ticker: str, db_path: Path | None = None) -> dict | None:
     """Retrieve a company by ticker symbol."""
-    conn = get_connection(db_path)
-    row = conn.execute(
+    row = get_database(db_path).query_one(
         "SELECT * FROM companies WHERE ticker = ? ORDER BY updated_at DESC LIMIT 1",
         (ticker.upper(),),
-    ).fetchone()
-    conn.close()
+    )
     if row:
         return {**dict(row), "profile": json.loads(row["profile"])}
     return None
@@ -205,67 +504,448 @@ def get_company_by_ticker(ticker: str, db_path: Path | None = None) -> dict | No
 
 # ── Report CRUD ──
 
+# Report columns ``update_report`` may set, and those stored as JSON
+REPORT_FIELDS = (
+    "company_id", "framework_id", "status", "report_date", "reference_quarter",
+    "citations", "qa_results", "word_count", "output_paths",
+)
+REPORT_JSON_FIELDS = ("citations", "qa_results", "output_paths")
+
+
+def _report_values(report: dict) -> tuple:
+    return tuple(
+        json.dumps(report.get(f)) if f in REPORT_JSON_FIELDS else report.get(f)
+        for f in REPORT_FIELDS
+    )
+
+
+# Values for report columns a report dict leaves out
+REPORT_DEFAULTS = {
+    "company_id": "", "framework_id": "", "status": "draft", "report_date": "",
+    "reference_quarter": "", "citations": [], "word_count": 0, "output_paths": {},
+}
+
+
+@traced
 def save_report(report: dict, db_path: Path | None = None) -> str:
-    """Save a report. Returns the report ID."""
-    conn = get_connection(db_path)
-    rid = report.get("id") or generate_id()
+    """Save a report and its sections. Returns the report ID.
+
+    Only section rows whose content changed are rewritten, and sections no
+    longer on the report are removed.
+    """
+    return save_many_reports([report], db_path=db_path)[0]
+
+
+@traced
+def save_many_reports(
+    reports: list[dict],
+    chunk_size: int | None = None,
+    db_path: Path | None = None,
+) -> list[str]:
+    """Save reports and their sections. Returns their IDs.
+
+    Each chunk of ``chunk_size`` reports (default: all of them) is committed
+    as one transaction, with one statement for the report rows.
+    """
     now = datetime.now().isoformat()
-    conn.execute(
-        """INSERT OR REPLACE INTO reports
-           (id, company_id, framework_id, status, report_date, reference_quarter,
-            sections, citations, qa_results, word_count, output_paths, created_at, updated_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            rid,
-            report.get("company_id", ""),
-            report.get("framework_id", ""),
-            report.get("status", "draft"),
-            report.get("report_date", ""),
-            report.get("reference_quarter", ""),
-            json.dumps(report.get("sections", [])),
-            json.dumps(report.get("citations", [])),
-            json.dumps(report.get("qa_results")),
-            report.get("word_count", 0),
-            json.dumps(report.get("output_paths", {})),
-            now,
-            now,
-        ),
+    items = [(report.get("id") or generate_id(), report) for report in reports]
+    db = get_database(db_path)
+
+    def write(chunk):
+        db.executemany(
+            f"""INSERT INTO reports (id, {", ".join(REPORT_FIELDS)}, sections, created_at, updated_at)
+                VALUES (?, {", ".join("?" * len(REPORT_FIELDS))}, '[]', ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                {", ".join(f"{f} = excluded.{f}" for f in REPORT_FIELDS)},
+                updated_at = excluded.updated_at""",
+            [(rid, *_report_values({**REPORT_DEFAULTS, **report}), now, now) for rid, report in chunk],
+        )
+        for rid, report in chunk:
+            _save_sections(db, rid, report.get("sections", []), now)
+
+    _write_chunks(db, items, write, chunk_size)
+    return [rid for rid, _ in items]
+
+
+def _save_sections(db: Database, report_id: str, sections: list[dict], now: str) -> None:
+    """Write the changed section rows of a report and drop removed ones."""
+    stored = {
+        r["section_id"]: (r["position"], r["content_hash"])
+        for r in db.query(
+            "SELECT section_id, position, content_hash FROM report_sections WHERE report_id = ?",
+            (report_id,),
+        )
+    }
+    rows = []
+    for position, section in enumerate(sections):
+        data = json.dumps(section, sort_keys=True)
+        content_hash = hashlib.sha256(data.encode()).hexdigest()
+        if stored.get(section["section_id"]) == (position, content_hash):
+            continue
+        usage = section.get("usage") or {}
+        rows.append((
+            report_id, section["section_id"], position, section.get("name"), section.get("status"),
+            content_hash, section.get("word_count", 0), usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0), section.get("latency_seconds"), data, now,
+        ))
+    removed = set(stored) - {s["section_id"] for s in sections}
+    if removed:
+        db.execute(
+            f"""DELETE FROM report_sections
+                WHERE report_id = ? AND section_id IN ({", ".join("?" * len(removed))})""",
+            (report_id, *removed),
+        )
+    if rows:
+        db.executemany(
+            """INSERT INTO report_sections
+               (report_id, section_id, position, name, status, content_hash, word_count,
+                input_tokens, output_tokens, latency_seconds, data, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(report_id, section_id) DO UPDATE SET
+               position = excluded.position, name = excluded.name, status = excluded.status,
+               content_hash = excluded.content_hash, word_count = excluded.word_count,
+               input_tokens = excluded.input_tokens, output_tokens = excluded.output_tokens,
+               latency_seconds = excluded.latency_seconds, data = excluded.data,
+               updated_at = excluded.updated_at""",
+            rows,
+        )
+
+
+@traced
+def update_report(report_id: str, fields: dict, db_path: Path | None = None) -> bool:
+    """Update some columns of a report without touching its sections.
+
+    Returns True if the report exists.
+    """
+    unknown = set(fields) - set(REPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Not updatable report field(s): {sorted(unknown)}")
+    names = list(fields)
+    values = [json.dumps(fields[f]) if f in REPORT_JSON_FIELDS else fields[f] for f in names]
+    cur = get_database(db_path).execute(
+        f"""UPDATE reports SET {", ".join(f"{f} = ?" for f in names)}, updated_at = ?
+            WHERE id = ?""",
+        (*values, datetime.now().isoformat(), report_id),
     )
-    conn.commit()
-    conn.close()
-    return rid
+    return cur.rowcount > 0
+
+
+class LazyRecord(dict):
+    """A dict whose deferred values are computed on first access.
 
+    Values wrapped in ``_Deferred`` (JSON text, or a query for a report's
+    sections) stay undecoded until read, so callers that only look at
+    metadata never pay for large JSON columns. Copying, ``items()`` and
+    ``values()`` resolve everything first.
+    """
 
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _Deferred):
+            value = value.load()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def __iter__(self):
+        # Overriding iteration makes dict(), {**record} and update() go
+        # through __getitem__ instead of copying deferred values raw.
+        return dict.__iter__(self)
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+
+class _Deferred:
+    def __init__(self, load):
+        self.load = load
+
+
+def _json_field(text: str | None) -> _Deferred | None:
+    return _Deferred(lambda: json.loads(text)) if text else text
+
+
+def _report_record(row: sqlite3.Row, sections: _Deferred) -> LazyRecord:
+    result = LazyRecord(row)
+    for field in REPORT_JSON_FIELDS:
+        result[field] = _json_field(result[field])
+    result["sections"] = sections
+    return result
+
+
+def _fetch_sections(report_id: str, db_path: Path | None) -> list[dict]:
+    rows = get_database(db_path).query(
+        "SELECT data FROM report_sections WHERE report_id = ? ORDER BY position", (report_id,)
+    )
+    return [json.loads(r["data"]) for r in rows]
+
+
+def _single_report(row: sqlite3.Row | None, db_path: Path | None) -> LazyRecord | None:
+    """A report whose sections are only queried when first read."""
+    if row is None:
+        return None
+    return _report_record(row, _Deferred(lambda: _fetch_sections(row["id"], db_path)))
+
+
+@traced
 def get_report(report_id: str, db_path: Path | None = None) -> dict | None:
     """Retrieve a report by ID."""
-    conn = get_connection(db_path)
-    row = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
-    conn.close()
-    if row:
-        result = dict(row)
-        for field in ("sections", "citations", "qa_results", "output_paths"):
-            if result[field]:
-                result[field] = json.loads(result[field])
-        return result
-    return None
+    row = get_database(db_path).query_one("SELECT * FROM reports WHERE id = ?", (report_id,))
+    return _single_report(row, db_path)
+
+
+@traced
+def get_latest_report(ticker: str, db_path: Path | None = None) -> dict | None:
+    """Retrieve the most recently updated report for a company ticker."""
+    row = get_database(db_path).query_one(
+        """SELECT r.* FROM reports r
+           JOIN companies c ON r.company_id = c.id
+           WHERE c.ticker = ?
+           ORDER BY r.updated_at DESC LIMIT 1""",
+        (ticker.upper(),),
+    )
+    return _single_report(row, db_path)
 
 
+@traced
 def get_reports_for_company(ticker: str, db_path: Path | None = None) -> list[dict]:
-    """Get all reports for a company ticker."""
-    conn = get_connection(db_path)
-    rows = conn.execute(
+    """Get all reports for a company ticker, newest first."""
+    db = get_database(db_path)
+    rows = db.query(
         """SELECT r.* FROM reports r
            JOIN companies c ON r.company_id = c.id
            WHERE c.ticker = ?
            ORDER BY r.updated_at DESC""",
         (ticker.upper(),),
-    ).fetchall()
-    conn.close()
-    results = []
-    for row in rows:
-        result = dict(row)
-        for field in ("sections", "citations", "qa_results", "output_paths"):
-            if result[field]:
-                result[field] = json.loads(result[field])
-        results.append(result)
-    return results
+    )
+    if not rows:
+        return []
+    data: dict[str, list[str]] = {r["id"]: [] for r in rows}
+    for row in db.query(
+        f"""SELECT report_id, data FROM report_sections
+            WHERE report_id IN ({", ".join("?" * len(data))})
+            ORDER BY report_id, position""",
+        list(data),
+    ):
+        data[row["report_id"]].append(row["data"])
+    return [
+        _report_record(row, _Deferred(lambda texts=data[row["id"]]: [json.loads(t) for t in texts]))
+        for row in rows
+    ]
+
+
+# Report columns returned by ``list_report_metadata``
+REPORT_METADATA_FIELDS = (
+    "id", "company_id", "framework_id", "status", "report_date",
+    "reference_quarter", "word_count", "created_at", "updated_at",
+)
+
+
+@traced
+def list_report_metadata(ticker: str, db_path: Path | None = None) -> list[dict]:
+    """Metadata columns of a company's reports, newest first (no sections or JSON)."""
+    rows = get_database(db_path).query(
+        f"""SELECT {", ".join(f"r.{f}" for f in REPORT_METADATA_FIELDS)} FROM reports r
+            JOIN companies c ON r.company_id = c.id
+            WHERE c.ticker = ?
+            ORDER BY r.updated_at DESC""",
+        (ticker.upper(),),
+    )
+    return [dict(r) for r in rows]
+
+
+# ── Response Cache ──
+
+@traced
+def get_cached_response(key: str, db_path: Path | None = None) -> str | None:
+    """Look up cached model output by key, marking the entry as recently used."""
+    db = get_database(db_path)
+    with db.transaction():
+        row = db.query_one("SELECT content FROM response_cache WHERE key = ?", (key,))
+        if row:
+            db.execute(
+                "UPDATE response_cache SET last_used_at = ? WHERE key = ?",
+                (datetime.now().isoformat(), key),
+            )
+    return row["content"] if row else None
+
+
+@traced
+def save_cached_response(
+    key: str,
+    model: str,
+    content: str,
+    section_id: int | None = None,
+    db_path: Path | None = None,
+) -> None:
+    """Store model output under a cache key."""
+    now = datetime.now().isoformat()
+    get_database(db_path).execute(
+        """INSERT OR REPLACE INTO response_cache
+           (key, model, section_id, content, created_at, last_used_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (key, model, section_id, content, now, now),
+    )
+
+
+@traced
+def evict_cached_responses(
+    max_entries: int | None = None,
+    max_age_days: float | None = None,
+    db_path: Path | None = None,
+) -> int:
+    """Drop expired and least-recently-used cache entries. Returns rows removed."""
+    db = get_database(db_path)
+    removed = 0
+    with db.transaction():
+        if max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            removed += db.execute(
+                "DELETE FROM response_cache WHERE created_at < ?", (cutoff,)
+            ).rowcount
+        if max_entries is not None:
+            removed += db.execute(
+                """DELETE FROM response_cache WHERE key NOT IN (
+                       SELECT key FROM response_cache ORDER BY last_used_at DESC LIMIT ?
+                   )""",
+                (max_entries,),
+            ).rowcount
+    return removed
+
+
+# ── Batch Jobs ──
+
+@traced
+def save_batch_job(job: dict, db_path: Path | None = None) -> str:
+    """Save a submitted batch job. Returns the batch ID."""
+    now = datetime.now().isoformat()
+    get_database(db_path).execute(
+        """INSERT OR REPLACE INTO batch_jobs
+           (id, status, model, jobs, request_count, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        (
+            job["id"],
+            job.get("status", "submitted"),
+            job.get("model", ""),
+            json.dumps(job.get("jobs", [])),
+            job.get("request_count", 0),
+            now,
+            now,
+        ),
+    )
+    return job["id"]
+
+
+@traced
+def update_batch_job_status(batch_id: str, status: str, db_path: Path | None = None) -> bool:
+    """Update a batch job's status. Returns True if the job exists."""
+    cur = get_database(db_path).execute(
+        "UPDATE batch_jobs SET status = ?, updated_at = ? WHERE id = ?",
+        (status, datetime.now().isoformat(), batch_id),
+    )
+    return cur.rowcount > 0
+
+
+@traced
+def get_batch_job(batch_id: str, db_path: Path | None = None) -> dict | None:
+    """Retrieve a batch job by its batch ID."""
+    row = get_database(db_path).query_one("SELECT * FROM batch_jobs WHERE id = ?", (batch_id,))
+    if row:
+        return {**dict(row), "jobs": json.loads(row["jobs"])}
+    return None
+
+
+@traced
+def list_batch_jobs(status: str | None = None, db_path: Path | None = None) -> list[dict]:
+    """List batch jobs, newest first, optionally filtered by status."""
+    db = get_database(db_path)
+    if status:
+        rows = db.query(
+            "SELECT * FROM batch_jobs WHERE status = ? ORDER BY created_at DESC", (status,)
+        )
+    else:
+        rows = db.query("SELECT * FROM batch_jobs ORDER BY created_at DESC")
+    return [{**dict(r), "jobs": json.loads(r["jobs"])} for r in rows]
+
+
+# ── Generation Usage ──
+
+USAGE_COLUMNS = (
+    "report_id",
+    "section_id",
+    "model",
+    "status",
+    "cached",
+    "estimated_input_tokens",
+    "max_tokens",
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+    "latency_seconds",
+    "packed",
+)
+
+
+@traced
+def save_generation_usage(record: dict, db_path: Path | None = None) -> None:
+    """Record token usage and latency for one section call."""
+    save_many_generation_usage([record], db_path)
+
+
+@traced
+def save_many_generation_usage(records: list[dict], db_path: Path | None = None) -> None:
+    """Record usage rows for several section calls in one transaction."""
+    now = datetime.now().isoformat()
+    get_database(db_path).executemany(
+        f"""INSERT INTO generation_usage ({", ".join(USAGE_COLUMNS)}, created_at)
+            VALUES ({", ".join("?" * len(USAGE_COLUMNS))}, ?)""",
+        [(*(record.get(c) for c in USAGE_COLUMNS), now) for record in records],
+    )
+
+
+@traced
+def get_generation_usage(report_ids: list[str], db_path: Path | None = None) -> list[dict]:
+    """Get usage rows for the given reports, oldest first."""
+    if not report_ids:
+        return []
+    rows = get_database(db_path).query(
+        f"""SELECT * FROM generation_usage
+            WHERE report_id IN ({", ".join("?" * len(report_ids))})
+            ORDER BY id""",
+        list(report_ids),
+    )
+    return [dict(r) for r in rows]
+
+
+@traced
+def get_recent_latencies(model: str, limit: int = 500, db_path: Path | None = None) -> list[dict]:
+    """Section ID and latency of recent uncached, successful single-section calls, newest first."""
+    rows = get_database(db_path).query(
+        """SELECT section_id, latency_seconds FROM generation_usage
+           WHERE model = ? AND cached = 0 AND status = 'generated' AND NOT COALESCE(packed, 0)
+             AND latency_seconds IS NOT NULL
+           ORDER BY id DESC LIMIT ?""",
+        (model, limit),
+    )
+    return [dict(r) for r in rows]
@@ -2,6 +2,10 @@
 
 This is the immutable template from which all sector frameworks inherit.
 Based on the Kongsberg methodology.
+
+Sections may list ``depends_on`` section IDs; they are generated only after
+those sections finish, from digests of their content. The Executive Summary
+and Conclusion summarize the body sections, so they depend on 2-10.
 """
 
 from __future__ import annotations
@@ -20,6 +24,7 @@ BASE_SECTIONS = [
             "investor_takeaway",
         ],
         "citation_target": {"min": 3, "max": 5},
+        "depends_on": [2, 3, 4, 5, 6, 7, 8, 9, 10],
     },
     {
         "id": 2,
@@ -115,6 +120,7 @@ BASE_SECTIONS = [
             "actionable_recommendations",
         ],
         "citation_target": {"min": 2, "max": 3},
+        "depends_on": [2, 3, 4, 5, 6, 7, 8, 9, 10],
     },
 ]
 
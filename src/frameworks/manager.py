@@ -11,6 +11,7 @@ from src.db import (
     get_framework,
     list_frameworks,
     save_framework,
+    save_many_frameworks,
 )
 from src.frameworks.base import build_effective_framework
 from src.frameworks.validator import validate_framework
@@ -98,15 +99,13 @@ class FrameworkManager:
 
     def load_builtin_frameworks(self) -> int:
         """Load all built-in JSON frameworks from data/frameworks/. Returns count loaded."""
-        loaded = 0
         if not FRAMEWORKS_DIR.exists():
-            return loaded
+            return 0
+        frameworks = []
         for json_file in FRAMEWORKS_DIR.glob("*.json"):
             with open(json_file) as f:
-                framework = json.load(f)
-            save_framework(framework, self.db_path)
-            loaded += 1
-        return loaded
+                frameworks.append(json.load(f))
+        return len(save_many_frameworks(frameworks, db_path=self.db_path))
 
     @staticmethod
     def _framework_to_markdown(effective: dict) -> str:
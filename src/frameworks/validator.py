@@ -43,9 +43,47 @@ def validate_framework(framework: dict) -> list[str]:
                     f"Section {key}: word_count min exceeds max"
                 )
 
+    # Validate dependency overrides
+    for key, override in overrides.items():
+        for dep in override.get("depends_on", []):
+            if dep not in VALID_SECTION_IDS:
+                errors.append(f"Section {key}: depends_on references invalid section {dep}")
+            elif str(dep) == str(key):
+                errors.append(f"Section {key}: cannot depend on itself")
+
+    # Validate the dependency graph (overrides replace a section's depends_on)
+    graph = []
+    for section in BASE_SECTIONS:
+        override = overrides.get(section["id"]) or overrides.get(str(section["id"])) or {}
+        depends_on = override.get("depends_on", section.get("depends_on", []))
+        graph.append({"id": section["id"], "depends_on": [d for d in depends_on if d != section["id"]]})
+    cycle = find_dependency_cycle(graph)
+    if cycle:
+        errors.append(f"Section dependency cycle: sections {cycle}")
+
     return errors
 
 
+def find_dependency_cycle(sections: list[dict]) -> list[int]:
+    """IDs of sections that can never start because of a ``depends_on`` cycle.
+
+    Dependencies on sections outside the list are ignored. Returns an empty
+    list when every section can be ordered.
+    """
+    ids = {s["id"] for s in sections}
+    waiting = {s["id"]: set(s.get("depends_on", [])) & ids for s in sections}
+    ready = [sid for sid, deps in waiting.items() if not deps]
+    while ready:
+        done = ready.pop()
+        del waiting[done]
+        for sid, deps in waiting.items():
+            if done in deps:
+                deps.discard(done)
+                if not deps:
+                    ready.append(sid)
+    return sorted(waiting)
+
+
 def validate_section_content(section_id: int, content: str, framework: dict) -> list[str]:
     """Validate generated section content against framework requirements.
 
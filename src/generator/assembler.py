@@ -3,16 +3,21 @@
 from __future__ import annotations
 
 from datetime import datetime
+from pathlib import Path
 
-from src.db import generate_id, save_report
+from src.db import generate_id, get_latest_report, save_many_generation_usage, save_report
+from src.generator.tokens import usage_records
 from src.research.citations import assign_citation_ids, format_references_section
+from src.tracing import traced
 
 
+@traced
 def assemble_report(
     sections: list[dict],
     company_profile: dict,
     framework: dict,
     citations: list[dict] | None = None,
+    report_id: str | None = None,
 ) -> dict:
     """Assemble generated sections into a complete report.
 
@@ -21,6 +26,7 @@ def assemble_report(
         company_profile: The company profile.
         framework: The effective framework used.
         citations: List of citation objects.
+        report_id: Reuse an existing report ID (e.g. a checkpointed run).
 
     Returns:
         A complete report dict ready for storage and export.
@@ -33,7 +39,7 @@ def assemble_report(
     all_generated = all(s.get("status") == "generated" for s in sections)
 
     report = {
-        "id": generate_id(),
+        "id": report_id or generate_id(),
         "company_id": company_profile.get("id", ""),
         "framework_id": framework.get("sector_id", ""),
         "status": "complete" if all_generated else "draft",
@@ -49,11 +55,19 @@ def assemble_report(
     return report
 
 
+def is_quick_report(report: dict) -> bool:
+    """Whether a report was produced by quick mode (``write_quick_report``)."""
+    sections = report.get("sections") or []
+    return bool(sections) and all(s.get("mode") == "quick" for s in sections)
+
+
+@traced
 def render_report_markdown(report: dict, company_profile: dict) -> str:
     """Render a report as a complete markdown document."""
     meta = company_profile.get("metadata", {})
+    kind = "Quick Analysis" if is_quick_report(report) else "Investment Analysis"
     lines = [
-        f"# {meta.get('name', '?')} ({meta.get('ticker', '?')}) — Investment Analysis",
+        f"# {meta.get('name', '?')} ({meta.get('ticker', '?')}) — {kind}",
         "",
         f"**Report Date:** {report.get('report_date', '?')}",
         f"**Reference Quarter:** {report.get('reference_quarter', '?')}",
@@ -87,6 +101,11 @@ def render_report_markdown(report: dict, company_profile: dict) -> str:
             lines.append("")
             lines.append(f"> **Generation Error:** {error}")
             lines.append("")
+        elif status == "timeout":
+            lines.append(f"## {name}")
+            lines.append("")
+            lines.append(f"> **Timed Out:** {section.get('error') or 'Not generated before the deadline'}")
+            lines.append("")
         elif content:
             # If content already has a header, use it as-is
             if content.strip().startswith("#"):
@@ -119,9 +138,86 @@ def render_report_markdown(report: dict, company_profile: dict) -> str:
     return "\n".join(lines)
 
 
-def save_assembled_report(report: dict) -> str:
+@traced
+def save_assembled_report(report: dict, db_path: Path | None = None) -> str:
     """Save an assembled report to the database."""
-    return save_report(report)
+    return save_report(report, db_path)
+
+
+# ── Checkpointing ──
+
+RESUMABLE_STATUSES = ("in_progress", "draft")
+
+
+def start_report_checkpoint(
+    company_profile: dict,
+    framework: dict,
+    db_path: Path | None = None,
+) -> dict:
+    """Create and persist an empty ``in_progress`` report to checkpoint into."""
+    report = new_report_checkpoint(company_profile, framework)
+    save_report(report, db_path)
+    return report
+
+
+def new_report_checkpoint(company_profile: dict, framework: dict) -> dict:
+    """An empty ``in_progress`` report, not yet saved (e.g. for ``save_many_reports``)."""
+    report = assemble_report([], company_profile, framework)
+    report["status"] = "in_progress"
+    return report
+
+
+@traced
+def checkpoint_section(report: dict, result: dict, db_path: Path | None = None) -> None:
+    """Record a finished section on an in-progress report and persist it."""
+    sections = [
+        s for s in report.get("sections", [])
+        if s.get("section_id") != result["section_id"]
+    ]
+    sections.append(result)
+    sections.sort(key=lambda s: s.get("section_id", 0))
+    report["sections"] = sections
+    report["word_count"] = sum(s.get("word_count", 0) for s in sections)
+    save_report(report, db_path)
+    record_section_usage(report["id"], result, db_path)
+
+
+def record_section_usage(report_id: str, result: dict, db_path: Path | None = None) -> None:
+    """Persist a section call's token usage and latency, if it made one."""
+    records = usage_records(report_id, result)
+    if records:
+        save_many_generation_usage(records, db_path)
+
+
+def record_report_usage(report_id: str, results: list[dict], db_path: Path | None = None) -> None:
+    """Persist the usage of several section calls in one transaction."""
+    records = [record for result in results for record in usage_records(report_id, result)]
+    if records:
+        save_many_generation_usage(records, db_path)
+
+
+def find_resumable_report(ticker: str, db_path: Path | None = None) -> dict | None:
+    """Return the latest report for a ticker if it is unfinished, else None."""
+    latest = get_latest_report(ticker, db_path)
+    if latest and latest.get("status") in RESUMABLE_STATUSES:
+        return latest
+    return None
+
+
+def split_resume_sections(report: dict, framework: dict) -> tuple[list[dict], list[dict]]:
+    """Split a checkpointed report into (kept results, sections to regenerate).
+
+    Sections that were generated successfully are kept; sections that are
+    missing or ended in any other status are returned for regeneration.
+    """
+    done = {
+        s["section_id"]: s
+        for s in report.get("sections", [])
+        if s.get("status") == "generated"
+    }
+    kept = [done[s["id"]] for s in framework.get("sections", []) if s["id"] in done]
+    pending = [s for s in framework.get("sections", []) if s["id"] not in done]
+    return kept, pending
 
 
 def _slugify(text: str) -> str:
@@ -0,0 +1,455 @@
+"""LLM backends behind section generation.
+
+A backend performs one model request; retries, rate limiting, caching and
+bookkeeping stay in ``GenerationSession``. Requests are dicts with
+``model``, ``max_tokens``, ``system`` and ``messages`` (the Messages API
+shape) plus an optional ``timeout`` in seconds, and every call returns
+``{"text": str, "usage": dict}``.
+
+The backend is chosen with the ``backend`` config key: ``"anthropic"``
+(default), ``"fake"`` (deterministic offline output for tests and
+benchmarks) or ``"package.module:ClassName"`` for a custom implementation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from typing import Protocol
+
+from src.generator.prompts import SECTION_END, SECTION_START
+from src.generator.tokens import TOKENS_PER_WORD, estimate_tokens
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+class LLMBackend(Protocol):
+    """What ``GenerationSession`` needs from a model backend.
+
+    ``on_text(text)`` receives streamed deltas; for the async methods it may
+    return an awaitable, which is awaited before continuing.
+    """
+
+    requires_api_key: bool
+
+    def complete(self, request: dict) -> dict: ...
+
+    def stream(self, request: dict, on_text) -> dict: ...
+
+    async def acomplete(self, request: dict) -> dict: ...
+
+    async def astream(self, request: dict, on_text) -> dict: ...
+
+    def close(self) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+def usage_dict(usage) -> dict:
+    """Token counts from an API usage object (cache fields default to 0)."""
+    return {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+
+
+class AnthropicBackend:
+    """The Anthropic Messages API, with pooled keep-alive clients.
+
+    ``client``/``async_client`` may be injected (e.g. test doubles with the
+    SDK's interface); otherwise they are created on first use.
+    """
+
+    requires_api_key = True
+
+    def __init__(
+        self,
+        api_key: str = "",
+        base_url: str | None = None,
+        pool_size: int = 4,
+        client=None,
+        async_client=None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.pool_size = max(pool_size, 1)
+        self._client = client
+        self._async_client = async_client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The shared synchronous SDK client (also used by batch mode)."""
+        with self._lock:
+            if self._client is None:
+                import anthropic
+
+                self._client = anthropic.Anthropic(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,  # retries are handled by the session
+                    http_client=anthropic.DefaultHttpxClient(limits=self._pool_limits()),
+                )
+            return self._client
+
+    @property
+    def async_client(self):
+        """The shared async SDK client."""
+        with self._lock:
+            if self._async_client is None:
+                import anthropic
+
+                self._async_client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,
+                    http_client=anthropic.DefaultAsyncHttpxClient(limits=self._pool_limits()),
+                )
+            return self._async_client
+
+    def complete(self, request: dict) -> dict:
+        response = self.client.messages.create(**request)
+        return {"text": response.content[0].text, "usage": usage_dict(response.usage)}
+
+    def stream(self, request: dict, on_text) -> dict:
+        chunks = []
+        with self.client.messages.stream(**request) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                on_text(text)
+            message = stream.get_final_message()
+        return {"text": "".join(chunks), "usage": usage_dict(message.usage)}
+
+    async def acomplete(self, request: dict) -> dict:
+        response = await self.async_client.messages.create(**request)
+        return {"text": response.content[0].text, "usage": usage_dict(response.usage)}
+
+    async def astream(self, request: dict, on_text) -> dict:
+        chunks = []
+        async with self.async_client.messages.stream(**request) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+                outcome = on_text(text)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            message = await stream.get_final_message()
+        return {"text": "".join(chunks), "usage": usage_dict(message.usage)}
+
+    def close(self) -> None:
+        if self._client is not None and hasattr(self._client, "close"):
+            self._client.close()
+        self._client = None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None and hasattr(self._async_client, "close"):
+            await self._async_client.close()
+        self._async_client = None
+
+    def _pool_limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.pool_size * 2,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=60.0,
+        )
+
+
+class BatchUnsupportedError(Exception):
+    """The backend has no Message Batches API (e.g. the offline fake backend)."""
+
+
+class FakeAPIError(Exception):
+    """An injected failure; ``status_code`` makes it retryable like a real one."""
+
+    def __init__(self, message: str, status_code: int = 529):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeBackend:
+    """Deterministic offline backend producing schema-conforming markdown.
+
+    Output depends only on the request: each section gets its heading,
+    ``###`` subheadings, a markdown table and ``[N]`` citations drawn from the
+    prompt, sized to the section's word target (and ``max_tokens``). Usage
+    is estimated from text length, and a repeated cacheable prefix is
+    reported as a prompt-cache read.
+
+    Args:
+        latency: Seconds before the first token.
+        tokens_per_second: Output rate; 0 returns text instantly.
+        error_rate: Probability (0-1) that a call fails with ``FakeAPIError``.
+        error_status: HTTP status of injected errors (529 is retried).
+        seed: Seed for the error-injection sequence.
+    """
+
+    requires_api_key = False
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 529,
+        seed: int = 0,
+        sleep=time.sleep,
+    ):
+        self.latency = float(latency)
+        self.tokens_per_second = float(tokens_per_second)
+        self.error_rate = float(error_rate)
+        self.error_status = int(error_status)
+        self._sleep = sleep
+        self._errors = random.Random(seed)
+        self._prefixes: set[str] = set()
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @property
+    def client(self):
+        raise BatchUnsupportedError("The fake backend does not support the Message Batches API")
+
+    def complete(self, request: dict) -> dict:
+        text, usage = self._respond(request)
+        budget = _Budget(request.get("timeout"))
+        self._sleep(budget.wait(self.latency + self._duration(usage["output_tokens"])))
+        budget.check()
+        return {"text": text, "usage": usage}
+
+    def stream(self, request: dict, on_text) -> dict:
+        text, usage = self._respond(request)
+        budget = _Budget(request.get("timeout"))
+        self._sleep(budget.wait(self.latency))
+        budget.check()
+        for chunk, delay in self._chunks(text):
+            self._sleep(budget.wait(delay))
+            budget.check()
+            on_text(chunk)
+        return {"text": text, "usage": usage}
+
+    async def acomplete(self, request: dict) -> dict:
+        text, usage = self._respond(request)
+        budget = _Budget(request.get("timeout"))
+        await asyncio.sleep(budget.wait(self.latency + self._duration(usage["output_tokens"])))
+        budget.check()
+        return {"text": text, "usage": usage}
+
+    async def astream(self, request: dict, on_text) -> dict:
+        text, usage = self._respond(request)
+        budget = _Budget(request.get("timeout"))
+        await asyncio.sleep(budget.wait(self.latency))
+        budget.check()
+        for chunk, delay in self._chunks(text):
+            await asyncio.sleep(budget.wait(delay))
+            budget.check()
+            outcome = on_text(chunk)
+            if inspect.isawaitable(outcome):
+                await outcome
+        return {"text": text, "usage": usage}
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+    def _respond(self, request: dict) -> tuple[str, dict]:
+        with self._lock:
+            self.calls += 1
+            fail = self.error_rate and self._errors.random() < self.error_rate
+        if fail:
+            raise FakeAPIError("Injected fake API error", self.error_status)
+
+        system = _text_of(request.get("system", ""))
+        blocks = _content_blocks(request.get("messages", []))
+        prompt = "\n\n".join(text for text, _ in blocks)
+        cached_prefix = "".join(text for text, cacheable in blocks[:1] if cacheable)
+
+        text = fake_markdown(prompt, request.get("max_tokens"), _seed(request))
+        usage = dict.fromkeys(USAGE_FIELDS, 0)
+        usage["output_tokens"] = estimate_tokens(text)
+        input_tokens = estimate_tokens(system + prompt)
+        if cached_prefix:
+            prefix_tokens = estimate_tokens(system + cached_prefix)
+            key = hashlib.sha256((system + cached_prefix).encode("utf-8")).hexdigest()
+            with self._lock:
+                hit = key in self._prefixes
+                self._prefixes.add(key)
+            usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = prefix_tokens
+            input_tokens -= prefix_tokens
+        usage["input_tokens"] = max(input_tokens, 0)
+        return text, usage
+
+    def _duration(self, output_tokens: int) -> float:
+        return output_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _chunks(self, text: str):
+        """Yield ``(chunk, delay)`` pairs of about eight words each."""
+        pieces = re.findall(r"\S+\s*|\s+", text)
+        for start in range(0, len(pieces), 8):
+            chunk = "".join(pieces[start:start + 8])
+            yield chunk, self._duration(estimate_tokens(chunk))
+
+
+class FakeTimeoutError(TimeoutError):
+    """A simulated request that outran its ``timeout``."""
+
+
+class _Budget:
+    """Simulated time left for a request with an optional ``timeout``.
+
+    ``wait(seconds)`` returns how long to sleep for the next step (at most
+    the time left); ``check()`` raises once the timeout has been used up.
+    """
+
+    def __init__(self, timeout: float | None):
+        self.left = None if timeout is None else float(timeout)
+        self.expired = False
+
+    def wait(self, seconds: float) -> float:
+        if self.left is None:
+            return seconds
+        if seconds > self.left:
+            self.expired = True
+            seconds = self.left
+        self.left -= seconds
+        return seconds
+
+    def check(self) -> None:
+        if self.expired:
+            raise FakeTimeoutError("Request timed out")
+
+
+_SECTION_RE = re.compile(r"^# Section (\d+): (.+)$", re.MULTILINE)
+_WORDS_RE = re.compile(r"\*\*Word Count Target:\*\* (\d+)\D+(\d+) words")
+_CITATIONS_RE = re.compile(r"\*\*Citation Target:\*\* (\d+)\D+(\d+)")
+_SOURCE_RE = re.compile(r"^\[(\d+)\] ", re.MULTILINE)
+
+_VOCABULARY = (
+    "revenue growth margin backlog guidance segment pricing demand capacity "
+    "contract customer program pipeline execution cash flow valuation multiple "
+    "consensus estimate operating leverage mix order intake utilization "
+    "competitive position supply chain capital allocation return dividend"
+).split()
+
+
+def fake_markdown(prompt: str, max_tokens: int | None = None, seed: int = 0) -> str:
+    """Deterministic report-style markdown for a section prompt.
+
+    A multi-section prompt (see ``build_multi_section_instructions``) gets
+    every requested section, each wrapped in its delimiter lines.
+    """
+    rng = random.Random(seed)
+    sources = [int(n) for n in _SOURCE_RE.findall(prompt)] or list(range(1, 6))
+    word_cap = int(max_tokens / TOKENS_PER_WORD * 0.8) if max_tokens else None
+    headings = list(_SECTION_RE.finditer(prompt))
+    if len(headings) < 2 or SECTION_END.format(id=headings[0].group(1)) not in prompt:
+        return _fake_section(headings[-1] if headings else None, prompt, sources, word_cap, rng)
+
+    if word_cap:
+        word_cap //= len(headings)
+    blocks = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(prompt)
+        body = _fake_section(heading, prompt[heading.start():end], sources, word_cap, rng)
+        section_id = heading.group(1)
+        blocks.append(f"{SECTION_START.format(id=section_id)}\n{body}{SECTION_END.format(id=section_id)}")
+    return "\n\n".join(blocks) + "\n"
+
+
+def _fake_section(heading, prompt: str, sources: list[int], word_cap: int | None, rng) -> str:
+    section_id, name = heading.groups() if heading else ("0", "Analysis")
+    words = _WORDS_RE.search(prompt)
+    target = (int(words.group(1)) + int(words.group(2))) // 2 if words else 400
+    if word_cap:
+        target = min(target, word_cap)
+    cites = _CITATIONS_RE.search(prompt)
+    citation_count = int(cites.group(2)) if cites else 3
+
+    lines = [f"## Section {section_id}: {name}", ""]
+    lines += [
+        "| Metric | FY2024 | FY2025 | FY2026E |",
+        "|---|---|---|---|",
+    ]
+    for metric in ("Revenue ($M)", "Operating margin", "Free cash flow ($M)"):
+        values = [f"{rng.uniform(5, 5000):,.1f}" for _ in range(3)]
+        lines.append(f"| {metric} | " + " | ".join(values) + " |")
+    lines.append("")
+
+    written = 0
+    paragraph = 0
+    while written < target:
+        if paragraph % 3 == 0:
+            lines.append(f"### {rng.choice(_VOCABULARY).title()} {rng.choice(_VOCABULARY)}")
+            lines.append("")
+        size = min(60, max(target - written, 5))
+        body = [rng.choice(_VOCABULARY) for _ in range(size)]
+        body[0] = body[0].capitalize()
+        if paragraph < citation_count:
+            body[-1] += f" [{sources[paragraph % len(sources)]}]"
+        lines.append(" ".join(body) + ".")
+        lines.append("")
+        written += size
+        paragraph += 1
+    return "\n".join(lines).rstrip() + "\n"
+
+
+BACKENDS = {"anthropic": AnthropicBackend, "fake": FakeBackend}
+
+
+def create_backend(config: dict, client=None, async_client=None) -> LLMBackend:
+    """Build the backend named by ``config["backend"]``.
+
+    ``client``/``async_client`` are passed to the Anthropic backend; fake
+    backend options come from ``config["fake_backend"]``.
+    """
+    name = str(config.get("backend") or "anthropic")
+    if name == "anthropic" or client is not None or async_client is not None:
+        return AnthropicBackend(
+            api_key=config.get("api_key", ""),
+            base_url=config.get("base_url") or None,
+            pool_size=int(config.get("concurrency", 1)),
+            client=client,
+            async_client=async_client,
+        )
+    if name == "fake":
+        return FakeBackend(**(config.get("fake_backend") or {}))
+    if ":" in name:
+        module, _, attr = name.partition(":")
+        return getattr(importlib.import_module(module), attr)(config)
+    raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)})")
+
+
+def _text_of(value) -> str:
+    if isinstance(value, str):
+        return value
+    return "\n\n".join(block.get("text", "") for block in value)
+
+
+def _content_blocks(messages: list[dict]) -> list[tuple[str, bool]]:
+    """``(text, cacheable)`` for each content block of the messages."""
+    blocks = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            blocks.append((content, False))
+        else:
+            blocks.extend((b.get("text", ""), "cache_control" in b) for b in content)
+    return blocks
+
+
+def _seed(request: dict) -> int:
+    payload = json.dumps(
+        [request.get("model"), request.get("system"), request.get("messages")],
+        sort_keys=True, default=str,
+    )
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "big")
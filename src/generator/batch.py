@@ -0,0 +1,143 @@
+"""Message Batches API mode for large, latency-insensitive portfolio runs.
+
+Every (ticker, section) prompt is submitted as one asynchronous batch job.
+The batch ID and the ticker/section mapping are persisted so polling and
+result collection can happen in a later CLI invocation.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from src.db import get_batch_job, save_batch_job, update_batch_job_status
+from src.generator.prompts import build_request_payload, build_section_prompt_parts
+from src.generator.backends import usage_dict
+from src.generator.writer import GenerationSession, _section_result
+from src.tracing import traced
+
+BATCH_ENDED = "ended"
+
+
+def build_batch_requests(
+    jobs: list[dict],
+    session: GenerationSession,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+) -> list[dict]:
+    """Build batch request entries for every section of every job.
+
+    Each job is a dict with ``ticker``, ``profile`` and ``framework`` (the
+    effective framework). Custom IDs encode the job index and section ID,
+    since tickers may contain characters the API does not accept.
+    """
+    requests = []
+    for index, job in enumerate(jobs):
+        framework = job["framework"]
+        for section in framework.get("sections", []):
+            shared, instructions = build_section_prompt_parts(
+                section, job["profile"], research_data, citations, framework
+            )
+            system, messages = build_request_payload(shared, instructions, session.prompt_caching)
+            requests.append({
+                "custom_id": _custom_id(index, section["id"]),
+                "params": {
+                    "model": session.model,
+                    "max_tokens": session.max_tokens_for(section),
+                    "system": system,
+                    "messages": messages,
+                },
+            })
+    return requests
+
+
+@traced
+def submit_batch(
+    jobs: list[dict],
+    session: GenerationSession,
+    db_path: Path | None = None,
+) -> dict:
+    """Submit all section prompts as one batch and persist the job record."""
+    requests = build_batch_requests(jobs, session)
+    batch = session.client.messages.batches.create(requests=requests)
+    record = {
+        "id": batch.id,
+        "status": "submitted",
+        "model": session.model,
+        "request_count": len(requests),
+        "jobs": [
+            {
+                "ticker": job["ticker"],
+                "company_id": job["profile"].get("id", ""),
+                "framework_id": job["framework"].get("sector_id", ""),
+                "sections": [
+                    {"id": s["id"], "name": s.get("name", f"Section {s['id']}")}
+                    for s in job["framework"].get("sections", [])
+                ],
+            }
+            for job in jobs
+        ],
+    }
+    save_batch_job(record, db_path)
+    return record
+
+
+@traced
+def check_batch(batch_id: str, session: GenerationSession, db_path: Path | None = None) -> dict:
+    """Fetch a batch's processing status and request counts.
+
+    Marks the stored job ``ended`` once the API reports processing finished.
+    """
+    batch = session.client.messages.batches.retrieve(batch_id)
+    counts = getattr(batch, "request_counts", None)
+    if batch.processing_status == BATCH_ENDED:
+        update_batch_job_status(batch_id, BATCH_ENDED, db_path)
+    return {
+        "id": batch_id,
+        "processing_status": batch.processing_status,
+        "succeeded": getattr(counts, "succeeded", 0) if counts else 0,
+        "errored": getattr(counts, "errored", 0) if counts else 0,
+        "processing": getattr(counts, "processing", 0) if counts else 0,
+    }
+
+
+@traced
+def collect_batch_results(
+    batch_id: str,
+    session: GenerationSession,
+    db_path: Path | None = None,
+) -> dict[str, list[dict]]:
+    """Download batch results and regroup them into per-ticker section lists.
+
+    Returns ``{ticker: [section result, ...]}`` with sections in framework
+    order. Sections the batch did not answer are returned as errors.
+    """
+    record = get_batch_job(batch_id, db_path)
+    if record is None:
+        raise ValueError(f"Unknown batch job: {batch_id}")
+
+    by_custom_id = {}
+    for entry in session.client.messages.batches.results(batch_id):
+        by_custom_id[entry.custom_id] = entry.result
+
+    grouped = {}
+    for index, job in enumerate(record["jobs"]):
+        results = []
+        for section in job["sections"]:
+            outcome = by_custom_id.get(_custom_id(index, section["id"]))
+            if outcome is None:
+                result = _section_result(section, status="error", error="No result returned by batch")
+            elif outcome.type == "succeeded":
+                result = _section_result(section, content=outcome.message.content[0].text)
+                result["usage"] = usage_dict(outcome.message.usage)
+                result["model"] = record.get("model", "")
+            else:
+                error = getattr(outcome, "error", None)
+                message = f"Batch request {outcome.type}" + (f": {error}" if error else "")
+                result = _section_result(section, status="error", error=message)
+            results.append(result)
+        grouped[job["ticker"]] = results
+    return grouped
+
+
+def _custom_id(job_index: int, section_id: int) -> str:
+    return f"t{job_index}-s{section_id}"
@@ -0,0 +1,94 @@
+"""Content-addressed cache for generated section text."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from src.db import evict_cached_responses, get_cached_response, save_cached_response
+
+
+def response_cache_key(
+    model: str, system: str, prompt: str, max_tokens: int, backend: str = "anthropic",
+) -> str:
+    """Hash everything that determines a model response into a cache key.
+
+    The backend is part of the key so text from the offline fake backend is
+    never served once a real one is configured.
+    """
+    payload = json.dumps([backend, model, system, prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with hit/miss counters.
+
+    Sections listed in ``refresh_sections`` always miss, so they are
+    regenerated and their fresh output replaces the cached entry. Storage
+    errors (e.g. a database created before the cache table existed) degrade
+    to misses rather than failing generation.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        max_entries: int | None = None,
+        max_age_days: float | None = None,
+        refresh_sections: set[int] | None = None,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.refresh_sections = set(refresh_sections or ())
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+        db_path: Path | None = None,
+        refresh_sections: set[int] | None = None,
+    ) -> ResponseCache | None:
+        """Build a cache from config, or None if caching is disabled."""
+        if str(config.get("cache_enabled", True)).lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(
+            db_path=db_path,
+            max_entries=int(config.get("cache_max_entries", 2000)),
+            max_age_days=float(config.get("cache_max_age_days", 30)),
+            refresh_sections=refresh_sections,
+        )
+
+    def get(self, key: str, section_id: int | None = None) -> str | None:
+        """Return cached content for ``key``, or None on a miss."""
+        content = None
+        if section_id not in self.refresh_sections:
+            try:
+                content = get_cached_response(key, self.db_path)
+            except sqlite3.Error:
+                self._count("errors")
+        self._count("hits" if content is not None else "misses")
+        return content
+
+    def put(self, key: str, model: str, content: str, section_id: int | None = None) -> None:
+        """Store freshly generated content."""
+        try:
+            save_cached_response(key, model, content, section_id, self.db_path)
+        except sqlite3.Error:
+            self._count("errors")
+
+    def evict(self) -> int:
+        """Apply the age and size limits. Returns entries removed."""
+        try:
+            return evict_cached_responses(self.max_entries, self.max_age_days, self.db_path)
+        except sqlite3.Error:
+            self._count("errors")
+            return 0
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
@@ -0,0 +1,200 @@
+"""Hedged requests - a duplicate call for sections that run unusually long.
+
+If a call has neither finished nor started streaming after a latency
+threshold (a percentile of the section's recently recorded latencies, seeded
+from ``generation_usage`` and updated as the run goes), an identical second
+call is fired and whichever responds first wins. A losing stream is aborted
+at its first delta; a losing non-streamed call is left to finish in the
+background and its response handed to ``on_discard`` so its usage can still
+be counted. Hedges are capped at a fraction of calls so a slow API never
+sees double the traffic.
+"""
+
+from __future__ import annotations
+
+import math
+import queue
+import sqlite3
+import threading
+from collections import deque
+from pathlib import Path
+
+from src.db import get_recent_latencies
+from src.tracing import span
+
+# Recorded calls read from generation_usage to seed the thresholds
+HISTORY_ROWS = 2000
+
+_attempt = threading.local()
+
+
+class HedgeLost(Exception):
+    """Raised inside a hedged attempt that lost the race, to abort it."""
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def claim_response() -> bool:
+    """Claim the race for the calling attempt; False if another attempt won.
+
+    Streaming callers check this at their first delta. Outside a hedged call
+    it is always True.
+    """
+    race = getattr(_attempt, "race", None)
+    return race is None or race.claim(_attempt.index)
+
+
+class HedgePolicy:
+    """Latency thresholds and the hedge budget shared by a generation run.
+
+    Args:
+        samples: ``(section_id, latency_seconds)`` pairs to learn from.
+        pct: Percentile of a section's latencies after which a call is hedged.
+        max_fraction: Cap on hedged calls as a fraction of all calls.
+        min_samples: Latencies needed before a threshold is trusted; with
+            fewer for a section, the pooled latencies of all sections are used.
+        max_samples: Most recent latencies kept per section.
+    """
+
+    def __init__(
+        self,
+        samples=(),
+        pct: float = 95.0,
+        max_fraction: float = 0.1,
+        min_samples: int = 20,
+        max_samples: int = 500,
+    ):
+        self.pct = float(pct)
+        self.max_fraction = float(max_fraction)
+        self.min_samples = max(1, int(min_samples))
+        self.max_samples = int(max_samples)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "discarded": 0}
+        self._samples: dict[int | None, deque] = {}
+        self._lock = threading.Lock()
+        # Oldest first, so the newest samples survive the per-section cap
+        for section_id, latency in reversed(list(samples)):
+            self.observe(section_id, latency)
+
+    @classmethod
+    def from_config(cls, config: dict, model: str, db_path: Path | None = None) -> HedgePolicy | None:
+        """Build a policy from recorded latencies, or None if hedging is disabled."""
+        if str(config.get("hedge_requests", False)).lower() not in ("1", "true", "yes", "on"):
+            return None
+        try:
+            rows = get_recent_latencies(model, HISTORY_ROWS, db_path)
+        except sqlite3.Error:
+            rows = []
+        return cls(
+            [(r["section_id"], r["latency_seconds"]) for r in rows],
+            pct=float(config.get("hedge_percentile", 95)),
+            max_fraction=float(config.get("hedge_max_fraction", 0.1)),
+            min_samples=int(config.get("hedge_min_samples", 20)),
+        )
+
+    def observe(self, section_id: int | None, latency: float) -> None:
+        """Record a finished call's latency for its section and the pool."""
+        with self._lock:
+            for key in {section_id, None}:
+                self._samples.setdefault(key, deque(maxlen=self.max_samples)).append(float(latency))
+
+    def threshold(self, section_id: int | None) -> float | None:
+        """Seconds after which a call for the section is hedged (None: not enough data)."""
+        with self._lock:
+            for key in (section_id, None):
+                values = self._samples.get(key)
+                if values and len(values) >= self.min_samples:
+                    return percentile(values, self.pct)
+        return None
+
+    def call(self, fn, section_id: int | None = None, on_discard=None):
+        """Return ``fn()``, racing a second ``fn()`` if the first runs past the threshold.
+
+        ``on_discard(response)`` is called, possibly after this returns, with
+        the response of an attempt that completed but lost the race.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        delay = self.threshold(section_id)
+        if delay is None:
+            return fn()
+
+        race = _Race(fn, lambda response: self._discard(response, on_discard))
+        race.start()
+        try:
+            outcome = race.done.get(timeout=delay)
+        except queue.Empty:
+            outcome = None
+            if race.winner is None and self._allow_hedge():
+                race.start()
+
+        received = 0
+        error = None
+        while True:
+            index, result, exc = outcome or race.done.get()
+            outcome = None
+            received += 1
+            if exc is None and race.claim(index):
+                if index:
+                    with self._lock:
+                        self.stats["hedge_wins"] += 1
+                return result
+            if exc is not None and not isinstance(exc, HedgeLost):
+                error = error or exc
+            if received == race.launched:
+                raise error or exc
+
+    def _discard(self, response, on_discard) -> None:
+        with self._lock:
+            self.stats["discarded"] += 1
+        if on_discard is not None:
+            on_discard(response)
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self.stats["hedged"] + 1 > self.max_fraction * self.stats["calls"]:
+                return False
+            self.stats["hedged"] += 1
+            return True
+
+
+class _Race:
+    """Attempts of one hedged call, each on its own daemon thread."""
+
+    def __init__(self, fn, on_discard):
+        self.fn = fn
+        self.on_discard = on_discard
+        self.winner: int | None = None
+        self.launched = 0
+        self.done: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        index = self.launched
+        self.launched += 1
+        threading.Thread(target=self._run, args=(index,), name=f"hedge-{index}", daemon=True).start()
+
+    def claim(self, index: int) -> bool:
+        with self._lock:
+            if self.winner is None:
+                self.winner = index
+            return self.winner == index
+
+    def _run(self, index: int) -> None:
+        _attempt.race, _attempt.index = self, index
+        try:
+            with span("api.hedged_attempt", "api", attempt=index):
+                response = self.fn()
+        except BaseException as e:
+            self.done.put((index, None, e))
+            return
+        # The first attempt to complete wins; a later one only reports its usage
+        if self.claim(index):
+            self.done.put((index, response, None))
+        else:
+            self.done.put((index, None, HedgeLost("Another request for this section responded first")))
+            self.on_discard(response)
@@ -6,8 +6,10 @@ from datetime import datetime
 
 from src.db import generate_id, save_company
 from src.research.financial import fetch_company_info
+from src.tracing import traced
 
 
+@traced
 def create_company_profile(
     ticker: str,
     name: str | None = None,
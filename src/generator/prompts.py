@@ -1,5 +1,9 @@
 """Prompt template management for AI-powered section generation."""
 
+import re
+
+from src.tracing import traced
+
 SYSTEM_PROMPT = """You are an institutional-grade investment analyst writing a detailed research report.
 
 Your writing must follow these standards:
@@ -21,6 +25,7 @@ def build_section_prompt(
     research_data: dict | None = None,
     citations: list[dict] | None = None,
     full_framework: dict | None = None,
+    dependencies: list[dict] | None = None,
 ) -> str:
     """Build a prompt for generating a specific report section.
 
@@ -30,15 +35,123 @@ def build_section_prompt(
         research_data: Additional research data (financials, news, etc.).
         citations: Available citations for this section.
         full_framework: The full effective framework for context.
+        dependencies: Finished results of the sections this one depends on.
 
     Returns:
         The complete prompt string for the Claude API.
     """
+    shared, instructions = build_section_prompt_parts(
+        section, company_profile, research_data, citations, full_framework, dependencies
+    )
+    return f"{shared}\n\n{instructions}"
+
+
+@traced
+def build_section_prompt_parts(
+    section: dict,
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    full_framework: dict | None = None,
+    dependencies: list[dict] | None = None,
+) -> tuple[str, str]:
+    """Build a section prompt as ``(shared_context, section_instructions)``.
+
+    The shared context is identical for every section of a report, so it can
+    be sent as a cacheable prompt prefix; only the short instructions differ.
+    Digests of finished dependency sections go into the instructions.
+    """
+    shared = build_shared_context(company_profile, research_data, citations, full_framework)
+    return shared, build_section_instructions(section, dependencies)
+
+
+def build_shared_context(
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    full_framework: dict | None = None,
+) -> str:
+    """Build the report-wide context block shared by all section prompts.
+
+    Contains only inputs that do not vary by section (company data, research
+    data, citations, framework outline) so the block is byte-identical across
+    a report's sections.
+    """
     meta = company_profile.get("metadata", {})
     fin = company_profile.get("financials", {})
     val = company_profile.get("valuation", {})
     ops = company_profile.get("operational", {})
 
+    prompt_parts = [
+        f"**Company:** {meta.get('name', '?')} ({meta.get('ticker', '?')})",
+        f"**Report Date:** {meta.get('report_date', '?')}",
+        f"**Reference Quarter:** {meta.get('reference_quarter', '?')}",
+        "",
+    ]
+
+    # Framework outline
+    if full_framework and full_framework.get("sections"):
+        prompt_parts.append(f"## Report Structure ({full_framework.get('display_name', '')})")
+        prompt_parts.append("")
+        for s in full_framework["sections"]:
+            wc = s.get("word_count", {})
+            prompt_parts.append(
+                f"{s['id']}. {s.get('name', '')} ({wc.get('min', '?')}–{wc.get('max', '?')} words)"
+            )
+        prompt_parts.append("")
+
+    # Company data context
+    prompt_parts.append("---")
+    prompt_parts.append("## Company Data Available")
+    prompt_parts.append("")
+    prompt_parts.append(f"Revenue (current): {_fmt(fin.get('revenue', {}).get('current'))}")
+    prompt_parts.append(f"Gross Margin: {_fmt(fin.get('gross_margin', {}).get('current'))}")
+    prompt_parts.append(f"Operating Margin: {_fmt(fin.get('operating_margin', {}).get('current'))}")
+    prompt_parts.append(f"FCF: {_fmt(fin.get('fcf'))}")
+    prompt_parts.append(f"EPS (GAAP): {_fmt(fin.get('eps', {}).get('gaap'))}")
+    prompt_parts.append(f"Market Cap: {_fmt(val.get('market_cap'))}")
+    prompt_parts.append(f"EV/Sales: {_fmt(val.get('ev_sales'))}")
+    prompt_parts.append(f"Fwd P/E: {_fmt(val.get('pe_forward'))}")
+    prompt_parts.append("")
+
+    if ops.get("products"):
+        prompt_parts.append(f"Products: {', '.join(ops['products'])}")
+    if ops.get("customers"):
+        prompt_parts.append(f"Key Customers: {', '.join(ops['customers'])}")
+    prompt_parts.append("")
+
+    # Additional research data
+    if research_data:
+        prompt_parts.append("---")
+        prompt_parts.append("## Additional Research Data")
+        prompt_parts.append("")
+        for key, value in research_data.items():
+            if isinstance(value, str):
+                prompt_parts.append(f"**{key}:** {value}")
+            elif isinstance(value, list):
+                prompt_parts.append(f"**{key}:**")
+                for item in value:
+                    prompt_parts.append(f"- {item}")
+            prompt_parts.append("")
+
+    # Available citations
+    if citations:
+        prompt_parts.append("---")
+        prompt_parts.append("## Available Citations")
+        prompt_parts.append("Use [N] format to cite these sources inline:")
+        prompt_parts.append("")
+        for c in citations:
+            cid = c.get("id", "?")
+            title = c.get("title", "Unknown")
+            subject = c.get("subject", "")
+            prompt_parts.append(f"[{cid}] {title} — {subject}")
+        prompt_parts.append("")
+
+    return "\n".join(prompt_parts).rstrip()
+
+
+def build_section_instructions(section: dict, dependencies: list[dict] | None = None) -> str:
+    """Build the section-specific part of a prompt."""
     section_name = section.get("name", f"Section {section['id']}")
     word_min = section.get("word_count", {}).get("min", 400)
     word_max = section.get("word_count", {}).get("max", 600)
@@ -46,12 +159,9 @@ def build_section_prompt(
     cit_max = section.get("citation_target", {}).get("max", 5)
 
     prompt_parts = [
+        "---",
         f"# Section {section['id']}: {section_name}",
         "",
-        f"**Company:** {meta.get('name', '?')} ({meta.get('ticker', '?')})",
-        f"**Report Date:** {meta.get('report_date', '?')}",
-        f"**Reference Quarter:** {meta.get('reference_quarter', '?')}",
-        "",
         f"**Word Count Target:** {word_min}–{word_max} words",
         f"**Citation Target:** {cit_min}–{cit_max} inline citations [N]",
         "",
@@ -106,57 +216,29 @@ def build_section_prompt(
                     prompt_parts.append(f"- {item.replace('_', ' ').title()}")
                 prompt_parts.append("")
 
-    # Company data context
-    prompt_parts.append("---")
-    prompt_parts.append("## Company Data Available")
-    prompt_parts.append("")
-    prompt_parts.append(f"Revenue (current): {_fmt(fin.get('revenue', {}).get('current'))}")
-    prompt_parts.append(f"Gross Margin: {_fmt(fin.get('gross_margin', {}).get('current'))}")
-    prompt_parts.append(f"Operating Margin: {_fmt(fin.get('operating_margin', {}).get('current'))}")
-    prompt_parts.append(f"FCF: {_fmt(fin.get('fcf'))}")
-    prompt_parts.append(f"EPS (GAAP): {_fmt(fin.get('eps', {}).get('gaap'))}")
-    prompt_parts.append(f"Market Cap: {_fmt(val.get('market_cap'))}")
-    prompt_parts.append(f"EV/Sales: {_fmt(val.get('ev_sales'))}")
-    prompt_parts.append(f"Fwd P/E: {_fmt(val.get('pe_forward'))}")
-    prompt_parts.append("")
-
-    if ops.get("products"):
-        prompt_parts.append(f"Products: {', '.join(ops['products'])}")
-    if ops.get("customers"):
-        prompt_parts.append(f"Key Customers: {', '.join(ops['customers'])}")
-    prompt_parts.append("")
-
-    # Additional research data
-    if research_data:
-        prompt_parts.append("---")
-        prompt_parts.append("## Additional Research Data")
+    # Findings from the sections this one summarizes
+    digests = [build_section_digest(r) for r in dependencies or [] if r.get("content")]
+    if digests:
+        prompt_parts.append("**Findings From Completed Sections:**")
+        prompt_parts.append(
+            "Base this section on these findings; do not contradict them "
+            "or introduce figures they do not support."
+        )
         prompt_parts.append("")
-        for key, value in research_data.items():
-            if isinstance(value, str):
-                prompt_parts.append(f"**{key}:** {value}")
-            elif isinstance(value, list):
-                prompt_parts.append(f"**{key}:**")
-                for item in value:
-                    prompt_parts.append(f"- {item}")
+        for digest in digests:
+            prompt_parts.append(digest)
             prompt_parts.append("")
 
-    # Available citations
-    if citations:
-        prompt_parts.append("---")
-        prompt_parts.append("## Available Citations")
-        prompt_parts.append("Use [N] format to cite these sources inline:")
-        prompt_parts.append("")
-        for c in citations:
-            cid = c.get("id", "?")
-            title = c.get("title", "Unknown")
-            subject = c.get("subject", "")
-            prompt_parts.append(f"[{cid}] {title} — {subject}")
+    # QA failures of a previous draft (set by ``irf report repair``)
+    if section.get("revision_notes"):
+        prompt_parts.append("**Revision Required:**")
+        prompt_parts.append("A previous draft of this section failed quality review. Fix every issue below:")
+        for note in section["revision_notes"]:
+            prompt_parts.append(f"- {note}")
         prompt_parts.append("")
 
     # Final instruction
     prompt_parts.extend([
-        "---",
-        "",
         f"Write Section {section['id']}: {section_name}.",
         f"Target {word_min}–{word_max} words.",
         "Use markdown formatting with appropriate headers (## and ###).",
@@ -174,6 +256,123 @@ def build_section_prompt(
     return "\n".join(prompt_parts)
 
 
+def build_section_digest(result: dict, max_words: int = 120) -> str:
+    """Condense a generated section into a short digest for dependent prompts.
+
+    Keeps the first sentence of each paragraph (with its [N] citations) until
+    ``max_words`` is reached; headers and tables are dropped.
+    """
+    sentences = []
+    words = 0
+    for paragraph in re.split(r"\n\s*\n", result.get("content", "")):
+        text = " ".join(
+            line.strip() for line in paragraph.splitlines()
+            if line.strip() and not line.lstrip().startswith(("#", "|"))
+        )
+        text = text.lstrip("-* ").strip()
+        if not text:
+            continue
+        first = re.split(r"(?<=[.!?])\s+(?=[A-Z])", text, maxsplit=1)[0]
+        count = len(first.split())
+        if words and words + count > max_words:
+            break
+        sentences.append(first)
+        words += count
+    name = result.get("name", f"Section {result.get('section_id', '?')}")
+    lines = [f"### Section {result.get('section_id', '?')}: {name}"]
+    lines.extend(f"- {sentence}" for sentence in sentences)
+    return "\n".join(lines)
+
+
+SECTION_START = "<<<SECTION {id}>>>"
+SECTION_END = "<<<END SECTION {id}>>>"
+_SECTION_BLOCK_RE = re.compile(
+    r"^<<<SECTION (\d+)>>>[ \t]*\n(.*?)^<<<END SECTION \1>>>[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def build_multi_section_instructions(section_instructions: dict[int, str], intro: str = "") -> str:
+    """Combine per-section instructions into one multi-section request.
+
+    The model must wrap each section in ``SECTION_START``/``SECTION_END``
+    delimiter lines so ``split_multi_section_response`` can separate them.
+    """
+    ids = list(section_instructions)
+    prompt_parts = []
+    if intro:
+        prompt_parts.extend([intro, ""])
+    prompt_parts.extend([
+        f"Write the following {len(ids)} sections in order, in a single response.",
+        "Wrap each section in delimiter lines exactly as shown, with nothing before, "
+        "between or after the delimited blocks:",
+        "",
+        SECTION_START.format(id=ids[0]),
+        f"(markdown for section {ids[0]})",
+        SECTION_END.format(id=ids[0]),
+        "",
+    ])
+    for instructions in section_instructions.values():
+        prompt_parts.extend([instructions, ""])
+    prompt_parts.append(
+        "Delimiters: " + ", ".join(
+            f"{SECTION_START.format(id=sid)} ... {SECTION_END.format(id=sid)}" for sid in ids
+        )
+    )
+    return "\n".join(prompt_parts)
+
+
+def split_multi_section_response(
+    text: str,
+    section_ids: list[int],
+    strict: bool = True,
+) -> dict[int, str]:
+    """Split a multi-section response into ``{section_id: markdown}``.
+
+    Raises ValueError unless every requested section appears exactly once,
+    non-empty, and no other section is present. With ``strict=False`` the
+    well-formed requested sections are returned and the rest are skipped.
+    """
+    found: dict[int, str] = {}
+    for match in _SECTION_BLOCK_RE.finditer(text):
+        section_id, content = int(match.group(1)), match.group(2).strip()
+        if section_id in found and strict:
+            raise ValueError(f"Section {section_id} appears more than once")
+        found.setdefault(section_id, content)
+    if not strict:
+        return {sid: found[sid] for sid in section_ids if found.get(sid)}
+    unexpected = sorted(set(found) - set(section_ids))
+    if unexpected:
+        raise ValueError(f"Unexpected sections in response: {unexpected}")
+    missing = [sid for sid in section_ids if not found.get(sid)]
+    if missing:
+        raise ValueError(f"Missing or empty sections in response: {missing}")
+    return {sid: found[sid] for sid in section_ids}
+
+
+def build_request_payload(
+    shared_context: str,
+    instructions: str,
+    prompt_caching: bool = True,
+) -> tuple[str | list[dict], list[dict]]:
+    """Build ``(system, messages)`` API arguments for a section prompt.
+
+    With prompt caching on, the system prompt and shared context form a
+    prefix ending in a ``cache_control`` breakpoint, so later sections of the
+    same report read it from the cache instead of reprocessing it.
+    """
+    if not prompt_caching:
+        return SYSTEM_PROMPT, [
+            {"role": "user", "content": f"{shared_context}\n\n{instructions}"},
+        ]
+    system = [{"type": "text", "text": SYSTEM_PROMPT}]
+    content = [
+        {"type": "text", "text": shared_context, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": instructions},
+    ]
+    return system, [{"role": "user", "content": content}]
+
+
 def _fmt(val) -> str:
     if val is None:
         return "Not available"
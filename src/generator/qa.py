@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import re
 
+from src.generator.assembler import is_quick_report
 from src.research.citations import validate_citations
+from src.tracing import traced
 
 
 HYPE_WORDS = [
@@ -17,7 +19,24 @@ FIRST_PERSON_PATTERNS = [
     r"\bI\b", r"\bwe\b", r"\bour\b", r"\bmy\b", r"\bus\b",
 ]
 
+# Report-wide targets; quick-mode reports (``irf report generate --quick``)
+# are checked against the compact targets
+QA_TARGETS = {
+    "full": {"words": (8000, 10000), "tables": (2, 10), "citations": (25, 40), "metrics": 10},
+    "quick": {"words": (2000, 3000), "tables": (1, 6), "citations": (8, 20), "metrics": 5},
+}
 
+# Revision instructions for section-level checks, used by ``irf report repair``
+REPAIR_HINTS = {
+    "financial_table": "Include a markdown table of the key financial metrics (revenue, margins, EPS, FCF).",
+    "peer_comparison_table": "Include a markdown peer comparison table of valuation multiples and growth.",
+    "risk_probability_impact": "Assess every risk with an explicit probability and impact rating, e.g. in a risk matrix table.",
+    "no_hype_language": "Replace hype words with measured, evidence-based wording.",
+    "no_first_person": "Rewrite in the third person; never use I, we, our, my or us.",
+}
+
+
+@traced
 def run_qa_checks(report: dict) -> dict:
     """Run all QA checks on a report.
 
@@ -25,6 +44,7 @@ def run_qa_checks(report: dict) -> dict:
     """
     sections = report.get("sections", [])
     citations = report.get("citations", [])
+    targets = QA_TARGETS["quick" if is_quick_report(report) else "full"]
 
     # Combine all section content
     full_content = "\n\n".join(
@@ -32,10 +52,10 @@ def run_qa_checks(report: dict) -> dict:
     )
 
     results = {
-        "structure": _check_structure(sections, report),
-        "citations": _check_citations(full_content, citations),
-        "content": _check_content(full_content, sections),
-        "tone": _check_tone(full_content),
+        "structure": _check_structure(sections, report, targets),
+        "citations": _check_citations(full_content, citations, targets),
+        "content": _check_content(full_content, sections, targets),
+        "tone": _check_tone(sections),
         "overall_pass": True,
         "warnings": [],
         "errors": [],
@@ -58,7 +78,7 @@ def run_qa_checks(report: dict) -> dict:
     return results
 
 
-def _check_structure(sections: list[dict], report: dict) -> dict:
+def _check_structure(sections: list[dict], report: dict, targets: dict = QA_TARGETS["full"]) -> dict:
     """Check structural requirements."""
     checks = {}
 
@@ -70,26 +90,37 @@ def _check_structure(sections: list[dict], report: dict) -> dict:
         "pass": len(missing) == 0,
         "message": f"Missing sections: {sorted(missing)}" if missing else "All 11 sections present",
         "level": "error",
+        "sections": sorted(missing),
     }
 
     # Section word counts in range
     word_issues = []
+    not_generated = []
+    timed_out = []
     for s in sections:
         wc = s.get("word_count", 0)
         sid = s.get("section_id", "?")
-        if s.get("status") != "generated":
+        if s.get("status") == "timeout":
+            word_issues.append(f"Section {sid}: timed out")
+            not_generated.append(sid)
+            timed_out.append(sid)
+        elif s.get("status") != "generated":
             word_issues.append(f"Section {sid}: not generated")
+            not_generated.append(sid)
     checks["section_generation_status"] = {
         "pass": len(word_issues) == 0,
         "message": "; ".join(word_issues) if word_issues else "All sections generated",
         "level": "error" if word_issues else "info",
+        "sections": not_generated,
+        "timed_out": timed_out,
     }
 
     # Total word count
     total = report.get("word_count", 0)
+    low, high = targets["words"]
     checks["total_word_count"] = {
-        "pass": 8000 <= total <= 10000,
-        "message": f"Total: {total:,} words (target: 8,000–10,000)",
+        "pass": low <= total <= high,
+        "message": f"Total: {total:,} words (target: {low:,}–{high:,})",
         "level": "warning",
         "value": total,
     }
@@ -99,9 +130,10 @@ def _check_structure(sections: list[dict], report: dict) -> dict:
     table_count = len(re.findall(r"^\|.+\|$", full_content, re.MULTILINE))
     # Rough estimate: count header rows as tables
     table_sections = table_count // 2  # header + separator = 1 table
+    low, high = targets["tables"]
     checks["tables_present"] = {
-        "pass": 2 <= table_sections <= 10,
-        "message": f"~{table_sections} tables found (target: 2–4 minimum)",
+        "pass": low <= table_sections <= high,
+        "message": f"~{table_sections} tables found (target: {low}–{high})",
         "level": "warning",
         "value": table_sections,
     }
@@ -109,15 +141,16 @@ def _check_structure(sections: list[dict], report: dict) -> dict:
     return checks
 
 
-def _check_citations(full_content: str, citations: list[dict]) -> dict:
+def _check_citations(full_content: str, citations: list[dict], targets: dict = QA_TARGETS["full"]) -> dict:
     """Check citation requirements."""
     validation = validate_citations(full_content, citations)
 
     checks = {}
 
+    low, high = targets["citations"]
     checks["total_count"] = {
-        "pass": 25 <= validation["total_citations"] <= 40,
-        "message": f"{validation['total_citations']} citations (target: 25–40)",
+        "pass": low <= validation["total_citations"] <= high,
+        "message": f"{validation['total_citations']} citations (target: {low}–{high})",
         "level": "warning",
         "value": validation["total_citations"],
     }
@@ -151,15 +184,15 @@ def _check_citations(full_content: str, citations: list[dict]) -> dict:
     return checks
 
 
-def _check_content(full_content: str, sections: list[dict]) -> dict:
+def _check_content(full_content: str, sections: list[dict], targets: dict = QA_TARGETS["full"]) -> dict:
     """Check content quality requirements."""
     checks = {}
 
     # Check for specific metrics (numbers, percentages, dollar amounts)
     numbers = re.findall(r"\$[\d,.]+[BMK]?|\d+\.?\d*%|\d{1,3}(?:,\d{3})+", full_content)
     checks["specific_metrics_present"] = {
-        "pass": len(numbers) >= 10,
-        "message": f"{len(numbers)} specific metrics found (target: 10+)",
+        "pass": len(numbers) >= targets["metrics"],
+        "message": f"{len(numbers)} specific metrics found (target: {targets['metrics']}+)",
         "level": "warning",
         "value": len(numbers),
     }
@@ -172,6 +205,7 @@ def _check_content(full_content: str, sections: list[dict]) -> dict:
             "pass": has_table,
             "message": "Peer table present" if has_table else "Missing peer comparison table",
             "level": "warning",
+            "sections": [9],
         }
 
     # Check for financial table (section 7)
@@ -182,6 +216,7 @@ def _check_content(full_content: str, sections: list[dict]) -> dict:
             "pass": has_table,
             "message": "Financial table present" if has_table else "Missing financial table",
             "level": "warning",
+            "sections": [7],
         }
 
     # Check for risk probability/impact (section 10)
@@ -199,21 +234,35 @@ def _check_content(full_content: str, sections: list[dict]) -> dict:
                 else "Missing probability/impact assessment"
             ),
             "level": "warning",
+            "sections": [10],
         }
 
     return checks
 
 
-def _check_tone(full_content: str) -> dict:
-    """Check tone and style requirements."""
+def _check_tone(sections: list[dict]) -> dict:
+    """Check tone and style requirements.
+
+    Each generated section is scanned once; the report-wide result is the
+    union of the per-section hits.
+    """
     checks = {}
+    hype_words: dict[str, None] = {}
+    hype_sections = []
+    first_person_sections = []
+    for section in sections:
+        if section.get("status") != "generated":
+            continue
+        content = section.get("content", "")
+        found = _find_hype(content)
+        if found:
+            hype_words.update(dict.fromkeys(found))
+            hype_sections.append(section["section_id"])
+        if _has_first_person(content):
+            first_person_sections.append(section["section_id"])
 
     # No hype language
-    found_hype = []
-    content_lower = full_content.lower()
-    for word in HYPE_WORDS:
-        if word in content_lower:
-            found_hype.append(word)
+    found_hype = [word for word in HYPE_WORDS if word in hype_words]
     checks["no_hype_language"] = {
         "pass": len(found_hype) == 0,
         "message": (
@@ -222,20 +271,11 @@ def _check_tone(full_content: str) -> dict:
             else "No hype language detected"
         ),
         "level": "warning",
+        "sections": hype_sections,
     }
 
     # No first person
-    found_first_person = False
-    for pattern in FIRST_PERSON_PATTERNS:
-        # Check with word boundaries, case-insensitive for "we", "our", etc.
-        # but case-sensitive for "I" to avoid false positives
-        if pattern == r"\bI\b":
-            if re.search(pattern, full_content):
-                found_first_person = True
-                break
-        elif re.search(pattern, full_content, re.IGNORECASE):
-            found_first_person = True
-            break
+    found_first_person = bool(first_person_sections)
     checks["no_first_person"] = {
         "pass": not found_first_person,
         "message": (
@@ -244,11 +284,48 @@ def _check_tone(full_content: str) -> dict:
             else "No first person language"
         ),
         "level": "warning",
+        "sections": first_person_sections,
     }
 
     return checks
 
 
+def _find_hype(content: str) -> list[str]:
+    content_lower = content.lower()
+    return [word for word in HYPE_WORDS if word in content_lower]
+
+
+# "I" is matched case-sensitively to avoid false positives; the other
+# first-person words in any case
+_FIRST_PERSON_RE = re.compile(
+    "|".join(p if p == r"\bI\b" else f"(?i:{p})" for p in FIRST_PERSON_PATTERNS)
+)
+
+
+def _has_first_person(content: str) -> bool:
+    return _FIRST_PERSON_RE.search(content) is not None
+
+
+def failed_sections(qa_results: dict) -> dict[int, list[str]]:
+    """Map failed section-level checks to the sections that caused them.
+
+    Returns ``{section_id: [revision note, ...]}``. Sections that are missing
+    or failed to generate map to an empty list (they only need generating);
+    report-wide checks such as total word count are not attributable to a
+    section and are left out.
+    """
+    repairs: dict[int, list[str]] = {}
+    for category in ("structure", "content", "tone"):
+        for check_name, result in (qa_results.get(category) or {}).items():
+            if not isinstance(result, dict) or result.get("pass", True):
+                continue
+            for section_id in result.get("sections", []):
+                notes = repairs.setdefault(section_id, [])
+                if check_name in REPAIR_HINTS:
+                    notes.append(f"{result.get('message', 'Failed')}. {REPAIR_HINTS[check_name]}")
+    return dict(sorted(repairs.items()))
+
+
 def format_qa_report(qa_results: dict) -> str:
     """Format QA results as a human-readable report."""
     lines = ["## Quality Assurance Report", ""]
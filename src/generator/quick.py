@@ -0,0 +1,172 @@
+"""Quick mode - a compact 2-3K word analysis from a single API call.
+
+The whole report is requested at once from a condensed view of the
+framework (scaled-down word and citation targets, top required elements
+only), and the delimited response is split back into per-section results,
+so assembly, QA and export work exactly as for a full report.
+"""
+
+from __future__ import annotations
+
+import time
+
+from src.generator.prompts import (
+    SYSTEM_PROMPT,
+    build_multi_section_instructions,
+    build_request_payload,
+    build_shared_context,
+    split_multi_section_response,
+)
+from src.generator.ratelimit import DeadlineExceeded
+from src.generator.tokens import estimate_tokens, section_max_tokens
+from src.generator.writer import GenerationSession, _request_details, _section_result, _timed
+from src.tracing import traced
+
+QUICK_WORD_TARGET = {"min": 2000, "max": 3000}
+QUICK_CITATION_TARGET = {"min": 8, "max": 20}
+QUICK_ELEMENTS_PER_SECTION = 3
+
+
+def build_quick_framework(framework: dict) -> dict:
+    """Condensed framework view for quick mode.
+
+    Each section's word and citation targets are scaled so the report totals
+    match ``QUICK_WORD_TARGET`` / ``QUICK_CITATION_TARGET``, and only its
+    first few required elements are kept.
+    """
+    sections = framework.get("sections", [])
+
+    def _scaled(key: str, target: dict, floor: int, step: int) -> list[dict]:
+        totals = {
+            bound: sum(s.get(key, {}).get(bound, 0) for s in sections) or 1
+            for bound in ("min", "max")
+        }
+        return [
+            {
+                bound: max(floor, round(s.get(key, {}).get(bound, 0) * target[bound] / totals[bound] / step) * step)
+                for bound in ("min", "max")
+            }
+            for s in sections
+        ]
+
+    words = _scaled("word_count", QUICK_WORD_TARGET, 50, 10)
+    citations = _scaled("citation_target", QUICK_CITATION_TARGET, 0, 1)
+    quick_sections = []
+    for section, word_count, citation_target in zip(sections, words, citations):
+        quick = {
+            "id": section["id"],
+            "name": section.get("name", f"Section {section['id']}"),
+            "word_count": word_count,
+            "citation_target": citation_target,
+        }
+        if section.get("required_elements"):
+            quick["required_elements"] = section["required_elements"][:QUICK_ELEMENTS_PER_SECTION]
+        quick_sections.append(quick)
+    return {**framework, "sections": quick_sections, "mode": "quick"}
+
+
+def build_quick_instructions(quick_framework: dict) -> str:
+    """One compact instruction block per section, combined for a single call."""
+    blocks = {}
+    for section in quick_framework["sections"]:
+        wc = section["word_count"]
+        ct = section["citation_target"]
+        lines = [
+            f"# Section {section['id']}: {section['name']}",
+            f"**Word Count Target:** {wc['min']}–{wc['max']} words",
+            f"**Citation Target:** {ct['min']}–{ct['max']} inline citations [N]",
+        ]
+        if section.get("required_elements"):
+            lines.append("**Cover:** " + "; ".join(
+                elem.replace("_", " ").title() for elem in section["required_elements"]
+            ))
+        blocks[section["id"]] = "\n".join(lines)
+    intro = (
+        f"Write a compact screening report of {QUICK_WORD_TARGET['min']:,}–"
+        f"{QUICK_WORD_TARGET['max']:,} words in total. Keep every section tight: "
+        "lead with the conclusion, then the supporting figures. Start each section "
+        "with a '## Section N: Name' header, use markdown tables for financial data "
+        "and peer comparisons, and rate key risks by probability and impact."
+    )
+    return build_multi_section_instructions(blocks, intro)
+
+
+@traced
+def write_quick_report(
+    effective_framework: dict,
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    session: GenerationSession | None = None,
+) -> list[dict]:
+    """Generate a quick report with one API call.
+
+    Returns one result per framework section, each marked ``"mode": "quick"``.
+    Sections missing from the response are returned with status ``"error"``.
+    The call's usage, model and latency are recorded on the first result.
+    """
+    session = session or GenerationSession()
+    quick = build_quick_framework(effective_framework)
+    sections = quick["sections"]
+
+    def _results(contents: dict[int, str], error: str | None, status: str = "error") -> list[dict]:
+        results = []
+        for section in sections:
+            if section["id"] in contents:
+                result = _section_result(section, content=contents[section["id"]])
+            else:
+                result = _section_result(section, status=status, error=error or "Missing from quick response")
+            result["mode"] = "quick"
+            results.append(result)
+        return results
+
+    if session.missing_api_key:
+        return _results({}, "No API key configured. Run: irf config set api_key <your-key>")
+
+    shared = build_shared_context(company_profile, research_data, citations, quick)
+    instructions = build_quick_instructions(quick)
+    prompt = f"{shared}\n\n{instructions}"
+    reserved = {
+        "input": estimate_tokens(SYSTEM_PROMPT + prompt),
+        "output": section_max_tokens({"word_count": QUICK_WORD_TARGET}),
+    }
+    requested_at = time.perf_counter()
+    section_ids = [s["id"] for s in sections]
+    summary = {"status": "generated"}
+
+    cache_key, text = session.cache_lookup(prompt, 0, reserved["output"])
+    if text is not None:
+        summary["cached"] = True
+    else:
+        system, messages = build_request_payload(shared, instructions, session.prompt_caching)
+        request = {
+            "model": session.model,
+            "max_tokens": reserved["output"],
+            "system": system,
+            "messages": messages,
+        }
+        try:
+            response = session.call(lambda timeout: session.backend.complete(_timed(request, timeout)), reserved)
+        except DeadlineExceeded as e:
+            session.record({"status": "timeout"})
+            return _results({}, str(e), status="timeout")
+        except ImportError:
+            session.record({"status": "error"})
+            return _results({}, "anthropic package not installed. Run: pip install anthropic")
+        except Exception as e:
+            session.record({"status": "error"})
+            return _results({}, str(e))
+        text = response["text"]
+        summary["usage"] = response["usage"]
+
+    contents = split_multi_section_response(text, section_ids, strict=False)
+    results = _results(contents, None)
+    if len(contents) == len(section_ids):
+        session.cache_store(cache_key, {"status": "generated", "content": text, "section_id": 0})
+    else:
+        summary["status"] = "error"
+
+    results[0].update(_request_details(session, reserved, requested_at))
+    results[0].update({k: v for k, v in summary.items() if k in ("usage", "cached")})
+    session.record(summary)
+    return results
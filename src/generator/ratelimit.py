@@ -0,0 +1,386 @@
+"""Process-wide API rate limiting and retry with backoff.
+
+One ``RateLimiter`` per model is shared by every worker in the process
+(sections and tickers alike), enforcing requests-per-minute and input/output
+tokens-per-minute budgets with token buckets. ``call_with_retry`` retries
+throttled and transient failures with jittered exponential backoff, honoring
+``Retry-After`` and pausing the shared limiter so all workers back off. Every
+attempt's token reservation is settled: failed attempts return it, and
+successful ones are reconciled with the reported usage. Limiter waits,
+retries and backoffs all stop at an optional deadline or when a cancel event
+is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from src.config import get_config_table
+from src.tracing import span
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS = {429, 529}
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError")
+
+DEFAULT_LIMITS = {"rpm": 1000, "input_tpm": 450000, "output_tpm": 90000}
+
+# How often an async limiter wait checks its cancel event
+CANCEL_POLL_SECONDS = 0.1
+
+
+class DeadlineExceeded(Exception):
+    """A call ran out of time (or was cancelled) before it could complete."""
+
+
+class TokenBucket:
+    """A per-minute budget that refills continuously.
+
+    Reservations may overdraw the bucket; the returned wait is how long the
+    caller must sleep before the overdraft is paid back.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Requests/input-tokens/output-tokens per minute limiter with counters."""
+
+    def __init__(
+        self,
+        rpm: float | None = None,
+        input_tpm: float | None = None,
+        output_tpm: float | None = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        now = clock()
+        self._buckets = {
+            name: TokenBucket(limit, now)
+            for name, limit in (("requests", rpm), ("input", input_tpm), ("output", output_tpm))
+            if limit
+        }
+        self._paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "throttled_seconds": 0.0,
+            "retries": 0,
+            "rate_limited": 0,
+            "backoff_seconds": 0.0,
+        }
+
+    def reserve(self, input_tokens: int = 0, output_tokens: int = 0) -> float:
+        """Reserve budget for one request. Returns the seconds to wait first."""
+        amounts = {"requests": 1, "input": input_tokens, "output": output_tokens}
+        with self._lock:
+            now = self._clock()
+            waits = [
+                bucket.reserve(amounts[name], now) for name, bucket in self._buckets.items()
+            ]
+            wait = max(waits + [self._paused_until - now, 0.0])
+            self.stats["requests"] += 1
+            self.stats["throttled_seconds"] += wait
+        return wait
+
+    def acquire(
+        self,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> None:
+        """Block until a request of the given size may be sent.
+
+        Raises ``DeadlineExceeded``, returning the reservation, if the wait
+        would run past ``deadline`` or ``cancel`` is set during it.
+        """
+        wait = self.reserve(input_tokens, output_tokens)
+        if wait <= 0:
+            return
+        self._check_wait(wait, input_tokens, output_tokens, deadline, cancel)
+        if cancel is not None:
+            cancel.wait(wait)
+        else:
+            self._sleep(wait)
+        self._check_wait(0.0, input_tokens, output_tokens, deadline, cancel)
+
+    async def acquire_async(
+        self,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> None:
+        """Async variant of ``acquire``."""
+        wait = self.reserve(input_tokens, output_tokens)
+        if wait <= 0:
+            return
+        self._check_wait(wait, input_tokens, output_tokens, deadline, cancel)
+        until = time.monotonic() + wait
+        # The cancel event is a threading.Event, so poll it between short sleeps
+        while (left := until - time.monotonic()) > 0:
+            await asyncio.sleep(min(left, CANCEL_POLL_SECONDS) if cancel is not None else left)
+            self._check_wait(0.0, input_tokens, output_tokens, deadline, cancel)
+
+    def _check_wait(self, wait, input_tokens, output_tokens, deadline, cancel) -> None:
+        try:
+            _check_deadline(deadline, cancel, wait)
+        except DeadlineExceeded:
+            self.refund(input_tokens, output_tokens, request=True)
+            raise
+
+    def refund(self, input_tokens: int = 0, output_tokens: int = 0, request: bool = False) -> None:
+        """Return a reservation that was not used.
+
+        A failed attempt returns its tokens; a request that was never sent
+        also returns its slot in the requests bucket (``request=True``).
+        """
+        amounts = {"requests": 1 if request else 0, "input": input_tokens, "output": output_tokens}
+        with self._lock:
+            now = self._clock()
+            for name, bucket in self._buckets.items():
+                if amounts[name]:
+                    bucket.refund(amounts[name], now)
+
+    def settle(self, reserved: dict, actual: dict) -> None:
+        """Reconcile reserved token estimates with actual usage.
+
+        Both dicts map ``"input"``/``"output"`` to token counts. Unused
+        reservations are returned; overruns are charged without waiting.
+        """
+        with self._lock:
+            now = self._clock()
+            for name in ("input", "output"):
+                bucket = self._buckets.get(name)
+                if bucket is None or name not in actual:
+                    continue
+                delta = reserved.get(name, 0) - actual[name]
+                if delta > 0:
+                    bucket.refund(delta, now)
+                elif delta < 0:
+                    bucket.reserve(-delta, now)
+
+    def record_retry(self, delay: float, throttled: bool, retry_after: float | None) -> None:
+        """Count a retry; server-requested waits pause every worker."""
+        with self._lock:
+            self.stats["retries"] += 1
+            self.stats["backoff_seconds"] += delay
+            if throttled:
+                self.stats["rate_limited"] += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(model: str, config: dict) -> RateLimiter:
+    """Return the process-wide limiter for ``model``, creating it on first use.
+
+    Limits come from ``config["rate_limits"][model]``, falling back to the
+    ``"default"`` entry and then to ``DEFAULT_LIMITS``. Raises ``ValueError``
+    if ``rate_limits`` is malformed.
+    """
+    with _LIMITERS_LOCK:
+        if model not in _LIMITERS:
+            table = get_config_table(config, "rate_limits")
+            limits = {**DEFAULT_LIMITS, **table.get("default", {}), **table.get(model, {})}
+            _LIMITERS[model] = RateLimiter(
+                rpm=limits.get("rpm"),
+                input_tpm=limits.get("input_tpm"),
+                output_tpm=limits.get("output_tpm"),
+            )
+        return _LIMITERS[model]
+
+
+def reset_rate_limiters() -> None:
+    """Forget all shared limiters (used when config changes and in tests)."""
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Whether an API error is worth retrying."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Parse ``retry-after-ms`` / ``retry-after`` headers from an API error."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if value := headers.get("retry-after-ms"):
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(
+    exc: Exception,
+    attempt: int,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+) -> tuple[float, float | None]:
+    """Return ``(delay, retry_after)`` for a failed attempt (0-based).
+
+    Uses full-jitter exponential backoff, but never less than the server's
+    ``Retry-After``.
+    """
+    retry_after = retry_after_seconds(exc)
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+    if retry_after is not None:
+        delay = min(max_delay, retry_after) + random.uniform(0, base_delay)
+    return delay, retry_after
+
+
+def remaining_seconds(deadline: float | None) -> float | None:
+    """Seconds left until a ``time.monotonic()`` deadline (None if unbounded)."""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _check_deadline(deadline: float | None, cancel: threading.Event | None, delay: float = 0.0) -> None:
+    if cancel is not None and cancel.is_set():
+        raise DeadlineExceeded("Cancelled at the report deadline")
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise DeadlineExceeded("Timed out before the request completed")
+
+
+def call_with_retry(
+    fn,
+    limiter: RateLimiter | None = None,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    sleep=time.sleep,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+    usage=None,
+):
+    """Call ``fn()`` under the limiter, retrying retryable API errors.
+
+    With a ``deadline`` (a ``time.monotonic()`` value) or a ``cancel`` event,
+    ``DeadlineExceeded`` is raised instead of starting an attempt, a limiter
+    wait or a backoff that cannot finish in time, and in place of the error
+    of an attempt that ran past it.
+
+    Each failed attempt returns its token reservation to the limiter before
+    any retry. With ``usage``, a callable mapping the response to the tokens
+    actually used (``{"input": n, "output": m}``), the successful attempt's
+    reservation is settled against it.
+    """
+    attempt = 0
+    while True:
+        _check_deadline(deadline, cancel)
+        if limiter is not None:
+            with span("ratelimit.acquire", "api"):
+                limiter.acquire(input_tokens, output_tokens, deadline, cancel)
+        try:
+            with span("api.request", "api", attempt=attempt):
+                response = fn()
+        except BaseException as e:
+            if limiter is not None:
+                limiter.refund(input_tokens, output_tokens)
+            if not isinstance(e, Exception):
+                raise
+            _check_deadline(deadline, cancel)
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay, retry_after = backoff_delay(e, attempt, base_delay, max_delay)
+            _check_deadline(deadline, cancel, delay)
+            if limiter is not None:
+                limiter.record_retry(delay, getattr(e, "status_code", None) in THROTTLE_STATUS, retry_after)
+            with span("api.backoff", "api", attempt=attempt):
+                sleep(delay)
+            attempt += 1
+        else:
+            _settle(limiter, input_tokens, output_tokens, usage, response)
+            return response
+
+
+def _settle(limiter: RateLimiter | None, input_tokens: int, output_tokens: int, usage, response) -> None:
+    if limiter is not None and usage is not None:
+        limiter.settle({"input": input_tokens, "output": output_tokens}, usage(response))
+
+
+async def acall_with_retry(
+    fn,
+    limiter: RateLimiter | None = None,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    deadline: float | None = None,
+    cancel: threading.Event | None = None,
+    usage=None,
+):
+    """Async variant of ``call_with_retry``; ``fn`` returns an awaitable."""
+    attempt = 0
+    while True:
+        _check_deadline(deadline, cancel)
+        if limiter is not None:
+            with span("ratelimit.acquire", "api"):
+                await limiter.acquire_async(input_tokens, output_tokens, deadline, cancel)
+        try:
+            with span("api.request", "api", attempt=attempt):
+                response = await fn()
+        except BaseException as e:
+            if limiter is not None:
+                limiter.refund(input_tokens, output_tokens)
+            if not isinstance(e, Exception):
+                raise
+            _check_deadline(deadline, cancel)
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay, retry_after = backoff_delay(e, attempt, base_delay, max_delay)
+            _check_deadline(deadline, cancel, delay)
+            if limiter is not None:
+                limiter.record_retry(delay, getattr(e, "status_code", None) in THROTTLE_STATUS, retry_after)
+            with span("api.backoff", "api", attempt=attempt):
+                await asyncio.sleep(delay)
+            attempt += 1
+        else:
+            _settle(limiter, input_tokens, output_tokens, usage, response)
+            return response
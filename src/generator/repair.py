@@ -0,0 +1,72 @@
+"""Targeted report repair - regenerate only the sections that failed QA."""
+
+from __future__ import annotations
+
+from src.generator.assembler import assemble_report, is_quick_report
+from src.generator.qa import failed_sections, run_qa_checks
+from src.generator.quick import build_quick_framework
+
+
+def plan_repair(
+    report: dict,
+    framework: dict,
+    qa_results: dict | None = None,
+    only: set[int] | None = None,
+) -> list[dict]:
+    """Return the framework sections to regenerate for a report.
+
+    Each returned section carries ``revision_notes`` with the QA failures to
+    fix, which ``build_section_instructions`` appends to its prompt. Uses the
+    report's stored ``qa_results`` unless ``qa_results`` is given; ``only``
+    restricts the plan to those section IDs. Sections of a quick-mode report
+    keep their condensed quick targets.
+    """
+    qa_results = qa_results or report.get("qa_results") or run_qa_checks(report)
+    repairs = failed_sections(qa_results)
+    if is_quick_report(report):
+        framework = build_quick_framework(framework)
+    return [
+        {**section, "revision_notes": repairs[section["id"]]}
+        for section in framework.get("sections", [])
+        if section["id"] in repairs and (not only or section["id"] in only)
+    ]
+
+
+def apply_repair(
+    report: dict,
+    results: list[dict],
+    company_profile: dict,
+    framework: dict,
+) -> tuple[dict, list[dict]]:
+    """Merge regenerated sections into a report and re-run QA.
+
+    Successful results replace the stored sections; failed ones leave the
+    previous version in place. Returns ``(repaired report, failed results)``.
+    """
+    by_id = {s["section_id"]: s for s in report.get("sections", [])}
+    quick = is_quick_report(report)
+    failed = []
+    for result in results:
+        if quick:
+            result["mode"] = "quick"
+        if result.get("status") == "generated":
+            by_id[result["section_id"]] = result
+        else:
+            failed.append(result)
+
+    order = [s["id"] for s in framework.get("sections", [])]
+    sections = [by_id[sid] for sid in order if sid in by_id]
+    sections += [s for sid, s in by_id.items() if sid not in order]
+
+    repaired = assemble_report(
+        sections=sections,
+        company_profile=company_profile,
+        framework=framework,
+        citations=report.get("citations"),
+        report_id=report["id"],
+    )
+    for key in ("report_date", "reference_quarter"):
+        repaired[key] = report.get(key) or repaired[key]
+    repaired["output_paths"] = report.get("output_paths") or {}
+    repaired["qa_results"] = run_qa_checks(repaired)
+    return repaired, failed
@@ -0,0 +1,265 @@
+"""Global section scheduler for generating one or many reports.
+
+Every (ticker, section) pair becomes a job in one work queue served by a
+single thread pool, so a multi-ticker run keeps ``concurrency`` requests in
+flight instead of generating companies one after another. Higher-priority
+tickers are dispatched first; within a priority tickers are served in
+order, each capped at ``per_ticker`` sections in flight so a later ticker
+is never starved by an earlier one. A section with ``depends_on`` is held
+back until those sections of the same ticker have finished, and receives
+their results for its prompt. Groups of short sections listed in the
+``section_packs`` config are dispatched as one request (one work unit) when
+all of them are pending and none depends on another.
+
+With a report deadline, sections still queued when it passes are not
+started and in-flight calls are cancelled cooperatively (their request
+timeouts never run past the deadline); both come back with status
+``"timeout"`` while finished sections are kept.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.frameworks.validator import find_dependency_cycle
+from src.generator import writer
+
+# Seconds to wait past the report deadline for in-flight calls to return
+# before their sections are marked as timed out and abandoned
+DEADLINE_GRACE = 5.0
+
+
+class _TickerState:
+    """Queue and bookkeeping for one ticker's sections."""
+
+    def __init__(self, order: int, job: dict, warm_up: bool, packs: list[list[int]] | None = None):
+        self.order = order
+        self.job = job
+        self.ticker = job["ticker"]
+        self.priority = int(job.get("priority", 0))
+        self.sections = list(job.get("sections", job["framework"].get("sections", [])))
+        self.section_ids = {s["id"] for s in self.sections}
+        # Work units: a single section, or a pack requested in one call
+        self.pending = _build_units(self.sections, packs or [])
+        self.completed = {r["section_id"]: r for r in job.get("completed", [])}
+        self.results: dict[int, dict] = {}
+        self.in_flight = 0
+        # With prompt caching, the first unit runs alone so the ticker's
+        # shared prefix is cached before its remaining sections fan out.
+        self.warming = warm_up and len(self.pending) > 1
+
+    def next_ready(self) -> list[dict] | None:
+        """First pending unit whose dependencies have all finished."""
+        for unit in self.pending:
+            ids = {s["id"] for s in unit}
+            deps = {d for s in unit for d in s.get("depends_on", [])} - ids
+            if all(d in self.results or d not in self.section_ids for d in deps):
+                return unit
+        return None
+
+    def dependency_results(self, unit: list[dict]) -> list[dict]:
+        """Successfully generated results of the unit's dependencies."""
+        finished = {**self.completed, **self.results}
+        deps = dict.fromkeys(d for s in unit for d in s.get("depends_on", []))
+        return [
+            finished[d] for d in deps
+            if d in finished and finished[d].get("status") == "generated"
+        ]
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and not self.in_flight
+
+    def ordered_results(self) -> list[dict]:
+        return [self.results[s["id"]] for s in self.sections]
+
+
+def _build_units(sections: list[dict], packs: list[list[int]]) -> list[list[dict]]:
+    """Split sections into work units in framework order.
+
+    A pack becomes one unit only if all of its sections are present, none is
+    already in an earlier pack and none depends on another member.
+    """
+    by_id = {s["id"]: s for s in sections}
+    pack_of: dict[int, list[dict]] = {}
+    for group in packs:
+        members = [by_id[sid] for sid in dict.fromkeys(group) if sid in by_id]
+        ids = {s["id"] for s in members}
+        if (
+            len(members) < 2 or len(members) != len(set(group))
+            or ids & set(pack_of)
+            or any(d in ids for s in members for d in s.get("depends_on", []))
+        ):
+            continue
+        for sid in ids:
+            pack_of[sid] = members
+
+    units = []
+    for section in sections:
+        unit = pack_of.get(section["id"], [section])
+        if unit[0] is section:
+            units.append(unit)
+    return units
+
+
+def generate_many(
+    jobs: list[dict],
+    session: writer.GenerationSession,
+    concurrency: int | None = None,
+    per_ticker: int | None = None,
+    progress_callback=None,
+    on_ticker_done=None,
+    on_delta=None,
+    deadline: float | None = None,
+) -> dict[str, list[dict]]:
+    """Generate the sections of several reports from one global queue.
+
+    Each job is a dict with ``ticker``, ``profile`` and ``framework`` (the
+    full effective framework, which every prompt outlines), plus optional
+    ``sections`` (the ones to generate; default: all of the framework's),
+    ``priority`` (higher runs first), ``research_data``, ``citations`` and
+    ``completed`` (results from an earlier run that dependent sections may
+    draw on).
+
+    Args:
+        jobs: Reports to generate.
+        session: Shared generation session.
+        concurrency: Global cap on sections in flight (default: config).
+        per_ticker: Cap on one ticker's sections in flight (default: half
+            the global cap when there are several tickers).
+        progress_callback: Optional callable(ticker, section_id, status,
+            result); status is ``"generating"`` when a section is dispatched.
+        on_ticker_done: Optional callable(ticker, results), called as soon as
+            all of a ticker's sections are finished.
+        on_delta: Optional callable(ticker, section_id, text); when given,
+            sections are streamed and this receives each text delta.
+        deadline: Seconds allowed for the whole run (default: config
+            ``report_deadline``; 0 or None for no deadline).
+
+    ``progress_callback`` and ``on_ticker_done`` always run in the calling
+    thread; ``on_delta`` runs on the worker threads.
+
+    Returns:
+        ``{ticker: [section result, ...]}`` with sections in framework order.
+    """
+    if concurrency is None:
+        concurrency = session.concurrency
+    concurrency = max(1, concurrency)
+    if per_ticker is None:
+        per_ticker = concurrency if len(jobs) == 1 else -(-concurrency // 2)
+    per_ticker = max(1, min(per_ticker, concurrency))
+    warm_up = session.prompt_caching and concurrency > 1
+    packs = session.section_packs
+    if deadline is None:
+        deadline = session.report_deadline
+    session.cancelled.clear()
+    session.deadline = time.monotonic() + deadline if deadline else None
+
+    states = [_TickerState(i, job, warm_up, packs) for i, job in enumerate(jobs)]
+    for state in states:
+        cycle = find_dependency_cycle(state.sections)
+        if cycle:
+            raise ValueError(f"Section dependency cycle for {state.ticker}: sections {cycle}")
+    for state in states:
+        if state.finished and on_ticker_done:
+            on_ticker_done(state.ticker, [])
+
+    def _next_state() -> _TickerState | None:
+        ready = [
+            s for s in states
+            if s.in_flight < per_ticker and not (s.warming and s.in_flight)
+            and s.next_ready() is not None
+        ]
+        return min(ready, key=lambda s: (-s.priority, s.order), default=None)
+
+    def _generate(state: _TickerState, unit: list[dict], dependencies: list[dict]) -> list[dict]:
+        job = state.job
+        delta = None
+        if on_delta:
+            def delta(section_id, text):
+                on_delta(state.ticker, section_id, text)
+        kwargs = {
+            "company_profile": job["profile"],
+            "research_data": job.get("research_data"),
+            "citations": job.get("citations"),
+            "framework": job["framework"],
+            "session": session,
+            "dependencies": dependencies,
+            "on_delta": delta,
+        }
+        try:
+            if len(unit) > 1:
+                return writer.write_section_pack(sections=unit, **kwargs)
+            return [writer.write_section(section=unit[0], **kwargs)]
+        except Exception as e:
+            return [writer._section_result(section, status="error", error=str(e)) for section in unit]
+
+    def _finish(state: _TickerState, results: list[dict]) -> None:
+        state.warming = False
+        for result in results:
+            state.results[result["section_id"]] = result
+            if progress_callback:
+                progress_callback(state.ticker, result["section_id"], result["status"], result)
+        if state.finished and on_ticker_done:
+            on_ticker_done(state.ticker, state.ordered_results())
+
+    def _timed_out(unit: list[dict], error: str) -> list[dict]:
+        return [writer._section_result(section, status="timeout", error=error) for section in unit]
+
+    def _expire_pending() -> None:
+        session.cancel()
+        for state in states:
+            while state.pending:
+                unit = state.pending.pop(0)
+                _finish(state, _timed_out(unit, "Not started before the report deadline"))
+
+    def _wait_timeout() -> float | None:
+        if session.deadline is None:
+            return None
+        wait_until = session.deadline + (DEADLINE_GRACE if session.cancelled.is_set() else 0.0)
+        return max(0.0, wait_until - time.monotonic())
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    futures = {}
+    try:
+        while True:
+            expired = session.deadline is not None and time.monotonic() >= session.deadline
+            if expired and not session.cancelled.is_set():
+                _expire_pending()
+            while len(futures) < concurrency and (state := _next_state()) is not None:
+                unit = state.next_ready()
+                state.pending.remove(unit)
+                state.in_flight += 1
+                if progress_callback:
+                    for section in unit:
+                        progress_callback(state.ticker, section["id"], "generating", None)
+                dependencies = state.dependency_results(unit)
+                futures[pool.submit(_generate, state, unit, dependencies)] = (state, unit)
+            if not futures:
+                break
+
+            done, _ = wait(futures, timeout=_wait_timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                state, unit = futures.pop(future)
+                state.in_flight -= 1
+                _finish(state, future.result())
+            if not done and session.cancelled.is_set():
+                # Calls still running after the grace period ignored their timeout
+                for future, (state, unit) in list(futures.items()):
+                    future.cancel()
+                    del futures[future]
+                    state.in_flight -= 1
+                    _finish(state, _timed_out(unit, "Cancelled at the report deadline"))
+    except BaseException:
+        # Ctrl-C or a failing callback: drop queued sections instead of
+        # waiting for them, and stop in-flight calls so their threads exit;
+        # already-completed ones were reported above.
+        session.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        session.deadline = None
+    pool.shutdown(wait=not session.cancelled.is_set())
+
+    return {state.ticker: state.ordered_results() for state in states}
@@ -0,0 +1,124 @@
+"""Token accounting: offline estimates, per-section output budgets and cost.
+
+Estimates are heuristic (no tokenizer round-trip) and only used for rate
+limiting and budgeting; actual usage comes from the API response and is
+persisted per section call in the ``generation_usage`` table.
+"""
+
+from __future__ import annotations
+
+import math
+
+from src.config import DEFAULT_CONFIG, get_config_table
+
+# English prose with numbers and markdown averages about 3.5 characters and
+# 1.35 tokens per word; output budgets get headroom for headers and tables.
+CHARS_PER_TOKEN = 3.5
+TOKENS_PER_WORD = 1.35
+OUTPUT_HEADROOM = 1.3
+OUTPUT_OVERHEAD_TOKENS = 200
+MIN_OUTPUT_TOKENS = 512
+
+USAGE_TOTAL_FIELDS = (
+    "calls",
+    "cached_calls",
+    "estimated_input_tokens",
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+    "latency_seconds",
+    "cost",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` without calling the API."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def section_max_tokens(section: dict, cap: int | None = None) -> int:
+    """Derive a section's ``max_tokens`` from its ``word_count.max``.
+
+    ``cap`` (the configured ``max_tokens_per_section``) is an upper bound;
+    sections without a word target get the cap.
+    """
+    max_words = section.get("word_count", {}).get("max")
+    if not max_words:
+        return cap or DEFAULT_CONFIG["max_tokens_per_section"]
+    budget = int(max_words * TOKENS_PER_WORD * OUTPUT_HEADROOM) + OUTPUT_OVERHEAD_TOKENS
+    budget = max(budget, MIN_OUTPUT_TOKENS)
+    return min(budget, cap) if cap else budget
+
+
+def model_pricing(model: str, config: dict) -> dict:
+    """USD per million tokens for ``model`` (falls back to ``"default"``)."""
+    table = get_config_table(config, "pricing") or DEFAULT_CONFIG["pricing"]
+    return {**DEFAULT_CONFIG["pricing"]["default"], **table.get("default", {}), **table.get(model, {})}
+
+
+def usage_cost(usage: dict, model: str, config: dict) -> float:
+    """USD cost of one call's usage.
+
+    ``input_tokens`` excludes cached tokens, which are billed separately at
+    the cache read/write rates.
+    """
+    price = model_pricing(model, config)
+    return (
+        (usage.get("input_tokens") or 0) * price["input"]
+        + (usage.get("output_tokens") or 0) * price["output"]
+        + (usage.get("cache_read_input_tokens") or 0) * price["cache_read"]
+        + (usage.get("cache_creation_input_tokens") or 0) * price["cache_write"]
+    ) / 1_000_000
+
+
+def usage_record(report_id: str, result: dict) -> dict | None:
+    """Build a ``generation_usage`` row from a section result.
+
+    Returns None for results that never reached the API or the cache.
+    """
+    if "usage" not in result and not result.get("cached"):
+        return None
+    usage = result.get("usage", {})
+    return {
+        "report_id": report_id,
+        "section_id": result["section_id"],
+        "model": result.get("model", ""),
+        "status": result.get("status", ""),
+        "cached": bool(result.get("cached")),
+        "estimated_input_tokens": result.get("estimated_input_tokens"),
+        "max_tokens": result.get("max_tokens"),
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0),
+        "cache_creation_input_tokens": usage.get("cache_creation_input_tokens", 0),
+        "latency_seconds": result.get("latency_seconds"),
+        # One call for several sections (a pack or a quick report)
+        "packed": bool(result.get("packed_with")) or result.get("mode") == "quick",
+    }
+
+
+def usage_records(report_id: str, result: dict) -> list[dict]:
+    """``generation_usage`` rows for a section result.
+
+    A pack call whose response could not be split is recorded too, ahead of
+    the section's own call.
+    """
+    results = [result]
+    if result.get("failed_pack"):
+        results.insert(0, {**result["failed_pack"], "section_id": result["section_id"]})
+    return [r for r in (usage_record(report_id, res) for res in results) if r is not None]
+
+
+def summarize_usage(rows: list[dict], config: dict) -> dict:
+    """Total token, cost and latency figures over ``generation_usage`` rows."""
+    totals = dict.fromkeys(USAGE_TOTAL_FIELDS, 0)
+    for row in rows:
+        totals["calls"] += 1
+        totals["cached_calls"] += 1 if row.get("cached") else 0
+        for field in USAGE_TOTAL_FIELDS[2:-1]:
+            totals[field] += row.get(field) or 0
+        totals["cost"] += usage_cost(row, row.get("model", ""), config)
+    totals["latency_seconds"] = round(totals["latency_seconds"], 2)
+    totals["cost"] = round(totals["cost"], 4)
+    return totals
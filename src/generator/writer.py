@@ -2,90 +2,486 @@
 
 from __future__ import annotations
 
+import asyncio
+import inspect
+import json
+import threading
+import time
+
 from src.config import load_config
-from src.generator.prompts import SYSTEM_PROMPT, build_section_prompt
+from src.frameworks.validator import find_dependency_cycle
+from src.generator.backends import USAGE_FIELDS, AnthropicBackend, FakeBackend, LLMBackend, create_backend
+from src.generator.cache import ResponseCache, response_cache_key
+from src.generator.hedging import HedgeLost, HedgePolicy, claim_response
+from src.generator.ratelimit import (
+    DeadlineExceeded,
+    RateLimiter,
+    acall_with_retry,
+    call_with_retry,
+    get_rate_limiter,
+    remaining_seconds,
+)
+from src.generator.prompts import (
+    SYSTEM_PROMPT,
+    build_multi_section_instructions,
+    build_request_payload,
+    build_section_instructions,
+    build_section_prompt_parts,
+    build_shared_context,
+    split_multi_section_response,
+)
+from src.generator.tokens import estimate_tokens, section_max_tokens
+from src.tracing import span, traced
+
+
+class GenerationSession:
+    """Long-lived generation state shared by every section call in a run.
+
+    Holds the resolved config, the model backend (by default the Anthropic
+    API with pooled keep-alive clients) and run counters, so a multi-section
+    or multi-ticker run reads config once and reuses HTTP connections instead
+    of building a client per section. An optional ``ResponseCache``
+    short-circuits calls whose inputs are unchanged. API calls go through the
+    process-wide ``RateLimiter`` for the model and are retried with backoff.
+    Each call is bounded by the ``section_timeout`` config and by ``deadline``
+    (a ``time.monotonic()`` value the scheduler sets from ``report_deadline``);
+    ``cancel()`` stops calls at their next attempt or backoff. With
+    ``hedge_requests`` enabled, slow section calls are hedged (see
+    ``HedgePolicy``). Use as a context manager, or call ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        config: dict | None = None,
+        client=None,
+        async_client=None,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        backend: LLMBackend | None = None,
+    ):
+        self.config = config if config is not None else load_config()
+        self.model = self.config.get("model", "claude-sonnet-4-20250514")
+        self.cache = cache
+        self.limiter = limiter or get_rate_limiter(self.model, self.config)
+        self.backend = backend or create_backend(self.config, client, async_client)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "cached": 0, "generated": 0, "errors": 0}
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.deadline: float | None = None
+        self.cancelled = threading.Event()
+        self.hedging = HedgePolicy.from_config(self.config, self.model)
+
+    @property
+    def api_key(self) -> str:
+        return self.config.get("api_key", "")
+
+    @property
+    def missing_api_key(self) -> bool:
+        """True if the backend needs an API key and none is configured."""
+        return self.backend.requires_api_key and not self.api_key
+
+    @property
+    def backend_name(self) -> str:
+        """Name of the backend serving calls (``anthropic``, ``fake`` or ``module:attr``)."""
+        if isinstance(self.backend, AnthropicBackend):
+            return "anthropic"
+        if isinstance(self.backend, FakeBackend):
+            return "fake"
+        return str(self.config.get("backend") or type(self.backend).__name__)
+
+    @property
+    def base_url(self) -> str | None:
+        """API endpoint override (e.g. a local mock server); None for the default."""
+        return self.config.get("base_url") or None
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.config.get("concurrency", 1))
+
+    @property
+    def max_tokens(self) -> int:
+        return int(self.config.get("max_tokens_per_section", 4096))
+
+    def max_tokens_for(self, section: dict) -> int:
+        """Output budget for a section, derived from its word target."""
+        return section_max_tokens(section, self.max_tokens)
+
+    @property
+    def section_timeout(self) -> float | None:
+        """Seconds allowed per section call, retries included (None: unbounded)."""
+        return float(self.config.get("section_timeout") or 0) or None
+
+    @property
+    def report_deadline(self) -> float | None:
+        """Seconds allowed for a whole generation run (None: unbounded)."""
+        return float(self.config.get("report_deadline") or 0) or None
+
+    def cancel(self) -> None:
+        """Stop in-flight calls at their next attempt or backoff."""
+        self.cancelled.set()
+
+    @property
+    def section_packs(self) -> list[list[int]]:
+        """Groups of section IDs to request together (see ``write_section_pack``).
+
+        Accepts a list or its JSON string form (as set by ``irf config set``).
+        """
+        packs = self.config.get("section_packs") or []
+        if isinstance(packs, str):
+            try:
+                packs = json.loads(packs)
+            except ValueError:
+                return []
+        return [[int(sid) for sid in group] for group in packs if len(group) > 1]
+
+    @property
+    def prompt_caching(self) -> bool:
+        return str(self.config.get("prompt_caching", True)).lower() not in ("0", "false", "no", "off")
+
+    @property
+    def client(self):
+        """The backend's raw API client (used by batch mode)."""
+        return self.backend.client
+
+    @property
+    def async_client(self):
+        return self.backend.async_client
+
+    def record(self, result: dict) -> None:
+        """Count a finished section call."""
+        with self._lock:
+            self.stats["cached" if result.get("cached") else "requests"] += 1
+            if result.get("status") == "generated":
+                self.stats["generated"] += 1
+            else:
+                self.stats["errors"] += 1
+            for field, count in result.get("usage", {}).items():
+                self.usage[field] = self.usage.get(field, 0) + count
+        if self.hedging is not None and result.get("status") == "generated" and not result.get("cached"):
+            if result.get("latency_seconds") is not None:
+                self.hedging.observe(result.get("section_id"), result["latency_seconds"])
+
+    def _record_discarded(self, response: dict) -> None:
+        """Count the usage of a hedged attempt whose response lost the race."""
+        with self._lock:
+            for field, count in (response.get("usage") or {}).items():
+                self.usage[field] = self.usage.get(field, 0) + count
+
+    def call(self, fn, reserved: dict, section_id: int | None = None):
+        """Run a blocking API call under the rate limiter with retries.
+
+        ``fn(timeout)`` makes one attempt, where ``timeout`` is the seconds
+        left before the call's deadline (None if unbounded). ``reserved``
+        holds the ``input``/``output`` token estimates to draw from the
+        limiter for each attempt; each attempt's reservation is settled
+        against the usage it reports. Raises ``DeadlineExceeded`` when the
+        deadline passes or the session is cancelled. Calls made for a
+        ``section_id`` may be hedged.
+        """
+        deadline = self._call_deadline()
+
+        def _call():
+            return call_with_retry(
+                lambda: fn(remaining_seconds(deadline)),
+                self.limiter,
+                reserved.get("input", 0),
+                reserved.get("output", 0),
+                sleep=self.cancelled.wait,
+                deadline=deadline,
+                cancel=self.cancelled,
+                usage=_used_tokens,
+                **self._retry_settings(),
+            )
+
+        if self.hedging is None or section_id is None:
+            return _call()
+        return self.hedging.call(_call, section_id, self._record_discarded)
+
+    async def acall(self, fn, reserved: dict):
+        """Async variant of ``call``; ``fn(timeout)`` returns an awaitable."""
+        deadline = self._call_deadline()
+        return await acall_with_retry(
+            lambda: fn(remaining_seconds(deadline)),
+            self.limiter,
+            reserved.get("input", 0),
+            reserved.get("output", 0),
+            deadline=deadline,
+            cancel=self.cancelled,
+            usage=_used_tokens,
+            **self._retry_settings(),
+        )
+
+    def cache_lookup(
+        self, prompt: str, section_id: int, max_tokens: int,
+    ) -> tuple[str | None, str | None]:
+        """Return ``(key, cached_content)`` for a prompt; both None without a cache."""
+        if self.cache is None:
+            return None, None
+        with span("cache.lookup", "generator", section=section_id):
+            key = response_cache_key(self.model, SYSTEM_PROMPT, prompt, max_tokens, self.backend_name)
+            return key, self.cache.get(key, section_id)
+
+    def cache_store(self, key: str | None, result: dict) -> None:
+        """Cache a successfully generated section under ``key``."""
+        if self.cache is not None and key and result["status"] == "generated":
+            self.cache.put(key, f"{self.backend_name}/{self.model}", result["content"], result["section_id"])
+
+    def close(self) -> None:
+        """Release pooled connections held by the backend's sync client."""
+        self.backend.close()
+
+    async def aclose(self) -> None:
+        """Release pooled connections held by the backend's async client."""
+        await self.backend.aclose()
+
+    def __enter__(self) -> GenerationSession:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
+    def _call_deadline(self) -> float | None:
+        deadline = self.deadline
+        if self.section_timeout is not None:
+            section_deadline = time.monotonic() + self.section_timeout
+            deadline = section_deadline if deadline is None else min(deadline, section_deadline)
+        return deadline
 
+    def _retry_settings(self) -> dict:
+        return {
+            "max_retries": int(self.config.get("max_retries", 5)),
+            "base_delay": float(self.config.get("retry_base_delay", 1.0)),
+            "max_delay": float(self.config.get("retry_max_delay", 60.0)),
+        }
+
+
+@traced
 def write_section(
     section: dict,
     company_profile: dict,
     research_data: dict | None = None,
     citations: list[dict] | None = None,
     framework: dict | None = None,
+    session: GenerationSession | None = None,
+    dependencies: list[dict] | None = None,
+    on_delta=None,
 ) -> dict:
-    """Generate a single report section using the Claude API.
+    """Generate a single report section with the session's model backend.
+
+    Pass a shared ``session`` to reuse its config and pooled client; without
+    one a throwaway session is created for this call. ``dependencies`` are the
+    finished results of the sections listed in the section's ``depends_on``;
+    their digests are included in the prompt. With ``on_delta``, the response
+    is streamed and each text delta is passed to ``on_delta(section_id, text)``
+    as it arrives.
 
     Returns a dict with:
       - section_id: int
       - name: str
       - content: str (markdown)
       - word_count: int
-      - status: "generated" | "error"
+      - status: "generated" | "error" | "timeout"
       - error: str | None
     """
-    config = load_config()
-    api_key = config.get("api_key", "")
-    model = config.get("model", "claude-sonnet-4-20250514")
+    session = session or GenerationSession()
 
-    if not api_key:
-        return {
-            "section_id": section["id"],
-            "name": section.get("name", f"Section {section['id']}"),
-            "content": "",
-            "word_count": 0,
-            "status": "error",
-            "error": "No API key configured. Run: irf config set api_key <your-key>",
-        }
+    if session.missing_api_key:
+        return _section_result(
+            section,
+            status="error",
+            error="No API key configured. Run: irf config set api_key <your-key>",
+        )
 
-    prompt = build_section_prompt(
-        section=section,
-        company_profile=company_profile,
-        research_data=research_data,
-        citations=citations,
-        full_framework=framework,
+    shared, instructions = build_section_prompt_parts(
+        section, company_profile, research_data, citations, framework, dependencies
     )
+    prompt = f"{shared}\n\n{instructions}"
+    reserved = {"input": estimate_tokens(SYSTEM_PROMPT + prompt), "output": session.max_tokens_for(section)}
+    requested_at = time.perf_counter()
 
-    try:
-        import anthropic
-
-        client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model=model,
-            max_tokens=config.get("max_tokens_per_section", 4096),
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": prompt}],
-        )
+    cache_key, cached = session.cache_lookup(prompt, section["id"], reserved["output"])
+    if cached is not None:
+        if on_delta:
+            on_delta(section["id"], cached)
+        result = _section_result(section, content=cached)
+        result["cached"] = True
+        result.update(_request_details(session, reserved, requested_at))
+        session.record(result)
+        return result
 
-        content = response.content[0].text
-        word_count = len(content.split())
+    system, messages = build_request_payload(shared, instructions, session.prompt_caching)
+    request = {
+        "model": session.model,
+        "max_tokens": reserved["output"],
+        "system": system,
+        "messages": messages,
+    }
+    chunks = []
 
-        return {
-            "section_id": section["id"],
-            "name": section.get("name", f"Section {section['id']}"),
-            "content": content,
-            "word_count": word_count,
-            "status": "generated",
-            "error": None,
-        }
+    def _on_text(text: str) -> None:
+        chunks.append(text)
+        on_delta(section["id"], text)
+
+    def _stream(timeout):
+        claimed = False
+        # The backend's timeout may only bound each read, so a stream that
+        # keeps sending text is cut off here once the call's time is up
+        ends_at = None if timeout is None else time.monotonic() + timeout
+
+        def _on_attempt_text(text: str) -> None:
+            # A hedged duplicate only forwards text once it has won the race
+            nonlocal claimed
+            _check_stream(session, ends_at)
+            if not claimed and not claim_response():
+                raise HedgeLost("Another request for this section responded first")
+            claimed = True
+            _on_text(text)
+
+        try:
+            return session.backend.stream(_timed(request, timeout), _on_attempt_text)
+        except (HedgeLost, DeadlineExceeded):
+            raise
+        except Exception as e:
+            if chunks:
+                # Deltas were already delivered, so retrying would duplicate them
+                raise StreamInterrupted(str(e)) from e
+            raise
+
+    try:
+        if on_delta:
+            response = session.call(_stream, reserved, section["id"])
+        else:
+            response = session.call(
+                lambda timeout: session.backend.complete(_timed(request, timeout)), reserved, section["id"],
+            )
+        result = _section_result(section, content=response["text"])
+        result["usage"] = response["usage"]
+        session.cache_store(cache_key, result)
 
     except ImportError:
-        return {
-            "section_id": section["id"],
-            "name": section.get("name", f"Section {section['id']}"),
-            "content": "",
-            "word_count": 0,
-            "status": "error",
-            "error": "anthropic package not installed. Run: pip install anthropic",
-        }
+        result = _section_result(
+            section,
+            status="error",
+            error="anthropic package not installed. Run: pip install anthropic",
+        )
+    except DeadlineExceeded as e:
+        result = _section_result(section, status="timeout", error=str(e))
     except Exception as e:
-        return {
-            "section_id": section["id"],
-            "name": section.get("name", f"Section {section['id']}"),
-            "content": "",
-            "word_count": 0,
-            "status": "error",
-            "error": str(e),
+        result = _section_result(section, status="error", error=str(e))
+
+    result.update(_request_details(session, reserved, requested_at))
+    session.record(result)
+    return result
+
+
+@traced
+def write_section_pack(
+    sections: list[dict],
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    framework: dict | None = None,
+    session: GenerationSession | None = None,
+    dependencies: list[dict] | None = None,
+    on_delta=None,
+) -> list[dict]:
+    """Generate several short sections with one request.
+
+    The sections' instructions are combined with strict delimiters and the
+    response is split back into one result per section. If the response
+    cannot be split (a section missing, empty or duplicated), each section
+    is generated with its own ``write_section`` call instead. ``on_delta``
+    receives each section's full text once it is split, not a live stream.
+    The call's usage and latency are recorded on the first result; every
+    result lists the pack in ``packed_with``. After a fallback, the first
+    result carries the unsplittable pack call in ``failed_pack``.
+    """
+    session = session or GenerationSession()
+    section_ids = [s["id"] for s in sections]
+
+    def _fallback() -> list[dict]:
+        return [
+            write_section(
+                section, company_profile, research_data, citations, framework, session,
+                [d for d in dependencies or [] if d["section_id"] in section.get("depends_on", [])],
+                on_delta,
+            )
+            for section in sections
+        ]
+
+    if session.missing_api_key:
+        return _fallback()
+
+    shared = build_shared_context(company_profile, research_data, citations, framework)
+    instructions = build_multi_section_instructions({
+        section["id"]: build_section_instructions(
+            section,
+            [d for d in dependencies or [] if d["section_id"] in section.get("depends_on", [])],
+        )
+        for section in sections
+    })
+    prompt = f"{shared}\n\n{instructions}"
+    reserved = {
+        "input": estimate_tokens(SYSTEM_PROMPT + prompt),
+        "output": sum(session.max_tokens_for(section) for section in sections),
+    }
+    requested_at = time.perf_counter()
+    summary = {"status": "generated"}
+
+    # A pack misses the cache if any of its sections is being refreshed
+    refreshing = session.cache.refresh_sections if session.cache is not None else set()
+    cache_section = next((sid for sid in section_ids if sid in refreshing), None)
+    cache_key, text = session.cache_lookup(prompt, cache_section, reserved["output"])
+    if text is not None:
+        summary["cached"] = True
+    else:
+        system, messages = build_request_payload(shared, instructions, session.prompt_caching)
+        request = {
+            "model": session.model,
+            "max_tokens": reserved["output"],
+            "system": system,
+            "messages": messages,
         }
+        try:
+            # Not hedged: the thresholds are learned from single-section calls
+            response = session.call(
+                lambda timeout: session.backend.complete(_timed(request, timeout)), reserved,
+            )
+        except DeadlineExceeded as e:
+            session.record({"status": "timeout"})
+            return [_section_result(section, status="timeout", error=str(e)) for section in sections]
+        except ImportError:
+            error = "anthropic package not installed. Run: pip install anthropic"
+            session.record({"status": "error"})
+            return [_section_result(section, status="error", error=error) for section in sections]
+        except Exception as e:
+            session.record({"status": "error"})
+            return [_section_result(section, status="error", error=str(e)) for section in sections]
+        text = response["text"]
+        summary["usage"] = response["usage"]
+
+    try:
+        contents = split_multi_section_response(text, section_ids)
+    except ValueError:
+        failed = {**summary, "status": "error", "packed_with": section_ids}
+        failed.update(_request_details(session, reserved, requested_at))
+        session.record(failed)
+        results = _fallback()
+        results[0]["failed_pack"] = failed
+        return results
+    session.cache_store(cache_key, {"status": "generated", "content": text, "section_id": None})
+    session.record(summary)
+
+    results = []
+    for section in sections:
+        result = _section_result(section, content=contents[section["id"]])
+        result["packed_with"] = section_ids
+        if on_delta:
+            on_delta(section["id"], result["content"])
+        results.append(result)
+    results[0].update(_request_details(session, reserved, requested_at))
+    results[0].update({k: v for k, v in summary.items() if k in ("usage", "cached")})
+    return results
 
 
 def write_all_sections(
@@ -94,36 +490,325 @@ def write_all_sections(
     research_data: dict | None = None,
     citations: list[dict] | None = None,
     progress_callback=None,
+    concurrency: int | None = None,
+    session: GenerationSession | None = None,
+    completed: list[dict] | None = None,
+    on_delta=None,
+    sections: list[dict] | None = None,
 ) -> list[dict]:
     """Generate all sections for a report.
 
+    Up to ``concurrency`` sections run at the same time on the section
+    scheduler's thread pool; a section with ``depends_on`` starts only once
+    those sections have finished. The progress callback is always invoked
+    from the calling thread, and results come back in framework section order
+    regardless of completion order.
+
     Args:
         effective_framework: The fully resolved framework.
         company_profile: Company profile dict.
         research_data: Additional research data.
         citations: List of citation objects.
         progress_callback: Optional callable(section_id, status, result).
+        concurrency: Maximum sections in flight (defaults to config
+            ``concurrency``; 1 generates sequentially).
+        session: Shared generation session (created if omitted).
+        completed: Results of sections finished in an earlier run, used as
+            dependencies for the sections generated now.
+        on_delta: Optional callable(section_id, text) that receives streamed
+            text; it is called from worker threads.
+        sections: Sections to generate (default: all of the framework's);
+            prompts still outline the full framework.
 
     Returns:
         List of section result dicts.
     """
-    sections = effective_framework.get("sections", [])
-    results = []
+    if session is None:
+        with GenerationSession() as session:
+            return write_all_sections(
+                effective_framework, company_profile, research_data, citations,
+                progress_callback, concurrency, session, completed, on_delta, sections,
+            )
+    from src.generator.scheduler import generate_many
 
-    for section in sections:
-        if progress_callback:
-            progress_callback(section["id"], "generating", None)
-
-        result = write_section(
-            section=section,
-            company_profile=company_profile,
-            research_data=research_data,
-            citations=citations,
-            framework=effective_framework,
+    job = {
+        "ticker": company_profile.get("metadata", {}).get("ticker", ""),
+        "profile": company_profile,
+        "framework": effective_framework,
+        "sections": effective_framework.get("sections", []) if sections is None else sections,
+        "research_data": research_data,
+        "citations": citations,
+        "completed": completed or [],
+    }
+    callback = delta = None
+    if progress_callback:
+        def callback(ticker, section_id, status, result):
+            progress_callback(section_id, status, result)
+    if on_delta:
+        def delta(ticker, section_id, text):
+            on_delta(section_id, text)
+
+    results = generate_many(
+        [job], session, concurrency=concurrency, progress_callback=callback, on_delta=delta,
+    )
+    return results[job["ticker"]]
+
+
+async def write_section_async(
+    section: dict,
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    framework: dict | None = None,
+    on_delta=None,
+    session: GenerationSession | None = None,
+    dependencies: list[dict] | None = None,
+) -> dict:
+    """Generate a single section with a streaming request on the async backend.
+
+    Text deltas are passed to ``on_delta(section_id, text)`` as they arrive
+    (the callback may be a plain function or a coroutine function). The result
+    has the same shape as ``write_section`` plus a ``metrics`` dict with
+    ``ttft_seconds``, ``duration_seconds``, ``output_tokens`` and
+    ``tokens_per_second``.
+    """
+    session = session or GenerationSession()
+
+    if session.missing_api_key:
+        return _section_result(
+            section,
+            status="error",
+            error="No API key configured. Run: irf config set api_key <your-key>",
         )
-        results.append(result)
 
-        if progress_callback:
-            progress_callback(section["id"], result["status"], result)
+    shared, instructions = build_section_prompt_parts(
+        section, company_profile, research_data, citations, framework, dependencies
+    )
+    prompt = f"{shared}\n\n{instructions}"
+    reserved = {"input": estimate_tokens(SYSTEM_PROMPT + prompt), "output": session.max_tokens_for(section)}
+    requested_at = time.perf_counter()
 
-    return results
+    cache_key, cached = session.cache_lookup(prompt, section["id"], reserved["output"])
+    if cached is not None:
+        if on_delta:
+            outcome = on_delta(section["id"], cached)
+            if inspect.isawaitable(outcome):
+                await outcome
+        result = _section_result(section, content=cached)
+        result["cached"] = True
+        result.update(_request_details(session, reserved, requested_at))
+        session.record(result)
+        return result
+
+    system, messages = build_request_payload(shared, instructions, session.prompt_caching)
+    request = {
+        "model": session.model,
+        "max_tokens": reserved["output"],
+        "system": system,
+        "messages": messages,
+    }
+    started = time.perf_counter()
+    first_token_at = None
+    chunks = []
+
+    ends_at = None
+
+    async def _on_text(text: str) -> None:
+        nonlocal first_token_at
+        _check_stream(session, ends_at)
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        chunks.append(text)
+        if on_delta:
+            outcome = on_delta(section["id"], text)
+            if inspect.isawaitable(outcome):
+                await outcome
+
+    async def _stream(timeout):
+        nonlocal started, first_token_at, ends_at
+        started = time.perf_counter()
+        first_token_at = None
+        ends_at = None if timeout is None else time.monotonic() + timeout
+        try:
+            return await session.backend.astream(_timed(request, timeout), _on_text)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if chunks:
+                # Deltas were already delivered, so retrying would duplicate them
+                raise StreamInterrupted(str(e)) from e
+            raise
+
+    try:
+        response = await session.acall(_stream, reserved)
+        finished = time.perf_counter()
+
+        result = _section_result(section, content=response["text"])
+        result["usage"] = response["usage"]
+        result["metrics"] = _stream_metrics(
+            started, first_token_at, finished, result["usage"]["output_tokens"]
+        )
+        session.cache_store(cache_key, result)
+
+    except ImportError:
+        result = _section_result(
+            section,
+            status="error",
+            error="anthropic package not installed. Run: pip install anthropic",
+        )
+    except DeadlineExceeded as e:
+        result = _section_result(section, status="timeout", error=str(e))
+    except Exception as e:
+        result = _section_result(section, status="error", error=str(e))
+
+    result.update(_request_details(session, reserved, requested_at))
+    session.record(result)
+    return result
+
+
+async def write_all_sections_async(
+    effective_framework: dict,
+    company_profile: dict,
+    research_data: dict | None = None,
+    citations: list[dict] | None = None,
+    progress_callback=None,
+    on_delta=None,
+    concurrency: int | None = None,
+    session: GenerationSession | None = None,
+    completed: list[dict] | None = None,
+    sections: list[dict] | None = None,
+) -> list[dict]:
+    """Async counterpart of ``write_all_sections`` built on streaming requests.
+
+    At most ``concurrency`` sections stream at once, and sections with
+    ``depends_on`` wait for those sections to finish. ``progress_callback`` is
+    called as each section starts and completes; ``on_delta`` receives every
+    text delta. Results are returned in framework section order. Sections
+    not finished by the ``report_deadline`` come back with status ``"timeout"``.
+    Only ``sections`` are generated, if given; prompts still outline the
+    full framework.
+    """
+    if sections is None:
+        sections = effective_framework.get("sections", [])
+    cycle = find_dependency_cycle(sections)
+    if cycle:
+        # Each section would await another forever
+        ticker = company_profile.get("metadata", {}).get("ticker", "")
+        raise ValueError(f"Section dependency cycle for {ticker}: sections {cycle}")
+    if session is None:
+        session = GenerationSession()
+        try:
+            return await write_all_sections_async(
+                effective_framework, company_profile, research_data, citations,
+                progress_callback, on_delta, concurrency, session, completed, sections,
+            )
+        finally:
+            await session.aclose()
+    if concurrency is None:
+        concurrency = session.concurrency
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = {r["section_id"]: r for r in completed or []}
+    tasks: dict[int, asyncio.Task] = {}
+
+    async def _generate(section: dict) -> dict:
+        deps = [d for d in section.get("depends_on", []) if d in tasks or d in done]
+        dependencies = [await tasks[d] if d in tasks else done[d] for d in deps]
+        async with semaphore:
+            if progress_callback:
+                progress_callback(section["id"], "generating", None)
+            result = await write_section_async(
+                section=section,
+                company_profile=company_profile,
+                research_data=research_data,
+                citations=citations,
+                framework=effective_framework,
+                on_delta=on_delta,
+                session=session,
+                dependencies=[r for r in dependencies if r.get("status") == "generated"],
+            )
+            if progress_callback:
+                progress_callback(section["id"], result["status"], result)
+            return result
+
+    session.cancelled.clear()
+    session.deadline = time.monotonic() + session.report_deadline if session.report_deadline else None
+    try:
+        # Prime the prompt cache with one independent section before fanning out
+        ids = {s["id"] for s in sections}
+        roots = [s for s in sections if not ids & set(s.get("depends_on", []))]
+        if session.prompt_caching and concurrency > 1 and len(sections) > 1 and roots:
+            tasks[roots[0]["id"]] = asyncio.ensure_future(_generate(roots[0]))
+            await tasks[roots[0]["id"]]
+        for section in sections:
+            if section["id"] not in tasks:
+                tasks[section["id"]] = asyncio.ensure_future(_generate(section))
+        return list(await asyncio.gather(*(tasks[s["id"]] for s in sections)))
+    finally:
+        session.deadline = None
+
+
+def _stream_metrics(
+    started: float,
+    first_token_at: float | None,
+    finished: float,
+    output_tokens: int,
+) -> dict:
+    """Latency and throughput figures for one streamed section."""
+    ttft = (first_token_at or finished) - started
+    streaming = finished - (first_token_at or finished)
+    return {
+        "ttft_seconds": round(ttft, 3),
+        "duration_seconds": round(finished - started, 3),
+        "output_tokens": output_tokens,
+        "tokens_per_second": round(output_tokens / streaming, 1) if streaming > 0 else None,
+    }
+
+
+class StreamInterrupted(Exception):
+    """A streamed response failed after text had been emitted (not retried)."""
+
+
+def _request_details(session: GenerationSession, reserved: dict, requested_at: float) -> dict:
+    """Model, token budget/estimate and latency recorded with each result."""
+    return {
+        "model": session.model,
+        "max_tokens": reserved["output"],
+        "estimated_input_tokens": reserved["input"],
+        "latency_seconds": round(time.perf_counter() - requested_at, 3),
+    }
+
+
+def _used_tokens(response: dict) -> dict:
+    """Tokens a backend response actually used, in rate-limiter terms."""
+    usage = response.get("usage") or {}
+    return {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}
+
+
+def _check_stream(session: GenerationSession, ends_at: float | None) -> None:
+    """Abort a stream once the session is cancelled or the call's time is up."""
+    if session.cancelled.is_set():
+        raise DeadlineExceeded("Generation was cancelled")
+    if ends_at is not None and remaining_seconds(ends_at) <= 0:
+        raise DeadlineExceeded("Timed out before the request completed")
+
+
+def _timed(request: dict, timeout: float | None) -> dict:
+    """The request with an attempt ``timeout`` (unchanged when unbounded)."""
+    return request if timeout is None else {**request, "timeout": timeout}
+
+
+def _section_result(
+    section: dict,
+    content: str = "",
+    status: str = "generated",
+    error: str | None = None,
+) -> dict:
+    """Build a section result dict in the shape the assembler expects."""
+    return {
+        "section_id": section["id"],
+        "name": section.get("name", f"Section {section['id']}"),
+        "content": content,
+        "word_count": len(content.split()),
+        "status": status,
+        "error": error,
+    }
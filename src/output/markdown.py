@@ -2,12 +2,27 @@
 
 from __future__ import annotations
 
+import codecs
+import os
+import threading
+import time
 from pathlib import Path
 
 from src.config import OUTPUT_DIR
-from src.generator.assembler import render_report_markdown
+from src.generator.assembler import is_quick_report, render_report_markdown
+from src.tracing import traced
 
+PARTIAL_SUFFIX = ".partial.md"
 
+# Last line of a partial file whose generation stopped before the export
+ABORTED_MARKER = "*Generation stopped before the report was finished.*\n"
+
+# Seconds without growth after which ``follow_partial`` gives up on a
+# partial file whose writer died without marking it
+STALE_AFTER = 900.0
+
+
+@traced
 def export_markdown(
     report: dict,
     company_profile: dict,
@@ -15,6 +30,8 @@ def export_markdown(
 ) -> Path:
     """Export a report to markdown format.
 
+    The file is written atomically, and any live partial file for the same
+    report (see ``PartialReportWriter``) is removed once it is in place.
     Returns the path to the written file.
     """
     base_dir = output_dir or OUTPUT_DIR
@@ -29,8 +46,175 @@ def export_markdown(
     content = render_report_markdown(report, company_profile)
 
     # Write file
-    filename = f"{report_date}_report.md"
+    filename = f"{report_date}_{'quick' if is_quick_report(report) else 'report'}.md"
     output_path = company_dir / filename
-    output_path.write_text(content, encoding="utf-8")
+    tmp_path = output_path.with_name(f".{filename}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, output_path)
 
+    partial_path(ticker, report_date, base_dir).unlink(missing_ok=True)
     return output_path
+
+
+def partial_path(ticker: str, report_date: str, output_dir: Path | None = None) -> Path:
+    """Path of the live partial file for a report being generated."""
+    return (output_dir or OUTPUT_DIR) / ticker / f"{report_date}_report{PARTIAL_SUFFIX}"
+
+
+def find_partial(ticker: str, output_dir: Path | None = None) -> Path | None:
+    """Most recently modified partial file for a ticker, if any."""
+    company_dir = (output_dir or OUTPUT_DIR) / ticker
+    candidates = sorted(
+        company_dir.glob(f"*_report{PARTIAL_SUFFIX}"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return candidates[0] if candidates else None
+
+
+class PartialReportWriter:
+    """Append streamed section text to a live ``.partial.md`` file.
+
+    One section at a time streams into the file, flushed at paragraph
+    boundaries. Sections that finish while another is streaming are appended
+    whole when it completes, so the file only grows and each section stays
+    contiguous (safe to ``tail -f``). Thread-safe: deltas may come from
+    worker threads.
+    """
+
+    def __init__(self, path: Path, company_profile: dict, sections: list[dict]):
+        meta = company_profile.get("metadata", {})
+        self.path = path
+        self._names = {s["id"]: s.get("name", f"Section {s['id']}") for s in sections}
+        self._lock = threading.Lock()
+        self._buffers: dict[int, str] = {}
+        self._written: dict[int, int] = {}
+        self._done: list[dict] = []
+        self._active: int | None = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        self._write(
+            f"# {meta.get('name', '?')} ({meta.get('ticker', '?')}) — Investment Analysis\n\n"
+            f"*Generation in progress; sections appear as they are written.*\n\n---\n\n"
+        )
+
+    def write_delta(self, section_id: int, text: str) -> None:
+        """Buffer streamed text, writing whole paragraphs of the active section."""
+        with self._lock:
+            if self._file is None or self._written.get(section_id) == -1:
+                return
+            self._buffers[section_id] = self._buffers.get(section_id, "") + text
+            if self._active is None:
+                self._active = section_id
+            if self._active == section_id:
+                self._flush_paragraphs(section_id)
+
+    def section_done(self, result: dict) -> None:
+        """Finish a section (streamed or not) and hand the file to the next one."""
+        with self._lock:
+            if self._file is None:
+                return
+            if self._active in (None, result["section_id"]):
+                self._finish(result)
+                self._active = None
+            else:
+                self._done.append(result)
+            while self._active is None and self._done:
+                self._finish(self._done.pop(0))
+            if self._active is None:
+                streaming = [sid for sid in self._buffers if sid not in self._written]
+                if streaming:
+                    self._active = streaming[0]
+                    self._flush_paragraphs(self._active)
+
+    def close(self, aborted: bool = False) -> None:
+        """Close the file; it stays on disk until the final export replaces it.
+
+        With ``aborted`` (generation stopped early), ``ABORTED_MARKER`` is
+        appended so followers know no more text is coming.
+        """
+        with self._lock:
+            if self._file is not None:
+                if aborted:
+                    self._write(f"\n\n{ABORTED_MARKER}")
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> PartialReportWriter:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.close(aborted=exc_type is not None)
+
+    def _flush_paragraphs(self, section_id: int) -> None:
+        buffer = self._buffers[section_id]
+        cut = buffer.rfind("\n\n")
+        written = self._written.get(section_id, 0)
+        if cut >= 0 and cut + 2 > written:
+            self._emit(section_id, buffer[written:cut + 2])
+
+    def _finish(self, result: dict) -> None:
+        sid = result["section_id"]
+        text = result.get("content") or self._buffers.get(sid, "")
+        self._emit(sid, text[self._written.get(sid, 0):])
+        if result.get("status") == "error":
+            self._write(f"\n\n> **Generation Error:** {result.get('error', 'Unknown error')}")
+        elif result.get("status") == "timeout":
+            self._write(f"\n\n> **Timed Out:** {result.get('error') or 'Not generated before the deadline'}")
+        self._buffers.pop(sid, None)
+        self._written[sid] = -1
+        self._write("\n\n---\n\n")
+
+    def _emit(self, section_id: int, text: str) -> None:
+        if section_id not in self._written:
+            self._written[section_id] = 0
+            if not text.lstrip().startswith("#"):
+                self._write(f"## {self._names.get(section_id, f'Section {section_id}')}\n\n")
+        self._written[section_id] += len(text)
+        self._write(text)
+
+    def _write(self, text: str) -> None:
+        if text:
+            self._file.write(text)
+            self._file.flush()
+
+
+def follow_partial(
+    path: Path,
+    emit,
+    poll_interval: float = 0.5,
+    sleep=time.sleep,
+    stale_after: float = STALE_AFTER,
+    clock=time.monotonic,
+) -> bool:
+    """Pass everything written to ``path`` to ``emit`` until the file is removed.
+
+    Works like ``tail -f`` from the start of the file. Returns True once the
+    final export has replaced the partial file, or False if generation
+    stopped first: the file ends with ``ABORTED_MARKER``, or it has not
+    grown for ``stale_after`` seconds (its writer died).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    marker = ABORTED_MARKER.encode()
+    position = 0
+    tail = b""
+    grew_at = clock()
+    while True:
+        try:
+            with open(path, "rb") as f:
+                f.seek(position)
+                data = f.read()
+        except FileNotFoundError:
+            return True
+        position += len(data)
+        # The decoder holds back a multi-byte character split across reads
+        text = decoder.decode(data)
+        if text:
+            emit(text)
+        if data:
+            tail = (tail + data)[-len(marker):]
+            grew_at = clock()
+            continue
+        if tail == marker or clock() - grew_at >= stale_after:
+            return False
+        sleep(poll_interval)
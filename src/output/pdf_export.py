@@ -4,7 +4,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from src.tracing import traced
 
+
+@traced
 def export_pdf(report: dict, company_profile: dict, output_dir: Path | None = None) -> Path:
     """Export a report to PDF format.
 
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+from src.tracing import traced
 
+
+@traced
 def fetch_company_info(ticker: str) -> dict:
     """Fetch basic company information using yfinance.
 
@@ -55,6 +58,7 @@ def fetch_company_info(ticker: str) -> dict:
     }
 
 
+@traced
 def fetch_financials_table(ticker: str) -> dict:
     """Fetch income statement, balance sheet, and cash flow data."""
     try:
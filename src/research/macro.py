@@ -6,7 +6,10 @@ Phase 2: Will add automated macro data fetching.
 
 from __future__ import annotations
 
+from src.tracing import traced
 
+
+@traced
 def get_macro_context(framework: dict) -> dict:
     """Get macro context prompts based on framework sector.
 
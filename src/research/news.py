@@ -6,7 +6,10 @@ Phase 2 will add automated web search via Claude API tool use.
 
 from __future__ import annotations
 
+from src.tracing import traced
 
+
+@traced
 def get_recent_news(ticker: str, days: int = 90) -> list[dict]:
     """Fetch recent news for a company.
 
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from src.tracing import traced
+
 
 def get_peers_from_framework(framework: dict) -> dict[str, list[str]]:
     """Extract peer groups defined in a sector framework."""
@@ -10,6 +12,7 @@ def get_peers_from_framework(framework: dict) -> dict[str, list[str]]:
     return section_9.get("peer_groups", {})
 
 
+@traced
 def fetch_peer_data(tickers: list[str]) -> list[dict]:
     """Fetch basic comparison data for a list of peer tickers."""
     try:
@@ -0,0 +1,190 @@
+"""Lightweight span instrumentation for timing breakdowns and trace files.
+
+Stages are wrapped in ``with span("name"):`` blocks or decorated with
+``@traced``. Nothing is recorded until ``enable_tracing()`` installs
+a ``Tracer`` (the CLI does this for ``--timings`` / ``--trace``); while
+disabled, ``span()`` returns a shared no-op object, so the cost is one
+global lookup per call.
+
+A tracer can summarise spans as a per-name table or export them as Chrome
+trace-format JSON, viewable in Perfetto (https://ui.perfetto.dev) or
+chrome://tracing.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+_tracer: Tracer | None = None
+
+
+class _NullSpan:
+    """Shared no-op span used while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.category, self.start, end, self.args)
+        return False
+
+    def set(self, **args) -> None:
+        """Attach extra arguments (e.g. a status known only at the end)."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects completed spans from every thread."""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events: list[dict] = []
+        self.threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "irf", **args) -> _Span:
+        return _Span(self, name, category, args)
+
+    def record(self, name: str, category: str, start_ns: int, end_ns: int, args: dict) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()}
+        with self._lock:
+            self.events.append(event)
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def summary(self) -> list[dict]:
+        """Per-span-name totals, slowest total first.
+
+        Nested spans are counted in full, so totals of a span and its
+        children overlap.
+        """
+        rows: dict[str, dict] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            row = rows.setdefault(event["name"], {
+                "name": event["name"], "category": event["cat"],
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            })
+            ms = event["dur"] / 1000
+            row["count"] += 1
+            row["total_ms"] += ms
+            row["max_ms"] = max(row["max_ms"], ms)
+        for row in rows.values():
+            row["mean_ms"] = row["total_ms"] / row["count"]
+        return sorted(rows.values(), key=lambda r: r["total_ms"], reverse=True)
+
+    def chrome_trace(self) -> dict:
+        """Events in Chrome trace-event format."""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        metadata.append({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "irf"}})
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        return path
+
+
+def enable_tracing() -> Tracer:
+    """Install a fresh process-wide tracer and return it."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing() -> Tracer | None:
+    """Stop recording; returns the tracer that was active, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, category: str = "irf", **args):
+    """Context manager timing the enclosed block (no-op while disabled)."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, category, args)
+
+
+def traced(fn=None, *, name: str | None = None, category: str | None = None):
+    """Decorator recording a span around each call of the function.
+
+    Usable bare (``@traced``) or with arguments. The span name defaults to
+    ``<module>.<function>`` (``writer.write_section``) and the category to
+    the top-level package (``db``, ``generator``, ``research``, ...).
+    """
+
+    def decorator(fn):
+        module = fn.__module__.removeprefix("src.")
+        span_name = name or f"{module.rsplit('.', 1)[-1]}.{fn.__name__}"
+        span_category = category or module.split(".")[0]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with _Span(tracer, span_name, span_category, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator(fn) if fn is not None else decorator
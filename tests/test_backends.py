@@ -0,0 +1,143 @@
+"""Tests for model backends, mainly the offline fake."""
+
+import asyncio
+import re
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.frameworks.base import build_effective_framework
+from src.generator.assembler import assemble_report
+from src.generator.backends import (
+    AnthropicBackend,
+    FakeAPIError,
+    FakeBackend,
+    create_backend,
+)
+from src.generator.prompts import build_request_payload, build_section_prompt_parts
+from src.generator.qa import run_qa_checks
+from src.generator.ratelimit import RateLimiter, is_retryable
+from src.generator.writer import GenerationSession, write_all_sections, write_all_sections_async
+
+
+def _framework():
+    return build_effective_framework({"sector_id": "test", "display_name": "Test"})
+
+
+def _profile():
+    return {"id": "p1", "metadata": {"name": "Test Corp", "ticker": "TEST"}}
+
+
+def _request(section_index=3, max_tokens=4096):
+    framework = _framework()
+    citations = [{"id": i, "title": f"Source {i}", "subject": "Data"} for i in (11, 12, 13)]
+    shared, instructions = build_section_prompt_parts(
+        framework["sections"][section_index], _profile(), citations=citations,
+        full_framework=framework,
+    )
+    system, messages = build_request_payload(shared, instructions)
+    return {"model": "test", "max_tokens": max_tokens, "system": system, "messages": messages}
+
+
+def _fake_session(**fake_options):
+    config = {**DEFAULT_CONFIG, "api_key": "", "backend": "fake", "fake_backend": fake_options}
+    return GenerationSession(config=config, limiter=RateLimiter())
+
+
+class TestFakeBackend:
+    def test_deterministic_schema_conforming_markdown(self):
+        first = FakeBackend().complete(_request())
+        second = FakeBackend().complete(_request())
+        text = first["text"]
+        assert text == second["text"]
+        assert text.startswith("## Section 4: Operational Analysis - Primary")
+        assert "|---|---|---|---|" in text
+        assert "### " in text
+        assert set(re.findall(r"\[(\d+)\]", text)) <= {"11", "12", "13"}
+        assert 800 <= len(text.split()) <= 1300
+        assert first["usage"]["output_tokens"] > 0
+
+    def test_max_tokens_limits_length(self):
+        text = FakeBackend().complete(_request(max_tokens=300))["text"]
+        assert len(text.split()) < 300
+
+    def test_stream_matches_complete(self):
+        deltas = []
+        streamed = FakeBackend().stream(_request(), deltas.append)
+        assert len(deltas) > 1
+        assert "".join(deltas) == streamed["text"] == FakeBackend().complete(_request())["text"]
+
+    def test_latency_and_token_rate(self):
+        sleeps = []
+        backend = FakeBackend(latency=0.5, tokens_per_second=100, sleep=sleeps.append)
+        result = backend.complete(_request())
+        assert sleeps == [pytest.approx(0.5 + result["usage"]["output_tokens"] / 100)]
+
+    def test_timeout_waits_then_raises(self):
+        sleeps = []
+        backend = FakeBackend(latency=5.0, sleep=sleeps.append)
+        with pytest.raises(TimeoutError):
+            backend.complete({**_request(), "timeout": 0.5})
+        assert sleeps == [0.5]
+
+    def test_error_injection(self):
+        backend = FakeBackend(error_rate=1.0)
+        with pytest.raises(FakeAPIError) as err:
+            backend.complete(_request())
+        assert is_retryable(err.value)
+
+    def test_shared_prefix_reported_as_cache_read(self):
+        backend = FakeBackend()
+        first = backend.complete(_request(3))["usage"]
+        second = backend.complete(_request(4))["usage"]
+        assert first["cache_creation_input_tokens"] > 0
+        assert second["cache_read_input_tokens"] == first["cache_creation_input_tokens"]
+
+
+class TestBackendSelection:
+    def test_default_is_anthropic(self):
+        assert isinstance(create_backend(DEFAULT_CONFIG), AnthropicBackend)
+
+    def test_fake_from_config(self):
+        backend = create_backend({**DEFAULT_CONFIG, "backend": "fake",
+                                  "fake_backend": {"latency": "0.25"}})
+        assert isinstance(backend, FakeBackend)
+        assert backend.latency == 0.25
+
+    def test_custom_backend_path(self):
+        backend = create_backend({"backend": "tests.test_backends:_CustomBackend"})
+        assert isinstance(backend, _CustomBackend)
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_backend({"backend": "nope"})
+
+
+class _CustomBackend(FakeBackend):
+    def __init__(self, config):
+        super().__init__()
+
+
+class TestOfflinePipeline:
+    def test_full_report_without_api_key(self):
+        with _fake_session() as session:
+            results = write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        assert all(r["status"] == "generated" for r in results)
+        report = assemble_report(results, _profile(), _framework())
+        qa = run_qa_checks(report)
+        assert qa["structure"]
+
+    def test_injected_errors_are_retried(self):
+        session = _fake_session(error_rate=0.3, seed=7)
+        session.config["retry_base_delay"] = 0
+        results = write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        assert all(r["status"] == "generated" for r in results)
+        assert session.limiter.stats["retries"] > 0
+
+    def test_async_streaming(self):
+        session = _fake_session()
+        results = asyncio.run(write_all_sections_async(
+            _framework(), _profile(), session=session, concurrency=4,
+        ))
+        assert [r["section_id"] for r in results] == list(range(1, 12))
+        assert all(r["metrics"]["output_tokens"] > 0 for r in results)
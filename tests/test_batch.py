@@ -0,0 +1,103 @@
+"""Tests for Message Batches API generation against a local mock endpoint."""
+
+import types
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.db import get_batch_job, init_db, list_batch_jobs
+from src.frameworks.base import build_effective_framework
+from src.generator.batch import check_batch, collect_batch_results, submit_batch
+from src.generator.writer import GenerationSession
+
+
+class MockBatchEndpoint:
+    """In-memory stand-in for the ``messages.batches`` API."""
+
+    def __init__(self, fail_custom_ids=()):
+        self.batches = {}
+        self.fail_custom_ids = set(fail_custom_ids)
+        self.polls = 0
+
+    def create(self, requests):
+        batch_id = f"msgbatch_{len(self.batches) + 1}"
+        self.batches[batch_id] = requests
+        return types.SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def retrieve(self, batch_id):
+        self.polls += 1
+        status = "ended" if self.polls > 1 else "in_progress"
+        counts = types.SimpleNamespace(succeeded=0, errored=0, processing=len(self.batches[batch_id]))
+        return types.SimpleNamespace(id=batch_id, processing_status=status, request_counts=counts)
+
+    def results(self, batch_id):
+        for request in self.batches[batch_id]:
+            custom_id = request["custom_id"]
+            if custom_id in self.fail_custom_ids:
+                result = types.SimpleNamespace(type="errored", error="overloaded")
+            else:
+                usage = types.SimpleNamespace(input_tokens=10, output_tokens=20)
+                message = types.SimpleNamespace(
+                    content=[types.SimpleNamespace(text=f"Output for {custom_id}")], usage=usage,
+                )
+                result = types.SimpleNamespace(type="succeeded", message=message)
+            yield types.SimpleNamespace(custom_id=custom_id, result=result)
+
+
+def _session(endpoint):
+    client = types.SimpleNamespace(messages=types.SimpleNamespace(batches=endpoint))
+    return GenerationSession(config={**DEFAULT_CONFIG, "api_key": "test"}, client=client)
+
+
+def _jobs():
+    framework = build_effective_framework({"sector_id": "test", "display_name": "Test"})
+    return [
+        {"ticker": ticker, "profile": {"id": f"id-{ticker}", "metadata": {"ticker": ticker}},
+         "framework": framework}
+        for ticker in ("AAA", "RHM.DE")
+    ]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.db"
+    init_db(path)
+    return path
+
+
+class TestBatchGeneration:
+    def test_submit_persists_job(self, db_path):
+        endpoint = MockBatchEndpoint()
+        record = submit_batch(_jobs(), _session(endpoint), db_path)
+
+        assert record["request_count"] == 22
+        stored = get_batch_job(record["id"], db_path)
+        assert stored["status"] == "submitted"
+        assert [j["ticker"] for j in stored["jobs"]] == ["AAA", "RHM.DE"]
+        custom_ids = [r["custom_id"] for r in endpoint.batches[record["id"]]]
+        assert len(set(custom_ids)) == 22
+        assert all(c.replace("-", "").isalnum() for c in custom_ids)
+
+    def test_poll_and_collect_in_later_session(self, db_path):
+        endpoint = MockBatchEndpoint(fail_custom_ids={"t1-s7"})
+        batch_id = submit_batch(_jobs(), _session(endpoint), db_path)["id"]
+
+        # A later invocation only knows the batch ID stored in the database
+        later = _session(endpoint)
+        assert check_batch(batch_id, later, db_path)["processing_status"] == "in_progress"
+        assert check_batch(batch_id, later, db_path)["processing_status"] == "ended"
+        assert get_batch_job(batch_id, db_path)["status"] == "ended"
+
+        results = collect_batch_results(batch_id, later, db_path)
+        assert set(results) == {"AAA", "RHM.DE"}
+        assert [r["section_id"] for r in results["AAA"]] == list(range(1, 12))
+        assert all(r["status"] == "generated" for r in results["AAA"])
+        assert results["AAA"][0]["content"] == "Output for t0-s1"
+        assert results["AAA"][0]["usage"]["output_tokens"] == 20
+        failed = results["RHM.DE"][6]
+        assert failed["status"] == "error"
+        assert "overloaded" in failed["error"]
+
+    def test_unfinished_jobs_listed(self, db_path):
+        submit_batch(_jobs(), _session(MockBatchEndpoint()), db_path)
+        assert len(list_batch_jobs("submitted", db_path)) == 1
@@ -0,0 +1,52 @@
+"""Tests for the pipeline benchmark harness."""
+
+import json
+
+from benchmarks.pipeline import STAGES, compare_to_baseline, main
+
+
+def _run(per_report_ms=5.0, reports_per_minute=600.0, peak_rss_mb=50.0, concurrency=4):
+    return {
+        "params": {"framework": "x", "concurrency": concurrency, "latency": 0.0, "tokens_per_second": 0},
+        "stages": {s: {"seconds": 0.1, "per_report_ms": per_report_ms} for s in STAGES},
+        "reports_per_minute": reports_per_minute,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+class TestCompareToBaseline:
+    def test_within_threshold(self):
+        comparison = compare_to_baseline(_run(per_report_ms=5.5), _run(), threshold=0.2)
+        assert comparison["regressions"] == []
+        assert comparison["note"] == ""
+
+    def test_slower_stages_regress(self):
+        comparison = compare_to_baseline(_run(per_report_ms=7.0), _run(), threshold=0.2)
+        assert "qa.per_report_ms" in comparison["regressions"]
+
+    def test_throughput_drop_regresses(self):
+        comparison = compare_to_baseline(_run(reports_per_minute=400.0), _run(), threshold=0.2)
+        assert comparison["regressions"] == ["reports_per_minute"]
+
+    def test_sub_millisecond_stages_ignored(self):
+        comparison = compare_to_baseline(_run(per_report_ms=0.9), _run(per_report_ms=0.3))
+        assert comparison["regressions"] == []
+
+    def test_parameter_mismatch_noted(self):
+        comparison = compare_to_baseline(_run(concurrency=8), _run())
+        assert "concurrency" in comparison["note"]
+
+
+class TestBenchmarkRun:
+    def test_single_ticker_run(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        assert main(["--tickers", "1", "--repeat", "1", "--baseline", str(baseline),
+                     "--update-baseline"]) == 0
+        result = json.loads(baseline.read_text())
+        assert set(result["stages"]) == set(STAGES)
+        assert result["reports_per_minute"] > 0
+
+        output = tmp_path / "run.json"
+        assert main(["--tickers", "1", "--repeat", "1", "--baseline", str(baseline),
+                     "--threshold", "100", "--output", str(output)]) == 0
+        assert json.loads(output.read_text())["comparison"]["regressions"] == []
@@ -0,0 +1,63 @@
+"""Tests for the section response cache."""
+
+import pytest
+
+from src.db import init_db, save_cached_response
+from src.generator.cache import ResponseCache, response_cache_key
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.db"
+    init_db(path)
+    return path
+
+
+class TestCacheKey:
+    def test_stable(self):
+        assert response_cache_key("m", "sys", "prompt", 100) == response_cache_key("m", "sys", "prompt", 100)
+
+    def test_sensitive_to_every_input(self):
+        base = response_cache_key("m", "sys", "prompt", 100)
+        assert response_cache_key("m2", "sys", "prompt", 100) != base
+        assert response_cache_key("m", "sys2", "prompt", 100) != base
+        assert response_cache_key("m", "sys", "prompt2", 100) != base
+        assert response_cache_key("m", "sys", "prompt", 200) != base
+        assert response_cache_key("m", "sys", "prompt", 100, "fake") != base
+
+
+class TestResponseCache:
+    def test_hit_and_miss_counters(self, db_path):
+        cache = ResponseCache(db_path=db_path)
+        assert cache.get("k1", 1) is None
+        cache.put("k1", "model", "cached text", 1)
+        assert cache.get("k1", 1) == "cached text"
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+
+    def test_refresh_section_bypasses_lookup(self, db_path):
+        cache = ResponseCache(db_path=db_path, refresh_sections={4})
+        cache.put("k4", "model", "stale", 4)
+        assert cache.get("k4", 4) is None
+        assert cache.stats["misses"] == 1
+
+    def test_evict_by_size(self, db_path):
+        cache = ResponseCache(db_path=db_path, max_entries=2)
+        for i in range(5):
+            cache.put(f"k{i}", "model", f"text {i}", i)
+        assert cache.evict() == 3
+
+    def test_evict_by_age(self, db_path):
+        save_cached_response("old", "model", "text", db_path=db_path)
+        cache = ResponseCache(db_path=db_path, max_age_days=-1)
+        assert cache.evict() == 1
+        assert cache.get("old") is None
+
+    def test_missing_table_degrades_to_miss(self, tmp_path):
+        cache = ResponseCache(db_path=tmp_path / "empty.db")
+        assert cache.get("k") is None
+        assert cache.stats["errors"] == 1
+
+    def test_disabled_from_config(self):
+        assert ResponseCache.from_config({"cache_enabled": "false"}) is None
+        assert ResponseCache.from_config({"cache_enabled": True}) is not None
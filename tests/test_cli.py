@@ -0,0 +1,64 @@
+"""Tests for CLI commands, run offline against the fake backend."""
+
+import pytest
+from click.testing import CliRunner
+
+from src import cli
+from src.config import DEFAULT_CONFIG
+from src.db import close_databases, get_latest_report
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Invoke the CLI against a throwaway database, output dir and config."""
+    db_path = tmp_path / "reports.db"
+    config = {**DEFAULT_CONFIG, "backend": "fake", "cache_enabled": False, "section_packs": []}
+    monkeypatch.setattr("src.db.DB_PATH", db_path)
+    monkeypatch.setattr("src.output.markdown.OUTPUT_DIR", tmp_path / "output")
+    monkeypatch.setattr(cli.fm, "db_path", db_path)
+    monkeypatch.setattr(cli, "load_config", lambda: dict(config))
+    monkeypatch.setattr("src.generator.writer.load_config", lambda: dict(config))
+    runner = CliRunner()
+
+    def invoke(*args, input=None):
+        return runner.invoke(cli.main, list(args), input=input)
+
+    invoke.config = config
+    assert invoke("init").exit_code == 0
+    yield invoke
+    close_databases()
+
+
+def _new_report(run, ticker="AAA"):
+    framework_id = cli.fm.list()[0]["id"]
+    result = run("report", "new", ticker, "--framework", framework_id, "--no-fetch", input="\n" * 30)
+    assert result.exit_code == 0, result.output
+
+
+class TestReportGenerate:
+    def test_generate(self, run):
+        _new_report(run)
+        result = run("report", "generate", "AAA")
+        assert result.exit_code == 0, result.output
+        assert get_latest_report("AAA")["status"] == "complete"
+
+    def test_deadline_with_queued_sections(self, run):
+        run.config["fake_backend"] = {"latency": 0.3}
+        _new_report(run)
+        result = run("report", "generate", "AAA", "--concurrency", "2", "--deadline", "0.2")
+        assert result.exit_code == 0, result.output
+        assert "timed out" in result.output
+        assert "--resume" in result.output
+        statuses = {s["status"] for s in get_latest_report("AAA")["sections"]}
+        assert "timeout" in statuses
+
+
+class TestReportGenerateBatch:
+    def test_fake_backend_unsupported(self, run, tmp_path):
+        _new_report(run)
+        tickers = tmp_path / "tickers.txt"
+        tickers.write_text("AAA\n")
+        result = run("report", "generate-batch", "--tickers-file", str(tickers))
+        assert result.exit_code == 0, result.output
+        assert result.exception is None
+        assert "does not support the Message Batches API" in result.output
@@ -0,0 +1,254 @@
+"""Tests for the pooled database layer."""
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from src.db import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    close_databases,
+    get_company,
+    get_database,
+    get_framework,
+    get_latest_report,
+    get_report,
+    get_reports_for_company,
+    init_db,
+    list_report_metadata,
+    save_company,
+    save_framework,
+    save_many_companies,
+    save_many_frameworks,
+    save_many_reports,
+    save_report,
+    schema_version,
+    update_report,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.db"
+    init_db(path)
+    save_framework({"id": "f1"}, path)
+    yield path
+    close_databases()
+
+
+def _company(ticker):
+    return {"id": ticker.lower(), "metadata": {"ticker": ticker, "sector_framework": "f1"}}
+
+
+class TestDatabase:
+    def test_connection_reused_per_thread(self, db_path):
+        db = get_database(db_path)
+        assert get_database(db_path) is db
+        assert db.connection() is db.connection()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not db.connection()
+
+    def test_transaction_commits_together(self, db_path):
+        db = get_database(db_path)
+        with db.transaction():
+            save_company(_company("AAA"), db_path)
+            with db.transaction():
+                save_company(_company("BBB"), db_path)
+        assert get_company("aaa", db_path) and get_company("bbb", db_path)
+
+    def test_transaction_rolls_back(self, db_path):
+        db = get_database(db_path)
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                save_company(_company("AAA"), db_path)
+                raise RuntimeError("boom")
+        assert get_company("aaa", db_path) is None
+
+    def test_uncommitted_writes_invisible_to_other_threads(self, db_path):
+        db = get_database(db_path)
+        seen = []
+        with db.transaction():
+            save_framework({"id": "f2"}, db_path)
+            thread = threading.Thread(target=lambda: seen.append(get_framework("f2", db_path)))
+            thread.start()
+            thread.join()
+        assert seen == [None]
+        assert get_framework("f2", db_path)["id"] == "f2"
+
+    def test_close_databases(self, db_path):
+        conn = get_database(db_path).connection()
+        close_databases()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        assert get_framework("missing", db_path) is None
+
+
+def _report(*section_ids):
+    return {
+        "id": "r1", "company_id": "aaa", "framework_id": "f1", "status": "draft",
+        "sections": [
+            {"section_id": sid, "name": f"S{sid}", "content": f"Body {sid}.", "word_count": 2,
+             "status": "generated", "usage": {"input_tokens": 10, "output_tokens": 5}}
+            for sid in section_ids
+        ],
+    }
+
+
+class TestReportSections:
+    @pytest.fixture(autouse=True)
+    def _company(self, db_path):
+        save_company(_company("AAA"), db_path)
+
+    def _rows(self, db_path):
+        return get_database(db_path).query(
+            "SELECT section_id, position, output_tokens, updated_at FROM report_sections ORDER BY position"
+        )
+
+    def test_round_trip(self, db_path):
+        report = _report(2, 1, 3)
+        save_report(report, db_path)
+        loaded = get_report("r1", db_path)
+        assert loaded["sections"] == report["sections"]
+        assert [r["section_id"] for r in self._rows(db_path)] == [2, 1, 3]
+        assert get_reports_for_company("AAA", db_path)[0]["sections"] == report["sections"]
+        blob = get_database(db_path).query_one("SELECT sections FROM reports WHERE id = 'r1'")
+        assert blob["sections"] == "[]"
+
+    def test_only_changed_sections_rewritten(self, db_path):
+        report = _report(1, 2, 3)
+        save_report(report, db_path)
+        before = {r["section_id"]: r["updated_at"] for r in self._rows(db_path)}
+        report["sections"][1] = {**report["sections"][1], "content": "New body."}
+        del report["sections"][2]
+        save_report(report, db_path)
+        after = {r["section_id"]: r["updated_at"] for r in self._rows(db_path)}
+        assert set(after) == {1, 2}
+        assert after[1] == before[1]
+        assert after[2] != before[2]
+        assert get_report("r1", db_path)["sections"][1]["content"] == "New body."
+
+    def test_update_report_keeps_sections(self, db_path):
+        save_report(_report(1, 2), db_path)
+        assert update_report("r1", {"qa_results": {"passed": True}, "status": "complete"}, db_path)
+        loaded = get_report("r1", db_path)
+        assert loaded["qa_results"] == {"passed": True}
+        assert loaded["status"] == "complete"
+        assert len(loaded["sections"]) == 2
+        assert not update_report("missing", {"status": "complete"}, db_path)
+        with pytest.raises(ValueError):
+            update_report("r1", {"sections": []}, db_path)
+
+
+class TestReportQueries:
+    @pytest.fixture(autouse=True)
+    def _reports(self, db_path):
+        save_company(_company("AAA"), db_path)
+        for rid in ("old", "new"):
+            save_report({**_report(1, 2), "id": rid, "citations": [{"url": "u"}]}, db_path)
+
+    def test_latest_report(self, db_path):
+        latest = get_latest_report("aaa", db_path)
+        assert latest["id"] == "new"
+        assert latest["citations"] == [{"url": "u"}]
+        assert [s["section_id"] for s in latest["sections"]] == [1, 2]
+        assert get_latest_report("ZZZ", db_path) is None
+
+    def test_json_decoded_on_first_access(self, db_path, monkeypatch):
+        latest = get_latest_report("AAA", db_path)
+        decoded = []
+        loads = json.loads
+        monkeypatch.setattr("src.db.json.loads", lambda text: decoded.append(text) or loads(text))
+        assert latest["status"] == "draft"
+        assert decoded == []
+        assert latest["output_paths"] == {}
+        assert latest["output_paths"] == {}
+        assert len(decoded) == 1
+        copied = {**latest}
+        assert copied["sections"][0]["content"] == "Body 1."
+        assert json.loads(json.dumps(latest))["citations"] == [{"url": "u"}]
+
+    def test_metadata_only(self, db_path):
+        rows = list_report_metadata("AAA", db_path)
+        assert [r["id"] for r in rows] == ["new", "old"]
+        assert "sections" not in rows[0] and "citations" not in rows[0]
+        assert rows[0]["word_count"] == 0
+
+
+class TestBulkWrites:
+    def test_save_many_companies_in_chunks(self, db_path):
+        companies = [_company(f"T{i:03d}") for i in range(25)]
+        ids = save_many_companies(companies, chunk_size=10, db_path=db_path)
+        assert ids == [c["id"] for c in companies]
+        assert get_database(db_path).query_one("SELECT COUNT(*) FROM companies")[0] == 25
+        assert get_company("t007", db_path)["ticker"] == "T007"
+
+    def test_failed_chunk_rolled_back(self, db_path):
+        companies = [_company("AAA"), _company("BBB"), _company("CCC")]
+        companies[2]["metadata"]["sector_framework"] = "missing"
+        with pytest.raises(sqlite3.IntegrityError):
+            save_many_companies(companies, chunk_size=2, db_path=db_path)
+        assert get_company("aaa", db_path) and get_company("bbb", db_path)
+        assert get_company("ccc", db_path) is None
+
+    def test_save_many_reports_and_frameworks(self, db_path):
+        assert save_many_frameworks([{"id": "f2"}, {"sector_id": "f3"}], db_path=db_path) == ["f2", "f3"]
+        save_company(_company("AAA"), db_path)
+        reports = [{**_report(1, 2), "id": rid} for rid in ("r1", "r2")]
+        assert save_many_reports(reports, db_path=db_path) == ["r1", "r2"]
+        assert [s["section_id"] for s in get_report("r2", db_path)["sections"]] == [1, 2]
+        assert sorted(r["id"] for r in list_report_metadata("AAA", db_path)) == ["r1", "r2"]
+
+
+class TestMigrations:
+    def test_fresh_database_at_latest_version(self, db_path):
+        assert schema_version(db_path) == SCHEMA_VERSION
+        assert init_db(db_path) == []
+
+    def test_unversioned_database_upgraded(self, tmp_path):
+        path = tmp_path / "old.db"
+        get_database(path).executescript(MIGRATIONS[0])
+        assert schema_version(path) == 0
+        assert init_db(path) == list(range(1, SCHEMA_VERSION + 1))
+        indexes = {r["name"] for r in get_database(path).query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_companies_ticker", "idx_reports_company"} <= indexes
+
+    def test_ticker_lookup_uses_index(self, db_path):
+        plan = get_database(db_path).query(
+            "EXPLAIN QUERY PLAN SELECT * FROM companies WHERE ticker = ? ORDER BY updated_at DESC LIMIT 1",
+            ("AAA",),
+        )
+        assert "idx_companies_ticker" in plan[0]["detail"]
+
+    def test_failed_migration_rolled_back(self, db_path, monkeypatch):
+        monkeypatch.setattr("src.db.MIGRATIONS", [*MIGRATIONS, "CREATE TABLE extra (id INTEGER); SELECT * FROM missing;"])
+        monkeypatch.setattr("src.db.SCHEMA_VERSION", SCHEMA_VERSION + 1)
+        with pytest.raises(sqlite3.OperationalError):
+            init_db(db_path)
+        assert schema_version(db_path) == SCHEMA_VERSION
+        assert get_database(db_path).query_one("SELECT name FROM sqlite_master WHERE name = 'extra'") is None
+
+    def test_newer_database_refused(self, db_path):
+        get_database(db_path).execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        with pytest.raises(RuntimeError, match="newer"):
+            init_db(db_path)
+
+    def test_section_blobs_moved_to_rows(self, tmp_path):
+        path = tmp_path / "old.db"
+        db = get_database(path)
+        for script in MIGRATIONS[:2]:
+            db.executescript(script)
+        db.execute("PRAGMA user_version = 2")
+        db.execute("INSERT INTO frameworks (id, name, display_name, config) VALUES ('f1', 'f1', 'f1', '{}')")
+        db.execute(
+            "INSERT INTO reports (id, framework_id, sections, citations) VALUES (?, 'f1', ?, '[]')",
+            ("r1", json.dumps(_report(1, 2)["sections"])),
+        )
+        assert init_db(path) == list(range(3, SCHEMA_VERSION + 1))
+        assert get_report("r1", path)["sections"] == _report(1, 2)["sections"]
+        tokens = db.query("SELECT output_tokens FROM report_sections ORDER BY position")
+        assert [r["output_tokens"] for r in tokens] == [5, 5]
@@ -84,6 +84,11 @@ class TestBaseFramework:
         with pytest.raises(ValueError):
             build_effective_section(99)
 
+    def test_summaries_depend_on_body_sections(self):
+        assert get_base_section(1)["depends_on"] == list(range(2, 11))
+        assert get_base_section(11)["depends_on"] == list(range(2, 11))
+        assert all("depends_on" not in get_base_section(i) for i in range(2, 11))
+
 
 # ── Framework Validation Tests ──
 
@@ -112,6 +117,26 @@ class TestFrameworkValidator:
         errors = validate_framework(fw)
         assert any("Invalid section ID" in e for e in errors)
 
+    def test_invalid_dependency(self):
+        fw = {
+            "sector_id": "test",
+            "display_name": "Test",
+            "section_overrides": {"1": {"depends_on": [1, 42]}},
+        }
+        errors = validate_framework(fw)
+        assert any("itself" in e for e in errors)
+        assert any("invalid section 42" in e for e in errors)
+
+    def test_dependency_cycle(self):
+        fw = {
+            "sector_id": "test",
+            "display_name": "Test",
+            "section_overrides": {"2": {"depends_on": [3]}, "3": {"depends_on": [2]}},
+        }
+        errors = validate_framework(fw)
+        assert "Section dependency cycle: sections [1, 2, 3, 11]" in errors
+        assert validate_framework({**fw, "section_overrides": {"2": {"depends_on": [3]}}}) == []
+
 
 # ── Framework Manager Tests ──
 
@@ -186,6 +211,11 @@ class TestFrameworkManager:
         assert errors == []
         assert manager.get(fid) is not None
 
+    def test_load_builtin_frameworks(self, manager):
+        count = manager.load_builtin_frameworks()
+        assert count >= 1
+        assert len(manager.list()) == count
+
 
 # ── Effective Framework Build Tests ──
 
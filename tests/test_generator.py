@@ -2,10 +2,27 @@
 
 import json
 
+import pytest
+
+from src.db import get_generation_usage, get_report, init_db, save_company, save_framework
 from src.frameworks.base import build_effective_framework
-from src.generator.assembler import assemble_report, render_report_markdown
+from src.generator.assembler import (
+    assemble_report,
+    checkpoint_section,
+    find_resumable_report,
+    render_report_markdown,
+    save_assembled_report,
+    split_resume_sections,
+    start_report_checkpoint,
+)
 from src.generator.profiler import create_company_profile
-from src.generator.prompts import build_section_prompt
+from src.generator.prompts import (
+    SYSTEM_PROMPT,
+    build_request_payload,
+    build_section_digest,
+    build_section_prompt,
+    build_section_prompt_parts,
+)
 
 
 def _sample_profile():
@@ -91,6 +108,58 @@ class TestPromptBuilder:
         assert "[1] Q4 Earnings" in prompt
 
 
+    def test_shared_context_identical_across_sections(self):
+        framework = build_effective_framework(_sample_framework())
+        profile = _sample_profile()
+        citations = [{"id": 1, "title": "Q4 Earnings", "subject": "Revenue data"}]
+
+        parts = [
+            build_section_prompt_parts(s, profile, citations=citations, full_framework=framework)
+            for s in framework["sections"]
+        ]
+        assert len({shared for shared, _ in parts}) == 1
+        assert len({instructions for _, instructions in parts}) == 11
+        shared = parts[0][0]
+        assert "[1] Q4 Earnings" in shared
+        assert "11. Conclusion & Monitoring Framework" in shared
+        assert "Section 1" not in shared
+
+    def test_dependency_digests_in_instructions(self):
+        framework = build_effective_framework(_sample_framework())
+        body = {
+            "section_id": 7, "name": "Financial Performance Deep Dive", "status": "generated",
+            "content": "## P&L\n\nRevenue rose 12% to $4.1B [3]. Margins held.\n\n| A | B |\n|---|---|",
+        }
+        shared, instructions = build_section_prompt_parts(
+            framework["sections"][0], _sample_profile(), full_framework=framework,
+            dependencies=[body],
+        )
+        assert "Findings From Completed Sections" in instructions
+        assert "- Revenue rose 12% to $4.1B [3]." in instructions
+        assert "Margins held" not in instructions
+        assert "Findings" not in shared
+
+    def test_digest_is_capped(self):
+        content = "\n\n".join(f"Paragraph {i} has several words in it. Extra." for i in range(50))
+        digest = build_section_digest({"section_id": 4, "name": "Ops", "content": content}, max_words=30)
+        assert digest.startswith("### Section 4: Ops")
+        assert len(digest.split()) < 45
+
+    def test_payload_marks_shared_prefix_cacheable(self):
+        system, messages = build_request_payload("shared", "instructions")
+        assert system == [{"type": "text", "text": SYSTEM_PROMPT}]
+        blocks = messages[0]["content"]
+        assert blocks[0] == {
+            "type": "text", "text": "shared", "cache_control": {"type": "ephemeral"},
+        }
+        assert blocks[1] == {"type": "text", "text": "instructions"}
+
+    def test_payload_without_prompt_caching(self):
+        system, messages = build_request_payload("shared", "instructions", prompt_caching=False)
+        assert system == SYSTEM_PROMPT
+        assert messages == [{"role": "user", "content": "shared\n\ninstructions"}]
+
+
 class TestAssembler:
     def test_assemble_report(self):
         sections = [
@@ -151,6 +220,104 @@ class TestAssembler:
         assert "Section 1" in md
         assert "Section 11" in md
 
+    def test_render_timed_out_section(self):
+        sections = [
+            {"section_id": 1, "name": "Section 1", "content": "Body.", "word_count": 1, "status": "generated"},
+            {"section_id": 2, "name": "Section 2", "content": "", "word_count": 0,
+             "status": "timeout", "error": "Not started before the report deadline"},
+        ]
+        profile = _sample_profile()
+        report = assemble_report(sections, profile, build_effective_framework(_sample_framework()))
+
+        md = render_report_markdown(report, profile)
+        assert report["status"] == "draft"
+        assert "> **Timed Out:** Not started before the report deadline" in md
+
+
+def _section_result(section_id, status="generated"):
+    return {
+        "section_id": section_id,
+        "name": f"Section {section_id}",
+        "content": "" if status != "generated" else f"Content {section_id}.",
+        "word_count": 0 if status != "generated" else 2,
+        "status": status,
+        "error": None if status == "generated" else "API error",
+    }
+
+
+class TestCheckpointing:
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        path = tmp_path / "test.db"
+        init_db(path)
+        save_framework(_sample_framework(), path)
+        save_company(_sample_profile(), path)
+        return path
+
+    def test_sections_persisted_as_they_complete(self, db_path):
+        framework = build_effective_framework(_sample_framework())
+        report = start_report_checkpoint(_sample_profile(), framework, db_path)
+        assert get_report(report["id"], db_path)["status"] == "in_progress"
+
+        checkpoint_section(report, _section_result(3), db_path)
+        checkpoint_section(report, _section_result(1), db_path)
+        stored = get_report(report["id"], db_path)
+        assert [s["section_id"] for s in stored["sections"]] == [1, 3]
+        assert stored["word_count"] == 4
+
+    def test_section_usage_recorded(self, db_path):
+        framework = build_effective_framework(_sample_framework())
+        report = start_report_checkpoint(_sample_profile(), framework, db_path)
+        result = _section_result(3)
+        result.update(
+            model="claude-test", max_tokens=1000, estimated_input_tokens=900, latency_seconds=2.5,
+            usage={"input_tokens": 100, "output_tokens": 700,
+                   "cache_read_input_tokens": 800, "cache_creation_input_tokens": 0},
+        )
+        checkpoint_section(report, result, db_path)
+        checkpoint_section(report, _section_result(4, status="error"), db_path)
+
+        rows = get_generation_usage([report["id"]], db_path)
+        assert len(rows) == 1
+        assert rows[0]["section_id"] == 3
+        assert rows[0]["output_tokens"] == 700
+        assert rows[0]["cache_read_input_tokens"] == 800
+        assert rows[0]["latency_seconds"] == 2.5
+
+    def test_checkpoint_replaces_section(self, db_path):
+        framework = build_effective_framework(_sample_framework())
+        report = start_report_checkpoint(_sample_profile(), framework, db_path)
+        checkpoint_section(report, _section_result(2, status="error"), db_path)
+        checkpoint_section(report, _section_result(2), db_path)
+        stored = get_report(report["id"], db_path)
+        assert len(stored["sections"]) == 1
+        assert stored["sections"][0]["status"] == "generated"
+
+    def test_resume_regenerates_missing_and_errored(self, db_path):
+        framework = build_effective_framework(_sample_framework())
+        report = start_report_checkpoint(_sample_profile(), framework, db_path)
+        for sid in (1, 2, 3):
+            checkpoint_section(report, _section_result(sid), db_path)
+        checkpoint_section(report, _section_result(4, status="error"), db_path)
+
+        resumable = find_resumable_report("TEST", db_path)
+        assert resumable["id"] == report["id"]
+        kept, pending = split_resume_sections(resumable, framework)
+        assert [s["section_id"] for s in kept] == [1, 2, 3]
+        assert [s["id"] for s in pending] == list(range(4, 12))
+
+    def test_complete_report_not_resumable(self, db_path):
+        framework = build_effective_framework(_sample_framework())
+        sections = [_section_result(i) for i in range(1, 12)]
+        report = start_report_checkpoint(_sample_profile(), framework, db_path)
+        for result in sections:
+            checkpoint_section(report, result, db_path)
+        final = assemble_report(sections, _sample_profile(), framework, report_id=report["id"])
+        assert final["id"] == report["id"]
+        assert final["status"] == "complete"
+        save_assembled_report(final, db_path)
+        assert find_resumable_report("TEST", db_path) is None
+
 
 class TestProfiler:
     def test_create_profile_no_fetch(self):
@@ -0,0 +1,187 @@
+"""Tests for hedged requests."""
+
+import threading
+import time
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.db import init_db, save_generation_usage
+from src.frameworks.base import build_effective_framework
+from src.generator.backends import FakeBackend
+from src.generator.hedging import HedgeLost, HedgePolicy, claim_response, percentile
+from src.generator.ratelimit import RateLimiter
+from src.generator.writer import GenerationSession, write_section, write_section_pack
+
+
+def _policy(latency=0.05, **options):
+    return HedgePolicy([(1, latency)] * 20, **{"max_fraction": 1.0, **options})
+
+
+class _SlowFirstBackend(FakeBackend):
+    """Fake backend whose first call stalls."""
+
+    def __init__(self, stall=1.0):
+        super().__init__(tokens_per_second=20000)
+        self.stall = stall
+        self._first = threading.Lock()
+
+    def complete(self, request):
+        if self._first.acquire(blocking=False):
+            time.sleep(self.stall)
+        return super().complete(request)
+
+    def stream(self, request, on_text):
+        if self._first.acquire(blocking=False):
+            time.sleep(self.stall)
+        return super().stream(request, on_text)
+
+
+class TestHedgePolicy:
+    def test_percentile(self):
+        assert percentile(range(1, 101), 95) == 95
+        assert percentile([3.0], 50) == 3.0
+
+    def test_threshold_falls_back_to_pooled_samples(self):
+        policy = HedgePolicy([(1, 1.0)] * 5 + [(2, 3.0)] * 5, pct=50, min_samples=8)
+        assert policy.threshold(1) == 1.0
+        assert policy.threshold(3) == 1.0
+        assert HedgePolicy([(1, 1.0)] * 3, min_samples=8).threshold(1) is None
+
+    def test_duplicate_wins_over_stalled_call(self):
+        policy = _policy()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(1.0 if len(calls) == 1 else 0.0)
+            return len(calls)
+
+        started = time.monotonic()
+        assert policy.call(fn, 1) == 2
+        assert time.monotonic() - started < 0.5
+        assert policy.stats == {"calls": 1, "hedged": 1, "hedge_wins": 1, "discarded": 0}
+
+    def test_fast_call_not_hedged(self):
+        policy = _policy(latency=1.0)
+        assert policy.call(lambda: "ok", 1) == "ok"
+        assert policy.stats["hedged"] == 0
+
+    def test_hedges_capped_by_fraction(self):
+        policy = _policy(latency=0.01, max_fraction=0.0)
+        assert policy.call(lambda: time.sleep(0.05) or "slow", 1) == "slow"
+        assert policy.stats == {"calls": 1, "hedged": 0, "hedge_wins": 0, "discarded": 0}
+
+    def test_streaming_loser_is_aborted(self):
+        policy = _policy(latency=0.02)
+        started = threading.Event()
+        lost = []
+
+        def fn():
+            if not started.is_set():
+                started.set()
+                time.sleep(0.1)
+            if not claim_response():
+                lost.append(1)
+                raise HedgeLost()
+            return "streamed"
+
+        assert policy.call(fn, 1) == "streamed"
+        assert policy.stats["hedge_wins"] == 1
+        time.sleep(0.15)
+        assert lost == [1]
+
+    def test_late_loser_handed_to_on_discard(self):
+        policy = _policy()
+        calls = []
+        discarded = []
+
+        def fn():
+            calls.append(1)
+            attempt = len(calls)
+            time.sleep(0.15 if attempt == 1 else 0.0)
+            return attempt
+
+        assert policy.call(fn, 1, discarded.append) == 2
+        time.sleep(0.25)
+        assert discarded == [1]
+        assert policy.stats["discarded"] == 1
+
+    def test_error_raised_when_every_attempt_fails(self):
+        policy = _policy(latency=0.01)
+
+        def fail():
+            time.sleep(0.03)
+            raise RuntimeError("overloaded")
+
+        with pytest.raises(RuntimeError):
+            policy.call(fail, 1)
+
+    def test_from_config(self, tmp_path):
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+        for latency in (1.0, 2.0, 3.0):
+            save_generation_usage({
+                "report_id": "r1", "section_id": 4, "model": "m", "status": "generated",
+                "cached": False, "latency_seconds": latency,
+            }, db_path)
+        assert HedgePolicy.from_config(DEFAULT_CONFIG, "m", db_path) is None
+        config = {**DEFAULT_CONFIG, "hedge_requests": True, "hedge_min_samples": 3, "hedge_percentile": 50}
+        assert HedgePolicy.from_config(config, "m", db_path).threshold(4) == 2.0
+
+    def test_pack_latencies_ignored(self, tmp_path):
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+        for latency, packed in ((1.0, False), (9.0, True)):
+            save_generation_usage({
+                "report_id": "r1", "section_id": 4, "model": "m", "status": "generated",
+                "cached": False, "latency_seconds": latency, "packed": packed,
+            }, db_path)
+        config = {**DEFAULT_CONFIG, "hedge_requests": True, "hedge_min_samples": 1, "hedge_percentile": 100}
+        assert HedgePolicy.from_config(config, "m", db_path).threshold(4) == 1.0
+
+
+class TestHedgedSections:
+    def _session(self, backend):
+        config = {**DEFAULT_CONFIG, "backend": "fake", "prompt_caching": False}
+        session = GenerationSession(config=config, limiter=RateLimiter(), backend=backend)
+        session.hedging = _policy()
+        return session
+
+    def test_stalled_section_hedged(self):
+        session = self._session(_SlowFirstBackend())
+        section = build_effective_framework({"sector_id": "t", "display_name": "T"})["sections"][3]
+        started = time.monotonic()
+        result = write_section(section, {"id": "p1", "metadata": {"ticker": "T"}}, session=session)
+        assert result["status"] == "generated"
+        assert result["latency_seconds"] < 0.5
+        assert time.monotonic() - started < 0.5
+        assert session.hedging.stats["hedge_wins"] == 1
+
+    def test_stream_deltas_come_from_winner_only(self):
+        session = self._session(_SlowFirstBackend(stall=0.3))
+        section = build_effective_framework({"sector_id": "t", "display_name": "T"})["sections"][3]
+        deltas = []
+        result = write_section(
+            section, {"id": "p1", "metadata": {"ticker": "T"}}, session=session,
+            on_delta=lambda sid, text: deltas.append(text),
+        )
+        time.sleep(0.4)  # let the stalled attempt reach its first delta and abort
+        assert result["status"] == "generated"
+        assert "".join(deltas) == result["content"]
+
+    def test_losing_call_usage_counted(self):
+        session = self._session(_SlowFirstBackend(stall=0.2))
+        section = build_effective_framework({"sector_id": "t", "display_name": "T"})["sections"][3]
+        result = write_section(section, {"id": "p1", "metadata": {"ticker": "T"}}, session=session)
+        time.sleep(0.4)  # let the stalled attempt finish in the background
+        assert session.hedging.stats["discarded"] == 1
+        assert session.usage["output_tokens"] == 2 * result["usage"]["output_tokens"]
+
+    def test_packs_not_hedged(self):
+        session = self._session(_SlowFirstBackend(stall=0.2))
+        sections = build_effective_framework({"sector_id": "t", "display_name": "T"})["sections"][3:5]
+        results = write_section_pack(sections, {"id": "p1", "metadata": {"ticker": "T"}}, session=session)
+        assert [r["status"] for r in results] == ["generated", "generated"]
+        assert session.hedging.stats == {"calls": 0, "hedged": 0, "hedge_wins": 0, "discarded": 0}
+        assert len(session.hedging._samples[1]) == 20
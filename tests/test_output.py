@@ -0,0 +1,131 @@
+"""Tests for markdown output and the live partial file."""
+
+import pytest
+
+from src.output.markdown import (
+    ABORTED_MARKER,
+    PartialReportWriter,
+    export_markdown,
+    find_partial,
+    follow_partial,
+    partial_path,
+)
+
+
+def _profile():
+    return {"id": "p1", "metadata": {"name": "Test Corp", "ticker": "TEST"}}
+
+
+def _sections():
+    return [{"id": i, "name": f"Section {i}"} for i in range(1, 4)]
+
+
+def _result(section_id, content, status="generated"):
+    return {
+        "section_id": section_id,
+        "name": f"Section {section_id}",
+        "content": content,
+        "word_count": len(content.split()),
+        "status": status,
+        "error": None if status == "generated" else "API error",
+    }
+
+
+class TestPartialReportWriter:
+    def test_flushes_at_paragraph_boundaries(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        with PartialReportWriter(path, _profile(), _sections()) as partial:
+            partial.write_delta(2, "## Backdrop\n\nFirst para")
+            partial.write_delta(2, "graph done.\n\nSecond ha")
+            text = path.read_text()
+            assert "First paragraph done." in text
+            assert "Second" not in text
+            partial.section_done(_result(2, "## Backdrop\n\nFirst paragraph done.\n\nSecond half."))
+            assert path.read_text().count("First paragraph done.") == 1
+            assert "Second half." in path.read_text()
+
+    def test_no_early_flush_before_first_paragraph(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        with PartialReportWriter(path, _profile(), _sections()) as partial:
+            partial.write_delta(2, "\n")
+            partial.write_delta(2, "## Backdrop\n\nBody.")
+            partial.section_done(_result(2, "\n## Backdrop\n\nBody."))
+        text = path.read_text()
+        assert "## Section 2" not in text
+        assert text.count("## Backdrop") == 1
+
+    def test_aborted_run_marked(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        with pytest.raises(KeyboardInterrupt):
+            with PartialReportWriter(path, _profile(), _sections()) as partial:
+                partial.write_delta(2, "Two A.\n\n")
+                raise KeyboardInterrupt
+        assert path.read_text().endswith(ABORTED_MARKER)
+
+    def test_sections_stay_contiguous(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        with PartialReportWriter(path, _profile(), _sections()) as partial:
+            partial.write_delta(2, "Two A.\n\n")
+            partial.write_delta(3, "Three A.\n\n")
+            partial.write_delta(3, "Three B.")
+            partial.section_done(_result(3, "Three A.\n\nThree B."))
+            assert "Three" not in path.read_text()
+            partial.write_delta(2, "Two B.")
+            partial.section_done(_result(2, "Two A.\n\nTwo B."))
+        text = path.read_text()
+        assert text.index("Two B.") < text.index("## Section 3") < text.index("Three B.")
+
+    def test_non_streamed_and_failed_sections(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        with PartialReportWriter(path, _profile(), _sections()) as partial:
+            partial.section_done(_result(1, "Cached summary."))
+            partial.section_done(_result(2, "", status="error"))
+        text = path.read_text()
+        assert "## Section 1\n\nCached summary." in text
+        assert "> **Generation Error:** API error" in text
+
+    def test_export_replaces_partial(self, tmp_path):
+        path = partial_path("TEST", "2026-01-01", tmp_path)
+        PartialReportWriter(path, _profile(), _sections()).close()
+        assert find_partial("TEST", tmp_path) == path
+
+        report = {"report_date": "2026-01-01", "sections": [_result(1, "Body.")], "word_count": 1}
+        final = export_markdown(report, _profile(), tmp_path)
+        assert final.name == "2026-01-01_report.md"
+        assert not path.exists()
+        assert find_partial("TEST", tmp_path) is None
+        assert sorted(p.name for p in final.parent.iterdir()) == ["2026-01-01_report.md"]
+
+
+class TestFollow:
+    def test_tails_until_removed(self, tmp_path):
+        path = tmp_path / "live.partial.md"
+        path.write_text("Hello ")
+
+        def append():
+            with path.open("a") as f:
+                f.write("wörld")
+
+        steps = iter([append, path.unlink])
+        emitted = []
+        assert follow_partial(path, emitted.append, sleep=lambda _: next(steps)()) is True
+        assert "".join(emitted) == "Hello wörld"
+
+    def test_stops_at_abort_marker(self, tmp_path):
+        path = tmp_path / "live.partial.md"
+        partial = PartialReportWriter(path, _profile(), _sections())
+        partial.close(aborted=True)
+        emitted = []
+        assert follow_partial(path, emitted.append, sleep=lambda _: pytest.fail("should not wait")) is False
+        assert "".join(emitted).endswith(ABORTED_MARKER)
+
+    def test_stops_on_stale_file(self, tmp_path):
+        path = tmp_path / "live.partial.md"
+        path.write_text("Half a report")
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        assert follow_partial(path, lambda text: None, sleep=sleep, stale_after=10, clock=lambda: now[0]) is False
+        assert now[0] == pytest.approx(10)
@@ -1,6 +1,6 @@
 """Tests for the QA engine."""
 
-from src.generator.qa import run_qa_checks, format_qa_report
+from src.generator.qa import failed_sections, run_qa_checks, format_qa_report
 
 
 def _make_section(section_id, content="", word_count=None, status="generated"):
@@ -50,6 +50,26 @@ class TestQAChecks:
         results = run_qa_checks(report)
         assert not results["tone"]["no_first_person"]["pass"]
 
+    def test_tone_hits_collected_per_section(self):
+        sections = [_make_section(i, "Revenue grew 15%.") for i in range(1, 12)]
+        sections[2] = _make_section(3, "An incredible, massive quarter.")
+        sections[6] = _make_section(7, "Margins were massive; i.e. our view held.")
+        sections[8] = _make_section(9, "We believe it.", status="error")
+        tone = run_qa_checks({"sections": sections, "citations": []})["tone"]
+        assert tone["no_hype_language"]["message"] == "Hype words found: massive, incredible"
+        assert tone["no_hype_language"]["sections"] == [3, 7]
+        assert tone["no_first_person"]["sections"] == [7]
+
+    def test_timed_out_sections_reported(self):
+        sections = [_make_section(i, "Some content. " * 50) for i in range(1, 11)]
+        sections.append(_make_section(11, status="timeout"))
+        report = {"sections": sections, "citations": [], "word_count": 7000}
+        check = run_qa_checks(report)["structure"]["section_generation_status"]
+        assert not check["pass"]
+        assert check["message"] == "Section 11: timed out"
+        assert check["timed_out"] == [11]
+        assert failed_sections(run_qa_checks(report))[11] == []
+
     def test_format_qa_report(self):
         sections = [_make_section(i, "Content. " * 80) for i in range(1, 12)]
         report = {"sections": sections, "citations": [], "word_count": 8500}
@@ -57,3 +77,40 @@ class TestQAChecks:
         formatted = format_qa_report(results)
         assert "Quality Assurance Report" in formatted
         assert "Structure" in formatted
+
+
+class TestFailedSections:
+    def _report(self, overrides):
+        table = "| Metric | Value |\n|---|---|\n| Revenue | $1B |\n"
+        sections = [_make_section(i, table + "Revenue grew 15%; impact is limited.") for i in range(1, 12)]
+        for section_id, section in overrides.items():
+            sections[section_id - 1] = section
+        return {"sections": sections, "citations": [], "word_count": 500}
+
+    def test_maps_content_checks_to_sections(self):
+        report = self._report({
+            7: _make_section(7, "No table here."),
+            10: _make_section(10, "Risks exist."),
+        })
+        repairs = failed_sections(run_qa_checks(report))
+        assert set(repairs) == {7, 10}
+        assert "Missing financial table" in repairs[7][0]
+        assert "probability" in repairs[10][0]
+
+    def test_tone_failures_map_to_offending_section(self):
+        report = self._report({4: _make_section(4, "We see a massive opportunity.")})
+        repairs = failed_sections(run_qa_checks(report))
+        assert list(repairs) == [4]
+        assert len(repairs[4]) == 2
+
+    def test_ungenerated_sections_have_no_notes(self):
+        report = self._report({3: _make_section(3, "", status="error")})
+        del report["sections"][10]
+        repairs = failed_sections(run_qa_checks(report))
+        assert repairs[3] == []
+        assert repairs[11] == []
+
+    def test_report_wide_failures_not_mapped(self):
+        results = run_qa_checks(self._report({}))
+        assert not results["structure"]["total_word_count"]["pass"]
+        assert failed_sections(results) == {}
@@ -0,0 +1,135 @@
+"""Tests for quick mode and multi-section prompts."""
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.db import get_recent_latencies, init_db
+from src.frameworks.base import build_effective_framework
+from src.generator.assembler import assemble_report, is_quick_report, record_report_usage
+from src.generator.cache import ResponseCache
+from src.generator.prompts import (
+    SECTION_END,
+    SECTION_START,
+    build_multi_section_instructions,
+    split_multi_section_response,
+)
+from src.generator.qa import run_qa_checks
+from src.generator.quick import (
+    QUICK_WORD_TARGET,
+    build_quick_framework,
+    build_quick_instructions,
+    write_quick_report,
+)
+from src.generator.ratelimit import RateLimiter
+from src.generator.writer import GenerationSession
+
+
+def _framework():
+    return build_effective_framework({"sector_id": "test", "display_name": "Test"})
+
+
+def _profile():
+    return {"id": "p1", "metadata": {"name": "Test Corp", "ticker": "TEST"}}
+
+
+def _session(cache=None, **config):
+    config = {**DEFAULT_CONFIG, "backend": "fake", "fake_backend": {}, **config}
+    return GenerationSession(config=config, cache=cache, limiter=RateLimiter())
+
+
+def _block(section_id, text):
+    return f"{SECTION_START.format(id=section_id)}\n{text}\n{SECTION_END.format(id=section_id)}"
+
+
+class TestMultiSectionResponse:
+    def test_split(self):
+        text = _block(5, "## Five\nBody five.") + "\n\n" + _block(6, "Body six.")
+        assert split_multi_section_response(text, [5, 6]) == {5: "## Five\nBody five.", 6: "Body six."}
+
+    def test_missing_section_rejected(self):
+        with pytest.raises(ValueError, match=r"\[6\]"):
+            split_multi_section_response(_block(5, "Body."), [5, 6])
+
+    def test_empty_and_unexpected_rejected(self):
+        with pytest.raises(ValueError):
+            split_multi_section_response(_block(5, "") + _block(6, "x"), [5, 6])
+        with pytest.raises(ValueError, match="Unexpected"):
+            split_multi_section_response(_block(5, "a") + "\n" + _block(7, "b"), [5])
+
+    def test_mismatched_delimiters_rejected(self):
+        text = f"{SECTION_START.format(id=5)}\nBody\n{SECTION_END.format(id=6)}"
+        with pytest.raises(ValueError):
+            split_multi_section_response(text, [5])
+
+    def test_lenient_split(self):
+        assert split_multi_section_response(_block(5, "Body."), [5, 6], strict=False) == {5: "Body."}
+
+    def test_instructions_name_every_delimiter(self):
+        prompt = build_multi_section_instructions({5: "# Section 5: A", 6: "# Section 6: B"})
+        for sid in (5, 6):
+            assert SECTION_START.format(id=sid) in prompt
+            assert SECTION_END.format(id=sid) in prompt
+
+
+class TestQuickFramework:
+    def test_targets_scaled_to_quick_totals(self):
+        quick = build_quick_framework(_framework())
+        sections = quick["sections"]
+        assert len(sections) == 11
+        total_max = sum(s["word_count"]["max"] for s in sections)
+        total_min = sum(s["word_count"]["min"] for s in sections)
+        assert total_max == pytest.approx(QUICK_WORD_TARGET["max"], rel=0.05)
+        assert total_min == pytest.approx(QUICK_WORD_TARGET["min"], rel=0.05)
+        assert all(len(s.get("required_elements", [])) <= 3 for s in sections)
+        assert all("depends_on" not in s for s in sections)
+
+    def test_instructions_compact(self):
+        instructions = build_quick_instructions(build_quick_framework(_framework()))
+        assert sum(line.startswith("# Section ") for line in instructions.splitlines()) == 11
+        assert len(instructions.split()) < 1000
+
+
+class TestWriteQuickReport:
+    def test_single_call_split_into_sections(self):
+        session = _session()
+        results = write_quick_report(_framework(), _profile(), session=session)
+        assert [r["section_id"] for r in results] == list(range(1, 12))
+        assert all(r["status"] == "generated" and r["mode"] == "quick" for r in results)
+        assert session.backend.calls == 1
+        assert results[0]["usage"]["output_tokens"] > 0
+        assert "usage" not in results[1]
+        total = sum(r["word_count"] for r in results)
+        assert QUICK_WORD_TARGET["min"] <= total <= QUICK_WORD_TARGET["max"] * 1.1
+
+    def test_latency_not_used_for_hedging(self, tmp_path):
+        db_path = tmp_path / "usage.db"
+        init_db(db_path)
+        session = _session()
+        record_report_usage("r1", write_quick_report(_framework(), _profile(), session=session), db_path)
+        assert get_recent_latencies(session.model, db_path=db_path) == []
+
+    def test_cached_on_second_run(self, tmp_path):
+        init_db(tmp_path / "cache.db")
+        cache = ResponseCache(db_path=tmp_path / "cache.db")
+        write_quick_report(_framework(), _profile(), session=_session(cache=cache))
+        session = _session(cache=cache)
+        results = write_quick_report(_framework(), _profile(), session=session)
+        assert session.backend.calls == 0
+        assert results[0]["cached"]
+        assert all(r["status"] == "generated" for r in results)
+
+    def test_missing_sections_marked_error(self, monkeypatch):
+        session = _session()
+        text = _block(1, "## Summary\nOnly one section.")
+        monkeypatch.setattr(session.backend, "complete", lambda request: {"text": text, "usage": {}})
+        results = write_quick_report(_framework(), _profile(), session=session)
+        assert results[0]["status"] == "generated"
+        assert all(r["status"] == "error" for r in results[1:])
+
+    def test_quick_report_uses_quick_qa_targets(self):
+        results = write_quick_report(_framework(), _profile(), session=_session())
+        report = assemble_report(results, _profile(), _framework())
+        assert is_quick_report(report)
+        qa = run_qa_checks(report)
+        assert "2,000–3,000" in qa["structure"]["total_word_count"]["message"]
+        assert qa["structure"]["total_word_count"]["pass"]
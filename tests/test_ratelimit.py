@@ -0,0 +1,205 @@
+"""Tests for the shared rate limiter and retry policy."""
+
+import threading
+import time
+import types
+
+import pytest
+
+from src.generator.ratelimit import (
+    DeadlineExceeded,
+    RateLimiter,
+    call_with_retry,
+    get_rate_limiter,
+    reset_rate_limiters,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(headers=headers or {})
+
+
+class TestRateLimiter:
+    def test_requests_per_minute(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rpm=60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            limiter.acquire()
+        assert clock.sleeps == []
+        limiter.acquire()
+        assert clock.sleeps == [pytest.approx(1.0)]
+        assert limiter.stats["throttled_seconds"] == pytest.approx(1.0)
+
+    def test_token_budget_and_settle(self):
+        clock = FakeClock()
+        limiter = RateLimiter(output_tpm=6000, clock=clock, sleep=clock.sleep)
+        limiter.acquire(output_tokens=4000)
+        # Only 500 of the reserved 4000 were used, so the rest is returned
+        limiter.settle({"output": 4000}, {"output": 500})
+        limiter.acquire(output_tokens=4000)
+        assert clock.sleeps == []
+        limiter.acquire(output_tokens=4000)
+        assert clock.sleeps == [pytest.approx(25.0)]
+
+    def test_unlimited(self):
+        limiter = RateLimiter()
+        assert limiter.reserve(10**9, 10**9) == 0
+
+    def test_shared_per_model(self):
+        reset_rate_limiters()
+        config = {"rate_limits": {"default": {"rpm": 5}, "model-b": {"rpm": 7}}}
+        assert get_rate_limiter("model-a", config) is get_rate_limiter("model-a", config)
+        assert get_rate_limiter("model-a", config) is not get_rate_limiter("model-b", config)
+        reset_rate_limiters()
+
+    def test_limits_set_as_json_string(self):
+        reset_rate_limiters()
+        config = {"rate_limits": '{"default": {"rpm": 5}, "model-b": {"rpm": 7}}'}
+        assert get_rate_limiter("model-b", config)._buckets["requests"].capacity == 7
+        reset_rate_limiters()
+        with pytest.raises(ValueError, match="rate_limits"):
+            get_rate_limiter("model-a", {"rate_limits": "[5]"})
+        with pytest.raises(ValueError, match="rate_limits"):
+            get_rate_limiter("model-a", {"rate_limits": "{not json"})
+
+
+class TestRetry:
+    def test_honors_retry_after(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise APIError(429, {"retry-after": "3"})
+            return "ok"
+
+        assert call_with_retry(flaky, limiter, sleep=clock.sleep) == "ok"
+        assert clock.sleeps[0] >= 3
+        assert limiter.stats["retries"] == 1
+        assert limiter.stats["rate_limited"] == 1
+
+    def test_retry_after_pauses_other_workers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        limiter.record_retry(5.0, throttled=True, retry_after=5.0)
+        assert limiter.reserve() == pytest.approx(5.0)
+
+    def test_overloaded_then_success(self):
+        clock = FakeClock()
+        calls = iter([APIError(529), APIError(529), "done"])
+
+        def fn():
+            outcome = next(calls)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        assert call_with_retry(fn, base_delay=0.5, sleep=clock.sleep) == "done"
+        assert len(clock.sleeps) == 2
+        assert clock.sleeps[1] <= 1.0
+
+    def test_non_retryable_raises_immediately(self):
+        def bad_request():
+            raise APIError(400)
+
+        with pytest.raises(APIError):
+            call_with_retry(bad_request, sleep=lambda s: pytest.fail("should not sleep"))
+
+    def test_gives_up_after_max_retries(self):
+        clock = FakeClock()
+
+        def always_busy():
+            raise APIError(529)
+
+        with pytest.raises(APIError):
+            call_with_retry(always_busy, max_retries=3, sleep=clock.sleep)
+        assert len(clock.sleeps) == 3
+
+    def test_deadline_stops_retries(self):
+        clock = FakeClock()
+
+        def always_busy():
+            raise APIError(529)
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_retry(always_busy, base_delay=100, sleep=clock.sleep, deadline=time.monotonic() + 0.5)
+        assert clock.sleeps == []
+
+    def test_expired_deadline_skips_call(self):
+        with pytest.raises(DeadlineExceeded):
+            call_with_retry(lambda: pytest.fail("should not call"), deadline=time.monotonic() - 1)
+
+    def test_cancelled_call_not_started(self):
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(DeadlineExceeded):
+            call_with_retry(lambda: pytest.fail("should not call"), cancel=cancel)
+
+    def test_failed_attempts_return_reservations(self):
+        clock = FakeClock()
+        limiter = RateLimiter(output_tpm=10000, clock=clock, sleep=clock.sleep)
+        calls = iter([APIError(429), APIError(429), APIError(429), {"usage": 500}])
+
+        def fn():
+            outcome = next(calls)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        call_with_retry(
+            fn, limiter, output_tokens=2000, sleep=lambda s: None,
+            usage=lambda response: {"output": response["usage"]},
+        )
+        assert limiter._buckets["output"].tokens == pytest.approx(9500)
+
+    def test_permanent_failure_returns_reservation(self):
+        clock = FakeClock()
+        limiter = RateLimiter(output_tpm=10000, clock=clock, sleep=clock.sleep)
+
+        def bad_request():
+            raise APIError(400)
+
+        with pytest.raises(APIError):
+            call_with_retry(bad_request, limiter, output_tokens=2000, usage=lambda r: {"output": 0})
+        assert limiter._buckets["output"].tokens == pytest.approx(10000)
+
+    def test_limiter_wait_honors_deadline(self):
+        limiter = RateLimiter(rpm=1)
+        limiter.acquire()
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire(deadline=time.monotonic() + 5)
+        # The refused request handed its slot back
+        assert limiter._buckets["requests"].tokens == pytest.approx(0, abs=0.01)
+
+    def test_limiter_wait_honors_cancel(self):
+        limiter = RateLimiter(rpm=1)
+        limiter.acquire()
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire(cancel=cancel)
+        assert time.monotonic() - started < 5
+
+    def test_retry_after_ms_header(self):
+        assert retry_after_seconds(APIError(429, {"retry-after-ms": "1500"})) == 1.5
+        assert retry_after_seconds(APIError(429)) is None
@@ -0,0 +1,79 @@
+"""Tests for targeted report repair."""
+
+from src.frameworks.base import build_effective_framework
+from src.generator.prompts import build_section_instructions
+from src.generator.qa import run_qa_checks
+from src.generator.repair import apply_repair, plan_repair
+
+TABLE = "| Metric | Value |\n|---|---|\n| Revenue | $1B |\n"
+
+
+def _framework():
+    return build_effective_framework({"sector_id": "test", "display_name": "Test"})
+
+
+def _section(section_id, content, status="generated"):
+    return {
+        "section_id": section_id,
+        "name": f"Section {section_id}",
+        "content": content,
+        "word_count": len(content.split()),
+        "status": status,
+    }
+
+
+def _report():
+    sections = [_section(i, TABLE + "Probability and impact: revenue grew 15%.") for i in range(1, 12)]
+    sections[6] = _section(7, "Revenue grew 15% without a table.")
+    report = {
+        "id": "r1",
+        "report_date": "2026-01-01",
+        "reference_quarter": "Q4",
+        "sections": sections,
+        "citations": [],
+        "word_count": 500,
+        "output_paths": {"markdown": "/tmp/r1.md"},
+    }
+    report["qa_results"] = run_qa_checks(report)
+    return report
+
+
+def _profile():
+    return {"id": "p1", "metadata": {"name": "Test Corp", "ticker": "TEST", "report_date": "2026-02-02"}}
+
+
+class TestPlanRepair:
+    def test_plans_only_failing_sections(self):
+        plan = plan_repair(_report(), _framework())
+        assert [s["id"] for s in plan] == [7]
+        assert "Missing financial table" in plan[0]["revision_notes"][0]
+
+    def test_only_filter(self):
+        assert plan_repair(_report(), _framework(), only={3}) == []
+
+    def test_revision_notes_reach_prompt(self):
+        section = plan_repair(_report(), _framework())[0]
+        instructions = build_section_instructions(section)
+        assert "**Revision Required:**" in instructions
+        assert "Missing financial table" in instructions
+
+
+class TestApplyRepair:
+    def test_replaces_section_and_reruns_qa(self):
+        report = _report()
+        fixed = _section(7, TABLE + "Revenue grew 15%.")
+        repaired, failed = apply_repair(report, [fixed], _profile(), _framework())
+        assert failed == []
+        assert repaired["id"] == "r1"
+        assert repaired["report_date"] == "2026-01-01"
+        assert repaired["output_paths"] == {"markdown": "/tmp/r1.md"}
+        assert repaired["sections"][6]["content"] == fixed["content"]
+        assert repaired["qa_results"]["content"]["financial_table"]["pass"]
+
+    def test_failed_regeneration_keeps_previous(self):
+        report = _report()
+        error = _section(7, "", status="error")
+        repaired, failed = apply_repair(report, [error], _profile(), _framework())
+        assert failed == [error]
+        assert repaired["sections"][6]["status"] == "generated"
+        assert not repaired["qa_results"]["content"]["financial_table"]["pass"]
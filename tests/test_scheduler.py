@@ -0,0 +1,307 @@
+"""Tests for the multi-ticker section scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.frameworks.base import build_effective_framework
+from src.generator import writer
+from src.generator.ratelimit import RateLimiter
+from src.generator.scheduler import generate_many
+from src.generator.writer import GenerationSession
+
+
+def _session(prompt_caching=False, packs=()):
+    config = {**DEFAULT_CONFIG, "api_key": "test", "prompt_caching": prompt_caching, "section_packs": list(packs)}
+    return GenerationSession(config=config, limiter=RateLimiter())
+
+
+def _jobs(*tickers, priorities=None):
+    framework = build_effective_framework({"sector_id": "test", "display_name": "Test"})
+    return [
+        {
+            "ticker": ticker,
+            "profile": {"id": ticker, "metadata": {"ticker": ticker}},
+            "framework": framework,
+            "priority": (priorities or {}).get(ticker, 0),
+        }
+        for ticker in tickers
+    ]
+
+
+def _fake_write_section(tracker, delay=0.005):
+    lock = threading.Lock()
+
+    def fake(section, company_profile, research_data=None, citations=None, framework=None,
+             session=None, dependencies=None, on_delta=None):
+        ticker = company_profile["metadata"]["ticker"]
+        with lock:
+            tracker["active"] += 1
+            tracker["per_ticker"][ticker] = tracker["per_ticker"].get(ticker, 0) + 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+            tracker["peak_per_ticker"] = max(tracker["peak_per_ticker"], tracker["per_ticker"][ticker])
+        time.sleep(delay)
+        with lock:
+            tracker["active"] -= 1
+            tracker["per_ticker"][ticker] -= 1
+        return writer._section_result(section, content=f"{ticker} section {section['id']}")
+
+    return fake
+
+
+def _recording_write_section(calls):
+    lock = threading.Lock()
+
+    def fake(section, company_profile, research_data=None, citations=None, framework=None,
+             session=None, dependencies=None, on_delta=None):
+        with lock:
+            calls.append((section["id"], [r["section_id"] for r in dependencies or []]))
+        return writer._section_result(section, content=f"Body {section['id']}.")
+
+    return fake
+
+
+def _tracker():
+    return {"active": 0, "peak": 0, "per_ticker": {}, "peak_per_ticker": 0}
+
+
+class TestGenerateMany:
+    def test_all_sections_in_order(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(_tracker()))
+        results = generate_many(_jobs("AAA", "BBB", "CCC"), _session(), concurrency=4)
+        assert list(results) == ["AAA", "BBB", "CCC"]
+        for ticker, sections in results.items():
+            assert [r["section_id"] for r in sections] == list(range(1, 12))
+            assert sections[4]["content"] == f"{ticker} section 5"
+
+    def test_global_and_per_ticker_caps(self, monkeypatch):
+        tracker = _tracker()
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(tracker))
+        generate_many(_jobs("AAA", "BBB", "CCC"), _session(), concurrency=6, per_ticker=2)
+        assert 2 < tracker["peak"] <= 6
+        assert tracker["peak_per_ticker"] == 2
+
+    def test_priority_dispatched_first(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(_tracker()))
+        dispatched = []
+
+        def on_progress(ticker, section_id, status, result):
+            if status == "generating":
+                dispatched.append(ticker)
+
+        generate_many(
+            _jobs("AAA", "BBB", priorities={"BBB": 1}), _session(),
+            concurrency=2, per_ticker=2, progress_callback=on_progress,
+        )
+        # BBB's summaries wait on its body sections, so AAA fills the gap
+        assert dispatched[:9] == ["BBB"] * 9
+
+    def test_ticker_finishes_before_queue_drains(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(_tracker()))
+        events = []
+        caller = threading.get_ident()
+
+        def on_progress(ticker, section_id, status, result):
+            if status != "generating":
+                events.append(("section", ticker))
+
+        def on_done(ticker, results):
+            assert threading.get_ident() == caller
+            assert len(results) == 11
+            events.append(("done", ticker))
+
+        generate_many(
+            _jobs("AAA", "BBB", "CCC"), _session(), concurrency=4, per_ticker=4,
+            progress_callback=on_progress, on_ticker_done=on_done,
+        )
+        assert sorted(e for e in events if e[0] == "done") == [("done", t) for t in ("AAA", "BBB", "CCC")]
+        assert events.index(("done", "AAA")) < len(events) - 11
+
+    def test_prompt_cache_warm_up_per_ticker(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(_tracker()))
+        order = []
+
+        def on_progress(ticker, section_id, status, result):
+            order.append((ticker, section_id, status))
+
+        generate_many(
+            _jobs("AAA", "BBB"), _session(prompt_caching=True), concurrency=8,
+            progress_callback=on_progress,
+        )
+        for ticker in ("AAA", "BBB"):
+            mine = [(sid, status) for t, sid, status in order if t == ticker]
+            assert mine[:2] == [(2, "generating"), (2, "generated")]
+
+    def test_empty_job_reported_done(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(_tracker()))
+        jobs = _jobs("AAA")
+        jobs[0]["framework"] = {**jobs[0]["framework"], "sections": []}
+        done = []
+        results = generate_many(jobs, _session(), on_ticker_done=lambda t, r: done.append((t, r)))
+        assert done == [("AAA", [])]
+        assert results == {"AAA": []}
+
+
+class TestSectionDependencies:
+    def test_summaries_run_after_body_sections(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writer, "write_section", _recording_write_section(calls))
+        generate_many(_jobs("AAA"), _session(), concurrency=4)
+        order = [sid for sid, _ in calls]
+        assert set(order[-2:]) == {1, 11}
+        deps = dict(calls)
+        assert deps[1] == list(range(2, 11))
+        assert deps[11] == list(range(2, 11))
+        assert deps[5] == []
+
+    def test_completed_sections_feed_dependencies(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writer, "write_section", _recording_write_section(calls))
+        jobs = _jobs("AAA")
+        sections = jobs[0]["framework"]["sections"]
+        jobs[0]["framework"] = {**jobs[0]["framework"], "sections": [sections[0]]}
+        jobs[0]["completed"] = [
+            writer._section_result(s, content="Earlier text.") for s in sections[1:10]
+        ]
+        generate_many(jobs, _session())
+        assert calls == [(1, list(range(2, 11)))]
+
+    def test_failed_dependency_is_skipped(self, monkeypatch):
+        calls = []
+        record = _recording_write_section(calls)
+
+        def flaky(section, company_profile, **kwargs):
+            result = record(section, company_profile, **kwargs)
+            if section["id"] == 4:
+                return writer._section_result(section, status="error", error="boom")
+            return result
+
+        monkeypatch.setattr(writer, "write_section", flaky)
+        generate_many(_jobs("AAA"), _session(), concurrency=3)
+        assert 4 not in dict(calls)[1]
+
+    def test_cycle_is_reported(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writer, "write_section", _recording_write_section(calls))
+        jobs = _jobs("AAA")
+        sections = [dict(s) for s in jobs[0]["framework"]["sections"][:3]]
+        sections[0]["depends_on"] = [2]
+        sections[1]["depends_on"] = [1]
+        jobs[0]["framework"] = {**jobs[0]["framework"], "sections": sections}
+        with pytest.raises(ValueError, match=r"cycle for AAA: sections \[1, 2\]"):
+            generate_many(jobs, _session())
+        assert calls == []
+
+
+class TestSectionPacks:
+    def _fake_session(self, packs):
+        config = {**DEFAULT_CONFIG, "backend": "fake", "section_packs": list(packs)}
+        return GenerationSession(config=config, limiter=RateLimiter())
+
+    def test_packs_cut_requests(self):
+        session = self._fake_session(DEFAULT_CONFIG["section_packs"])
+        results = generate_many(_jobs("AAA"), session, concurrency=4)["AAA"]
+        assert [r["section_id"] for r in results] == list(range(1, 12))
+        assert all(r["status"] == "generated" for r in results)
+        assert session.stats["requests"] == 9
+        assert results[4]["packed_with"] == [5, 6]
+        assert results[4]["content"].startswith("## Section 5")
+
+    def test_packed_summaries_wait_for_body(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writer, "write_section", _recording_write_section(calls))
+
+        def pack(sections, dependencies=None, **kwargs):
+            calls.append(([s["id"] for s in sections], [r["section_id"] for r in dependencies or []]))
+            return [writer._section_result(s, content=f"Body {s['id']}.") for s in sections]
+
+        monkeypatch.setattr(writer, "write_section_pack", pack)
+        generate_many(_jobs("AAA"), _session(packs=[[1, 11], [9, 10]]), concurrency=4)
+        assert calls[-1] == ([1, 11], list(range(2, 11)))
+        assert ([9, 10], []) in calls
+        assert len(calls) == 9
+
+    def test_pack_skipped_when_member_depends_on_another(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(writer, "write_section", _recording_write_section(calls))
+        generate_many(_jobs("AAA"), _session(packs=[[1, 2]]), concurrency=2)
+        assert len(calls) == 11
+
+    def test_bad_split_falls_back_to_single_sections(self, monkeypatch):
+        session = self._fake_session([[2, 3]])
+        complete = session.backend.complete
+
+        def drop_section_3(request):
+            response = complete(request)
+            if "<<<SECTION 3>>>" in str(request["messages"]):
+                response["text"] = response["text"].split("<<<SECTION 3>>>")[0]
+            return response
+
+        monkeypatch.setattr(session.backend, "complete", drop_section_3)
+        results = generate_many(_jobs("AAA"), session, concurrency=2)["AAA"]
+        assert all(r["status"] == "generated" for r in results)
+        assert "packed_with" not in results[2]
+        assert session.stats["requests"] == 12
+        assert results[1]["failed_pack"]["status"] == "error"
+        assert results[1]["failed_pack"]["usage"]["output_tokens"] > 0
+        assert "failed_pack" not in results[2]
+
+
+class TestDeadlines:
+    def _slow_session(self, latency, **config):
+        config = {
+            **DEFAULT_CONFIG, "backend": "fake", "section_packs": [], "prompt_caching": False,
+            "fake_backend": {"latency": latency}, **config,
+        }
+        return GenerationSession(config=config, limiter=RateLimiter())
+
+    def test_section_timeout(self):
+        session = self._slow_session(5.0, section_timeout=0.05)
+        started = time.monotonic()
+        results = generate_many(_jobs("AAA"), session, concurrency=11)["AAA"]
+        assert time.monotonic() - started < 2
+        assert {r["status"] for r in results} == {"timeout"}
+
+    def test_report_deadline_keeps_finished_sections(self):
+        session = self._slow_session(0.05)
+        statuses = []
+        done = []
+        started = time.monotonic()
+        results = generate_many(
+            _jobs("AAA"), session, concurrency=2, deadline=0.12,
+            progress_callback=lambda t, sid, status, r: statuses.append(status),
+            on_ticker_done=lambda t, r: done.append(t),
+        )["AAA"]
+        assert time.monotonic() - started < 2
+        by_status = {}
+        for r in results:
+            by_status.setdefault(r["status"], []).append(r["section_id"])
+        assert 2 <= len(by_status["generated"]) < 11
+        assert 11 in by_status["timeout"]
+        assert set(by_status) == {"generated", "timeout"}
+        assert statuses.count("generating") < 11
+        assert done == ["AAA"]
+        assert session.deadline is None
+
+    def test_interrupt_stops_in_flight_streams(self):
+        session = self._slow_session(0.0, fake_backend={"tokens_per_second": 100})
+        calls = []
+
+        def interrupt(ticker, section_id, status, result):
+            calls.append(section_id)
+            if len(calls) > 1:
+                raise KeyboardInterrupt
+
+        before = threading.active_count()
+        with pytest.raises(KeyboardInterrupt):
+            generate_many(
+                _jobs("AAA"), session, concurrency=2, progress_callback=interrupt,
+                on_delta=lambda ticker, section_id, text: None,
+            )
+        assert session.cancelled.is_set()
+        stopped_by = time.monotonic() + 2
+        while threading.active_count() > before and time.monotonic() < stopped_by:
+            time.sleep(0.01)
+        assert threading.active_count() == before
@@ -0,0 +1,83 @@
+"""Tests for token estimates, output budgets and cost accounting."""
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.generator.tokens import (
+    estimate_tokens,
+    section_max_tokens,
+    summarize_usage,
+    usage_cost,
+    usage_record,
+    usage_records,
+)
+
+
+class TestEstimates:
+    def test_estimate_tokens(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a" * 35) == 10
+
+    def test_max_tokens_scale_with_word_target(self):
+        short = section_max_tokens({"word_count": {"min": 300, "max": 400}})
+        long = section_max_tokens({"word_count": {"min": 800, "max": 1200}})
+        assert 400 * 1.35 < short < long
+        assert long > 1200 * 1.35
+
+    def test_max_tokens_capped(self):
+        assert section_max_tokens({"word_count": {"max": 5000}}, cap=4096) == 4096
+        assert section_max_tokens({}, cap=2048) == 2048
+
+
+class TestCost:
+    def test_usage_cost(self):
+        usage = {"input_tokens": 1_000_000, "output_tokens": 1_000_000,
+                 "cache_read_input_tokens": 1_000_000, "cache_creation_input_tokens": 0}
+        assert usage_cost(usage, "any-model", DEFAULT_CONFIG) == pytest.approx(18.3)
+
+    def test_model_specific_pricing(self):
+        config = {**DEFAULT_CONFIG, "pricing": {"cheap": {"input": 1.0, "output": 5.0}}}
+        usage = {"input_tokens": 1_000_000, "output_tokens": 0}
+        assert usage_cost(usage, "cheap", config) == pytest.approx(1.0)
+        assert usage_cost(usage, "other", config) == pytest.approx(3.0)
+
+    def test_pricing_set_as_json_string(self):
+        config = {**DEFAULT_CONFIG, "pricing": '{"cheap": {"input": 1.0}}'}
+        assert usage_cost({"input_tokens": 1_000_000}, "cheap", config) == pytest.approx(1.0)
+        with pytest.raises(ValueError, match="pricing"):
+            usage_cost({}, "cheap", {**DEFAULT_CONFIG, "pricing": '{"cheap": 1}'})
+
+    def test_summarize_usage(self):
+        rows = [
+            {"model": "m", "cached": 0, "input_tokens": 100, "output_tokens": 500,
+             "latency_seconds": 4.0},
+            {"model": "m", "cached": 1, "input_tokens": 0, "output_tokens": 0,
+             "latency_seconds": 0.01},
+        ]
+        totals = summarize_usage(rows, DEFAULT_CONFIG)
+        assert totals["calls"] == 2
+        assert totals["cached_calls"] == 1
+        assert totals["output_tokens"] == 500
+        assert totals["latency_seconds"] == 4.01
+        assert totals["cost"] == pytest.approx(0.0078)
+
+    def test_usage_record_skips_failed_calls(self):
+        assert usage_record("r1", {"section_id": 1, "status": "error"}) is None
+        record = usage_record("r1", {"section_id": 1, "status": "generated", "cached": True})
+        assert record["cached"] is True
+        assert record["output_tokens"] == 0
+
+    def test_usage_records_include_failed_pack(self):
+        result = {
+            "section_id": 2, "status": "generated", "usage": {"output_tokens": 300},
+            "failed_pack": {"status": "error", "usage": {"output_tokens": 700}, "packed_with": [2, 3]},
+        }
+        pack, own = usage_records("r1", result)
+        assert (pack["section_id"], pack["status"], pack["output_tokens"], pack["packed"]) == (2, "error", 700, True)
+        assert (own["status"], own["output_tokens"], own["packed"]) == ("generated", 300, False)
+        assert usage_records("r1", {"section_id": 1, "status": "error"}) == []
+
+    def test_quick_call_recorded_as_multi_section(self):
+        result = {"section_id": 1, "status": "generated", "mode": "quick", "usage": {"output_tokens": 9000}}
+        assert usage_record("r1", result)["packed"] is True
+        assert usage_record("r1", {**result, "mode": None})["packed"] is False
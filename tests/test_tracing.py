@@ -0,0 +1,88 @@
+"""Tests for span instrumentation and trace export."""
+
+import json
+import threading
+
+import pytest
+
+from src import tracing
+from src.tracing import disable_tracing, enable_tracing, span, traced
+
+
+@traced
+def _traced_add(a, b):
+    return a + b
+
+
+@pytest.fixture
+def tracer():
+    tracer = enable_tracing()
+    yield tracer
+    disable_tracing()
+
+
+class TestDisabled:
+    def test_span_is_shared_noop(self):
+        assert tracing.get_tracer() is None
+        with span("anything", n=1) as s:
+            s.set(status="ok")
+        assert span("a") is span("b")
+
+    def test_traced_function_still_runs(self):
+        assert _traced_add(2, 3) == 5
+
+
+class TestTracer:
+    def test_records_spans_and_args(self, tracer):
+        with span("outer", "cli", ticker="NVDA") as s:
+            with span("inner"):
+                pass
+            s.set(status="done")
+        names = [e["name"] for e in tracer.events]
+        assert names == ["inner", "outer"]
+        outer = tracer.events[1]
+        assert outer["cat"] == "cli"
+        assert outer["args"] == {"ticker": "NVDA", "status": "done"}
+        assert outer["dur"] >= tracer.events[0]["dur"]
+
+    def test_exception_marks_span(self, tracer):
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        assert tracer.events[0]["args"]["error"] == "ValueError"
+
+    def test_traced_name_and_category(self, tracer):
+        _traced_add(1, 1)
+        event = tracer.events[0]
+        assert event["name"] == "test_tracing._traced_add"
+        assert event["cat"] == "tests"
+
+    def test_summary_groups_by_name(self, tracer):
+        for _ in range(3):
+            with span("repeat"):
+                pass
+        with span("once"):
+            pass
+        rows = {r["name"]: r for r in tracer.summary()}
+        assert rows["repeat"]["count"] == 3
+        assert rows["once"]["count"] == 1
+        assert rows["repeat"]["max_ms"] <= rows["repeat"]["total_ms"]
+
+    def test_chrome_trace_format(self, tracer, tmp_path):
+        def work():
+            with span("worker"):
+                pass
+
+        thread = threading.Thread(target=work, name="section-worker")
+        thread.start()
+        thread.join()
+        with span("main"):
+            pass
+
+        path = tracer.write_chrome_trace(tmp_path / "trace.json")
+        events = json.loads(path.read_text())["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        assert {e["name"] for e in complete} == {"worker", "main"}
+        assert all({"ts", "dur", "pid", "tid"} <= set(e) for e in complete)
+        thread_names = {e["args"]["name"] for e in events if e["name"] == "thread_name"}
+        assert "section-worker" in thread_names
@@ -0,0 +1,478 @@
+"""Tests for the section writer."""
+
+import asyncio
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from src.config import DEFAULT_CONFIG
+from src.frameworks.base import build_effective_framework
+from src.db import init_db
+from src.generator import writer
+from src.generator.cache import ResponseCache
+from src.generator.ratelimit import RateLimiter
+from src.generator.writer import (
+    GenerationSession,
+    write_all_sections,
+    write_section,
+    write_all_sections_async,
+    write_section_async,
+)
+
+
+def _framework():
+    return build_effective_framework({"sector_id": "test", "display_name": "Test"})
+
+
+def _profile():
+    return {"id": "p1", "metadata": {"name": "Test Corp", "ticker": "TEST"}}
+
+
+def _prompt_text(messages):
+    content = messages[0]["content"]
+    if isinstance(content, str):
+        return content
+    return "\n\n".join(block["text"] for block in content)
+
+
+def _section_heading(messages):
+    return next(
+        line for line in _prompt_text(messages).splitlines() if line.startswith("# Section")
+    )
+
+
+def _usage(output_tokens, cache_read=0):
+    return types.SimpleNamespace(
+        input_tokens=100,
+        output_tokens=output_tokens,
+        cache_read_input_tokens=cache_read,
+        cache_creation_input_tokens=0,
+    )
+
+
+class _FakeAsyncStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        async def gen():
+            for chunk in self._chunks:
+                await asyncio.sleep(0)
+                yield chunk
+        return gen()
+
+    async def get_final_message(self):
+        return types.SimpleNamespace(usage=_usage(len(self._chunks)))
+
+
+class _FakeAsyncClient:
+    def __init__(self):
+        self.messages = self
+        self.calls = []
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        return _FakeAsyncStream(["#", _section_heading(kwargs["messages"]), "\n\n", "Body text."])
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self.text_stream = iter(chunks)
+        self._count = len(chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return types.SimpleNamespace(usage=_usage(self._count))
+
+
+class _FakeClient:
+    def __init__(self):
+        self.messages = self
+        self.calls = []
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        return _FakeStream([_section_heading(kwargs["messages"]), "\n\nPara one.", "\n\nPara two."])
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        text = f"Generated: {_section_heading(kwargs['messages'])}"
+        return types.SimpleNamespace(
+            content=[types.SimpleNamespace(text=text)],
+            usage=_usage(50, cache_read=80 if len(self.calls) > 1 else 0),
+        )
+
+
+@pytest.fixture(autouse=True)
+def _unpacked(monkeypatch):
+    """Generate every section in its own request unless a test opts in."""
+    monkeypatch.setattr(writer, "load_config", lambda: {**DEFAULT_CONFIG, "section_packs": []})
+
+
+@pytest.fixture
+def session():
+    """A generation session wired to in-memory fake clients."""
+    return GenerationSession(
+        config={**DEFAULT_CONFIG, "api_key": "test", "section_packs": []},
+        client=_FakeClient(),
+        async_client=_FakeAsyncClient(),
+        limiter=RateLimiter(),
+    )
+
+
+def _fake_write_section(delays=None, tracker=None):
+    """Build a write_section stand-in that sleeps and tracks concurrency."""
+    lock = threading.Lock()
+
+    def fake(section, company_profile, research_data=None, citations=None, framework=None,
+             session=None, dependencies=None, on_delta=None):
+        if tracker is not None:
+            with lock:
+                tracker["active"] += 1
+                tracker["peak"] = max(tracker["peak"], tracker["active"])
+        time.sleep((delays or {}).get(section["id"], 0.01))
+        if tracker is not None:
+            with lock:
+                tracker["active"] -= 1
+        return writer._section_result(section, content=f"Body of section {section['id']}.")
+
+    return fake
+
+
+class TestWriteAllSections:
+    def test_results_in_section_order(self, monkeypatch):
+        # Early sections finish last
+        delays = {sid: 0.05 - sid * 0.004 for sid in range(1, 12)}
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(delays))
+        results = write_all_sections(_framework(), _profile(), concurrency=4)
+        assert [r["section_id"] for r in results] == list(range(1, 12))
+        assert all(r["status"] == "generated" for r in results)
+
+    def test_concurrency_is_bounded(self, monkeypatch):
+        tracker = {"active": 0, "peak": 0}
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(tracker=tracker))
+        write_all_sections(_framework(), _profile(), concurrency=3)
+        assert 1 < tracker["peak"] <= 3
+
+    def test_sequential_mode(self, monkeypatch):
+        tracker = {"active": 0, "peak": 0}
+        monkeypatch.setattr(writer, "write_section", _fake_write_section(tracker=tracker))
+        results = write_all_sections(_framework(), _profile(), concurrency=1)
+        assert tracker["peak"] == 1
+        assert len(results) == 11
+
+    def test_progress_callback_runs_in_caller_thread(self, monkeypatch):
+        monkeypatch.setattr(writer, "write_section", _fake_write_section())
+        events = []
+        caller = threading.get_ident()
+
+        def callback(section_id, status, result):
+            events.append((section_id, status, threading.get_ident() == caller))
+
+        write_all_sections(_framework(), _profile(), progress_callback=callback, concurrency=4)
+        assert len(events) == 22
+        assert all(same_thread for _, _, same_thread in events)
+        assert sorted(sid for sid, status, _ in events if status == "generated") == list(range(1, 12))
+
+    def test_worker_exception_becomes_error_section(self, monkeypatch):
+        def boom(section, **kwargs):
+            raise RuntimeError("worker crashed")
+
+        monkeypatch.setattr(writer, "write_section", boom)
+        results = write_all_sections(_framework(), _profile(), concurrency=2)
+        assert all(r["status"] == "error" for r in results)
+        assert results[0]["error"] == "worker crashed"
+
+    def test_subset_prompt_outlines_full_report(self, session):
+        framework = _framework()
+        results = write_all_sections(framework, _profile(), session=session, sections=framework["sections"][3:4])
+        assert [r["section_id"] for r in results] == [4]
+        prompt = _prompt_text(session.client.calls[0]["messages"])
+        assert all(f"\n{s['id']}. {s['name']}" in prompt for s in framework["sections"])
+
+
+class TestAsyncWriter:
+    def test_streams_deltas_and_reports_metrics(self, session):
+        section = _framework()["sections"][3]
+        deltas = []
+        result = asyncio.run(write_section_async(
+            section, _profile(), session=session,
+            on_delta=lambda sid, text: deltas.append((sid, text)),
+        ))
+        assert result["status"] == "generated"
+        assert result["content"] == "".join(text for _, text in deltas)
+        assert all(sid == 4 for sid, _ in deltas)
+        assert result["metrics"]["output_tokens"] == 4
+        assert result["metrics"]["ttft_seconds"] >= 0
+
+    def test_async_delta_callback(self, session):
+        seen = []
+
+        async def on_delta(section_id, text):
+            seen.append(section_id)
+
+        asyncio.run(write_section_async(
+            _framework()["sections"][0], _profile(), on_delta=on_delta, session=session,
+        ))
+        assert seen and set(seen) == {1}
+
+    def test_all_sections_in_order(self, session):
+        results = asyncio.run(write_all_sections_async(
+            _framework(), _profile(), concurrency=3, session=session,
+        ))
+        assert [r["section_id"] for r in results] == list(range(1, 12))
+        assert "Section 7:" in results[6]["content"]
+        assert len(session.async_client.calls) == 11
+        assert session.stats["generated"] == 11
+
+    def test_dependency_cycle_fails_fast(self, session):
+        sections = [dict(s) for s in _framework()["sections"][:2]]
+        sections[0]["depends_on"] = [2]
+        sections[1]["depends_on"] = [1]
+        with pytest.raises(ValueError, match="cycle"):
+            asyncio.run(asyncio.wait_for(
+                write_all_sections_async({"sections": sections}, _profile(), session=session), timeout=2,
+            ))
+        assert session.async_client.calls == []
+
+    def test_subset_prompt_outlines_full_report(self, session):
+        framework = _framework()
+        results = asyncio.run(write_all_sections_async(
+            framework, _profile(), session=session, sections=framework["sections"][3:4],
+        ))
+        assert [r["section_id"] for r in results] == [4]
+        prompt = _prompt_text(session.async_client.calls[0]["messages"])
+        assert all(f"\n{s['id']}. {s['name']}" in prompt for s in framework["sections"])
+
+    def test_summaries_stream_after_body_sections(self, session):
+        order = []
+        asyncio.run(write_all_sections_async(
+            _framework(), _profile(), concurrency=4, session=session,
+            progress_callback=lambda sid, status, result: order.append((sid, status)),
+        ))
+        started = [sid for sid, status in order if status == "generating"]
+        finished = [sid for sid, status in order if status == "generated"]
+        assert set(started[-2:]) == {1, 11}
+        assert all(finished.index(sid) < started.index(1) for sid in range(2, 11))
+        summary_call = next(
+            c for c in session.async_client.calls
+            if _section_heading(c["messages"]).startswith("# Section 1:")
+        )
+        assert "Findings From Completed Sections" in _prompt_text(summary_call["messages"])
+
+    def test_missing_api_key(self):
+        session = GenerationSession(config={**DEFAULT_CONFIG, "api_key": ""})
+        result = asyncio.run(write_section_async(
+            _framework()["sections"][0], _profile(), session=session,
+        ))
+        assert result["status"] == "error"
+        assert "No API key" in result["error"]
+
+
+class _EndlessStreamBackend:
+    """Backend that keeps streaming and ignores the request timeout."""
+
+    requires_api_key = False
+
+    def stream(self, request, on_text):
+        while True:
+            time.sleep(0.01)
+            on_text("More text. ")
+
+    async def astream(self, request, on_text):
+        while True:
+            await asyncio.sleep(0.01)
+            await on_text("More text. ")
+
+
+class TestStreamTimeout:
+    def _session(self):
+        config = {**DEFAULT_CONFIG, "section_packs": [], "section_timeout": 0.1, "max_retries": 0}
+        return GenerationSession(config=config, limiter=RateLimiter(), backend=_EndlessStreamBackend())
+
+    def test_endless_stream_times_out(self):
+        deltas = []
+        started = time.monotonic()
+        result = write_section(
+            _framework()["sections"][3], _profile(), session=self._session(),
+            on_delta=lambda sid, text: deltas.append(text),
+        )
+        assert time.monotonic() - started < 1
+        assert result["status"] == "timeout"
+        assert deltas
+
+    def test_endless_async_stream_times_out(self):
+        started = time.monotonic()
+        result = asyncio.run(write_section_async(_framework()["sections"][3], _profile(), session=self._session()))
+        assert time.monotonic() - started < 1
+        assert result["status"] == "timeout"
+
+
+class TestGenerationSession:
+    def test_client_shared_across_sections(self, session):
+        client = session.client
+        for section in _framework()["sections"][:3]:
+            result = write_section(section, _profile(), session=session)
+            assert result["status"] == "generated"
+        assert session.client is client
+        assert len(client.calls) == 3
+        assert session.stats == {"requests": 3, "cached": 0, "generated": 3, "errors": 0}
+
+    def test_config_read_once(self, monkeypatch):
+        reads = []
+
+        def counting_load_config():
+            reads.append(1)
+            return {**DEFAULT_CONFIG, "api_key": "test", "section_packs": []}
+
+        monkeypatch.setattr(writer, "load_config", counting_load_config)
+        session = GenerationSession(client=_FakeClient(), limiter=RateLimiter())
+        write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        assert len(reads) == 1
+        assert session.stats["generated"] == 11
+
+    def test_max_tokens_follow_word_targets(self, session):
+        write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        budgets = {
+            _section_heading(c["messages"]).split(":")[0]: c["max_tokens"]
+            for c in session.client.calls
+        }
+        # Operational Analysis (1,200 words) gets more room than Ecosystem (400)
+        assert budgets["# Section 4"] > budgets["# Section 6"]
+        assert all(b <= session.max_tokens for b in budgets.values())
+
+    def test_request_details_on_result(self, session):
+        result = write_section(_framework()["sections"][5], _profile(), session=session)
+        assert result["model"] == session.model
+        assert result["estimated_input_tokens"] > 0
+        assert result["max_tokens"] == session.client.calls[0]["max_tokens"]
+        assert result["latency_seconds"] >= 0
+
+    def test_streams_deltas_when_requested(self, session):
+        deltas = []
+        result = write_section(
+            _framework()["sections"][2], _profile(), session=session,
+            on_delta=lambda sid, text: deltas.append((sid, text)),
+        )
+        assert result["status"] == "generated"
+        assert result["content"] == "".join(text for _, text in deltas)
+        assert {sid for sid, _ in deltas} == {3}
+        assert result["usage"]["output_tokens"] == 3
+
+    def test_settings_from_config(self):
+        session = GenerationSession(config={
+            **DEFAULT_CONFIG, "concurrency": "6", "max_tokens_per_section": "2048",
+        })
+        assert session.concurrency == 6
+        assert session.max_tokens == 2048
+
+    def test_records_errors(self, session):
+        def fail(**kwargs):
+            raise RuntimeError("overloaded")
+
+        session.client.create = fail
+        result = write_section(_framework()["sections"][0], _profile(), session=session)
+        assert result["status"] == "error"
+        assert session.stats["errors"] == 1
+
+
+class TestCachedGeneration:
+    def test_rerun_served_from_cache(self, session, tmp_path):
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+        session.cache = ResponseCache(db_path=db_path)
+
+        first = write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        second = write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+
+        assert len(session.client.calls) == 11
+        assert [r["content"] for r in second] == [r["content"] for r in first]
+        assert all(r.get("cached") for r in second)
+        assert session.cache.stats == {"hits": 11, "misses": 11, "errors": 0}
+        assert session.stats["cached"] == 11
+
+    def test_fake_backend_output_not_served_to_real_backend(self, session, tmp_path):
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+        cache = ResponseCache(db_path=db_path)
+        section = _framework()["sections"][0]
+        fake = GenerationSession(
+            config={**DEFAULT_CONFIG, "backend": "fake", "section_packs": []}, cache=cache, limiter=RateLimiter(),
+        )
+        assert write_section(section, _profile(), session=fake)["status"] == "generated"
+
+        session.cache = cache
+        result = write_section(section, _profile(), session=session)
+        assert not result.get("cached")
+        assert len(session.client.calls) == 1
+        assert cache.stats["misses"] == 2
+
+    def test_errors_are_not_cached(self, session, tmp_path):
+        db_path = tmp_path / "test.db"
+        init_db(db_path)
+        session.cache = ResponseCache(db_path=db_path)
+        section = _framework()["sections"][0]
+
+        def fail(**kwargs):
+            raise RuntimeError("overloaded")
+
+        create = session.client.create
+        session.client.create = fail
+        assert write_section(section, _profile(), session=session)["status"] == "error"
+        session.client.create = create
+        result = write_section(section, _profile(), session=session)
+        assert result["status"] == "generated"
+        assert not result.get("cached")
+
+
+class TestPromptCaching:
+    def test_usage_recorded(self, session):
+        results = write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        # Section 2 is the first independent section, so it primes the cache
+        assert results[1]["usage"]["cache_read_input_tokens"] == 0
+        assert all(r["usage"]["cache_read_input_tokens"] == 80 for r in results if r["section_id"] != 2)
+        assert session.usage["cache_read_input_tokens"] == 800
+        assert session.usage["output_tokens"] == 550
+
+    def test_first_section_primes_cache_before_fan_out(self, session):
+        write_all_sections(_framework(), _profile(), session=session, concurrency=4)
+        first = session.client.calls[0]
+        assert _section_heading(first["messages"]).startswith("# Section 2:")
+        assert first["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+class TestRetries:
+    def test_overloaded_section_is_retried(self, session):
+        create = session.client.create
+        failures = []
+
+        class Overloaded(Exception):
+            status_code = 529
+
+        def flaky(**kwargs):
+            if not failures:
+                failures.append(1)
+                raise Overloaded("overloaded")
+            return create(**kwargs)
+
+        session.client.create = flaky
+        session.config["retry_base_delay"] = 0
+        result = write_section(_framework()["sections"][0], _profile(), session=session)
+        assert result["status"] == "generated"
+        assert session.limiter.stats["retries"] == 1
+        assert session.limiter.stats["rate_limited"] == 1